@@ -0,0 +1,348 @@
+"""
+Адаптивне тестування на основі двопараметричної моделі IRT (2PL)
+"""
+
+import argparse
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import config
+from grading import CompiledGrader
+from main import DatabaseManager, Question, QuestionCache, TestEngine, TestSession
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def prior_difficulty(level: int) -> float:
+    """Початкова складність IRT за рівнем, заданим автором (1..3 -> -1..1)"""
+    return float(level) - 2.0
+
+
+class IRTCalibrator:
+    """Пакетне калібрування параметрів питань за всією матрицею відповідей
+
+    Спільна оцінка здібностей студентів та параметрів питань (JML) з
+    нормальними апріорними розподілами. Кожна ітерація - кілька векторних
+    кроків Ньютона над масивами відповідей, без циклів по студентах чи питаннях.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, iterations: Optional[int] = None):
+        self.db_manager = db_manager
+        self.iterations = iterations or config.ADAPTIVE_CONFIG['calibration_iterations']
+
+    def load_responses(self):
+        """Відповіді у вигляді паралельних масивів (студент, питання, правильність)"""
+        with self.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT tr.user_id, ad.question_id, ad.is_correct
+                FROM answer_details ad
+                JOIN test_results tr ON ad.test_result_id = tr.id
+                WHERE ad.is_correct IS NOT NULL
+            ''')
+            rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 3)
+
+            cursor.execute("SELECT id, difficulty FROM questions")
+            levels = dict(cursor.fetchall())
+
+        return rows, levels
+
+    def calibrate(self) -> Dict[int, Tuple[float, float, int]]:
+        """Оцінка параметрів: question_id -> (складність b, розрізнювальність a, відповідей)"""
+        rows, levels = self.load_responses()
+        params = {question_id: (prior_difficulty(level or 2), 1.0, 0)
+                  for question_id, level in levels.items()}
+        if not len(rows):
+            return params
+
+        user_ids, user_index = np.unique(rows[:, 0], return_inverse=True)
+        item_ids, item_index = np.unique(rows[:, 1], return_inverse=True)
+        correct = (rows[:, 2] != 0).astype(np.float64)
+
+        n_users, n_items = len(user_ids), len(item_ids)
+        b_prior = np.array([prior_difficulty(levels.get(int(i)) or 2) for i in item_ids])
+        theta = np.zeros(n_users)
+        b = b_prior.copy()
+        log_a = np.zeros(n_items)
+
+        # Дисперсії апріорних розподілів: здібності, складність, log(розрізнювальність)
+        var_theta, var_b, var_log_a = 1.0, 1.0, 0.25
+
+        for _ in range(self.iterations):
+            a = np.exp(log_a)
+
+            p = _sigmoid(a[item_index] * (theta[user_index] - b[item_index]))
+            residual = correct - p
+            weight = p * (1.0 - p)
+            a_item = a[item_index]
+            gradient = np.bincount(user_index, a_item * residual, n_users) - theta / var_theta
+            information = np.bincount(user_index, a_item ** 2 * weight, n_users) + 1.0 / var_theta
+            theta = np.clip(theta + gradient / information, -4.0, 4.0)
+
+            p = _sigmoid(a_item * (theta[user_index] - b[item_index]))
+            residual = correct - p
+            weight = p * (1.0 - p)
+            gradient = (np.bincount(item_index, -a_item * residual, n_items)
+                        - (b - b_prior) / var_b)
+            information = np.bincount(item_index, a_item ** 2 * weight, n_items) + 1.0 / var_b
+            b = np.clip(b + gradient / information, -4.0, 4.0)
+
+            distance = theta[user_index] - b[item_index]
+            p = _sigmoid(a_item * distance)
+            residual = correct - p
+            weight = p * (1.0 - p)
+            gradient = (np.bincount(item_index, a_item * distance * residual, n_items)
+                        - log_a / var_log_a)
+            information = (np.bincount(item_index, (a_item * distance) ** 2 * weight, n_items)
+                           + 1.0 / var_log_a)
+            log_a = np.clip(log_a + gradient / information, np.log(0.2), np.log(3.0))
+
+        counts = np.bincount(item_index, minlength=n_items)
+        for i, question_id in enumerate(item_ids.tolist()):
+            if question_id in params:
+                params[question_id] = (float(b[i]), float(np.exp(log_a[i])), int(counts[i]))
+        return params
+
+    def save(self, params: Dict[int, Tuple[float, float, int]]):
+        """Збереження параметрів однією пакетною вставкою"""
+        with self.db_manager.get_connection() as conn:
+            conn.execute("DELETE FROM question_irt_params")
+            conn.executemany('''
+                INSERT INTO question_irt_params (question_id, difficulty, discrimination, responses)
+                VALUES (?, ?, ?, ?)
+            ''', [(question_id, b, a, n) for question_id, (b, a, n) in params.items()])
+
+    def run(self) -> int:
+        """Калібрування та збереження; повертає кількість питань"""
+        params = self.calibrate()
+        self.save(params)
+        # Рушії цього процесу одразу переходять на нові параметри
+        reset_item_indexes(self.db_manager.db_name)
+        return len(params)
+
+
+class ItemIndex:
+    """Питання категорії, впорядковані за складністю IRT
+
+    Наступне питання шукається бінарним пошуком за поточною оцінкою
+    здібностей і вибором найінформативнішого серед найближчих за складністю.
+    """
+
+    def __init__(self, items: List[Tuple[float, float, int]], window: int = 8):
+        items = sorted(items)
+        self.difficulties = [item[0] for item in items]
+        self.discriminations = [item[1] for item in items]
+        self.question_ids = [item[2] for item in items]
+        self.positions = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        self.window = window
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+    def params(self, question_id: int, level: int = 2) -> Tuple[float, float]:
+        """(складність, розрізнювальна здатність); для питання поза індексом - апріорні"""
+        i = self.positions.get(question_id)
+        if i is None:
+            return prior_difficulty(level), 1.0
+        return self.difficulties[i], self.discriminations[i]
+
+    def select(self, theta: float, used: Set[int]) -> Optional[int]:
+        """Питання з максимальною інформацією Фішера серед window найближчих"""
+        right = bisect_left(self.difficulties, theta)
+        left = right - 1
+        best_id, best_information = None, -1.0
+        checked = 0
+
+        while checked < self.window and (left >= 0 or right < len(self.difficulties)):
+            # Беремо ближчого за складністю сусіда зліва чи справа
+            if right >= len(self.difficulties) or (
+                    left >= 0 and theta - self.difficulties[left] <= self.difficulties[right] - theta):
+                i, left = left, left - 1
+            else:
+                i, right = right, right + 1
+
+            if self.question_ids[i] in used:
+                continue
+            checked += 1
+
+            a = self.discriminations[i]
+            p = 1.0 / (1.0 + np.exp(-a * (theta - self.difficulties[i])))
+            information = a * a * p * (1.0 - p)
+            if information > best_information:
+                best_id, best_information = self.question_ids[i], information
+
+        return best_id
+
+
+# Індекси питань бази: category_id -> (індекс, час побудови)
+_item_indexes: Dict[str, Dict[int, Tuple[ItemIndex, float]]] = {}
+_item_indexes_lock = threading.Lock()
+
+
+def reset_item_indexes(db_name: str):
+    """Скидання індексів бази (будуть перебудовані при зверненні)"""
+    with _item_indexes_lock:
+        _item_indexes.pop(db_name, None)
+
+
+class AdaptiveTestSession(TestSession):
+    """Сеанс адаптивного тесту: питання додаються по одному за оцінкою здібностей"""
+
+    __slots__ = ('target_count', 'log_posterior', 'theta', 'standard_error')
+
+    def __init__(self, category_id: int, first_entry: Tuple[Question, CompiledGrader],
+                 target_count: int, grid_size: int):
+        super().__init__(category_id, [first_entry])
+        self.target_count = target_count
+        # Апостеріорний розподіл здібностей на сітці, апріорний N(0, 1)
+        grid = AdaptiveTestEngine.ability_grid(grid_size)
+        self.log_posterior = -0.5 * grid ** 2
+        self.theta = 0.0
+        self.standard_error = 1.0
+
+    @property
+    def question_count(self) -> int:
+        return self.target_count
+
+    def is_finished(self) -> bool:
+        return self.current_index >= min(self.target_count, len(self.question_ids))
+
+    def update_ability(self, difficulty: float, discrimination: float, is_correct: bool):
+        """Оновлення оцінки здібностей (EAP) після відповіді, O(розмір сітки)"""
+        grid = AdaptiveTestEngine.ability_grid(len(self.log_posterior))
+        p = _sigmoid(discrimination * (grid - difficulty))
+        self.log_posterior += np.log(p if is_correct else 1.0 - p)
+
+        weights = np.exp(self.log_posterior - self.log_posterior.max())
+        weights /= weights.sum()
+        self.theta = float((grid * weights).sum())
+        self.standard_error = float(np.sqrt(((grid - self.theta) ** 2 * weights).sum()))
+
+
+class AdaptiveTestEngine(TestEngine):
+    """Рушій тестування з підтримкою адаптивних сеансів"""
+
+    _grids: Dict[int, np.ndarray] = {}
+
+    def __init__(self, db_manager: DatabaseManager, question_cache: Optional[QuestionCache] = None):
+        super().__init__(db_manager, question_cache)
+        self.adaptive_config = config.ADAPTIVE_CONFIG
+
+    @classmethod
+    def ability_grid(cls, size: int) -> np.ndarray:
+        if size not in cls._grids:
+            cls._grids[size] = np.linspace(-4.0, 4.0, size)
+        return cls._grids[size]
+
+    def get_item_index(self, category_id: int) -> ItemIndex:
+        """Індекс питань категорії за складністю (спільний для рушіїв бази)
+
+        Запит виконується поза спільним блокуванням, тож побудова індексу
+        однієї категорії не затримує вибір питань в інших категоріях і базах.
+        """
+        with _item_indexes_lock:
+            indexes = _item_indexes.setdefault(self.db_manager.db_name, {})
+            entry = indexes.get(category_id)
+            if (entry is not None and
+                    time.monotonic() - entry[1] <= self.adaptive_config['index_rebuild_seconds']):
+                return entry[0]
+
+        with self.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT q.id, q.difficulty, p.difficulty, p.discrimination
+                FROM questions q
+                LEFT JOIN question_irt_params p ON p.question_id = q.id
+                WHERE q.category_id = ?
+            ''', (category_id,))
+            items = [(b if b is not None else prior_difficulty(level or 2),
+                      a if a is not None else 1.0, question_id)
+                     for question_id, level, b, a in cursor.fetchall()]
+        index = ItemIndex(items, self.adaptive_config['selection_window'])
+
+        with _item_indexes_lock:
+            # Після reset_item_indexes під час запиту індекс може бути застарілим
+            if _item_indexes.get(self.db_manager.db_name) is indexes:
+                indexes[category_id] = (index, time.monotonic())
+        return index
+
+    def invalidate_item_indexes(self):
+        """Скидання індексів після повторного калібрування"""
+        reset_item_indexes(self.db_manager.db_name)
+
+    def select_entry(self, index: ItemIndex, theta: float,
+                     used: Set[int]) -> Optional[Tuple[Question, CompiledGrader]]:
+        """Наступне питання за оцінкою здібностей; видалені з бази пропускаються"""
+        used = set(used)
+        while True:
+            question_id = index.select(theta, used)
+            if question_id is None:
+                return None
+            entries = self.resolve_entries([question_id])
+            if entries:
+                return entries[0]
+            used.add(question_id)
+
+    def start_adaptive_session(self, category_id: int,
+                               num_questions: int = 10) -> Optional[AdaptiveTestSession]:
+        """Новий адаптивний сеанс: перше питання середньої складності"""
+        index = self.get_item_index(category_id)
+        first = self.select_entry(index, 0.0, set())
+        if first is None:
+            return None
+        return AdaptiveTestSession(category_id, first, min(num_questions, len(index)),
+                                   self.adaptive_config['ability_grid_points'])
+
+    def submit_answer(self, session: TestSession, answer: str) -> bool:
+        """Подача відповіді; для адаптивного сеансу - вибір наступного питання"""
+        if not super().submit_answer(session, answer):
+            return False
+        if not isinstance(session, AdaptiveTestSession):
+            return True
+
+        i = session.current_index - 1
+        index = self.get_item_index(session.category_id)
+        difficulty, discrimination = index.params(session.question_ids[i],
+                                                  session.questions[i].difficulty)
+        session.update_ability(difficulty, discrimination,
+                               self.grade_answer(session, i, session.graders[i]))
+
+        if session.current_index < session.target_count:
+            next_entry = self.select_entry(index, session.theta, set(session.question_ids))
+            if next_entry is None:
+                session.target_count = session.current_index
+            else:
+                session.add_question(*next_entry)
+        return True
+
+    def finish_session(self, session: TestSession, user_id: int) -> Dict:
+        """Завершення сеансу; для адаптивного - з оцінкою рівня знань"""
+        if isinstance(session, AdaptiveTestSession):
+            # Питання, вибране, але не показане, не зараховується
+            session.truncate(session.current_index)
+        results = super().finish_session(session, user_id)
+        if results and isinstance(session, AdaptiveTestSession):
+            results['ability'] = round(session.theta, 2)
+            results['ability_error'] = round(session.standard_error, 2)
+        return results
+
+
+def main():
+    """Пакетне калібрування параметрів питань"""
+    parser = argparse.ArgumentParser(description="Калібрування параметрів IRT питань")
+    parser.add_argument('--db', default=config.DATABASE_CONFIG['sqlite']['db_name'])
+    parser.add_argument('--iterations', type=int, default=None)
+    args = parser.parse_args()
+
+    count = IRTCalibrator(DatabaseManager(args.db), args.iterations).run()
+    print(f"Відкалібровано параметри {count} питань")
+
+
+if __name__ == "__main__":
+    main()
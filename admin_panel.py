@@ -8,6 +8,8 @@ import sqlite3
 import json
 import csv
 import datetime
+import os
+import re
 from typing import Dict, List, Tuple, Optional, Any
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
@@ -18,12 +20,31 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 
+from archive import connect_full_history
+from class_groups import ClassGroupManager
+from config import config
+from grading import regex_answer_error
+from leaderboard import get_loaded_leaderboards
+from main import invalidate_question_cache
+from question_dedup import get_dedup_index, get_loaded_dedup_index
+from question_importer import QuestionImporter
+from replica import read_database
+from repositories import get_statements
+from system_statistics import SystemStatistics
+from security import get_credential_cache
+from user_stats import get_user_stats_store
+
+
+# Слово пошукового запиту (апострофи всередині слова зберігаються)
+SEARCH_WORD_RE = re.compile(r"[\w'ʼ’]+")
+
 
 class QuestionManager:
     """Клас для управління питаннями"""
 
     def __init__(self, db_name: str):
         self.db_name = db_name
+        self._fts_available: Optional[bool] = None
 
     def get_all_questions(self) -> List[Tuple]:
         """Отримання всіх питань"""
@@ -32,9 +53,11 @@ class QuestionManager:
 
         cursor.execute('''
             SELECT q.id, c.name, q.question_text, q.question_type, 
-                   q.correct_answer, q.difficulty, 0
+                   q.correct_answer, q.difficulty, s.responses,
+                   s.p_value, s.discrimination, s.avg_time
             FROM questions q
             JOIN categories c ON q.category_id = c.id
+            LEFT JOIN question_stats s ON s.question_id = q.id
             ORDER BY c.name, q.difficulty, q.id
         ''')
 
@@ -42,6 +65,84 @@ class QuestionManager:
         conn.close()
         return questions
 
+    def has_search_index(self) -> bool:
+        """Чи є у базі повнотекстовий індекс питань"""
+        if self._fts_available is None:
+            conn = sqlite3.connect(self.db_name)
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'questions_fts'")
+            self._fts_available = cursor.fetchone() is not None
+            conn.close()
+        return self._fts_available
+
+    @staticmethod
+    def build_match_query(query: str) -> str:
+        """Перетворення введеного тексту на запит FTS5: усі слова, пошук за префіксом"""
+        words = [word.strip("'ʼ’") for word in SEARCH_WORD_RE.findall(query.lower())]
+        return ' AND '.join(f'"{word}"*' for word in words if word)
+
+    def search(self, query: str, category: Optional[int] = None,
+               difficulty: Optional[int] = None, limit: int = 200) -> List[Tuple]:
+        """Пошук питань за текстом, поясненням та варіантами відповідей
+
+        Результати впорядковані за релевантністю (BM25) і мають той самий
+        формат, що й get_all_questions.
+        """
+        filters = []
+        params: List[Any] = []
+        if category is not None:
+            filters.append("q.category_id = ?")
+            params.append(category)
+        if difficulty is not None:
+            filters.append("q.difficulty = ?")
+            params.append(difficulty)
+
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+
+        try:
+            if self.has_search_index():
+                match_query = self.build_match_query(query)
+                if not match_query:
+                    return []
+                where = ''.join(f" AND {f}" for f in filters)
+                # Збіг у тексті питання важить більше, ніж у поясненні чи варіантах
+                cursor.execute(f'''
+                    SELECT q.id, c.name, q.question_text, q.question_type,
+                           q.correct_answer, q.difficulty, s.responses,
+                           s.p_value, s.discrimination, s.avg_time
+                    FROM questions_fts
+                    JOIN questions q ON q.id = questions_fts.rowid
+                    JOIN categories c ON q.category_id = c.id
+                    LEFT JOIN question_stats s ON s.question_id = q.id
+                    WHERE questions_fts MATCH ?{where}
+                    ORDER BY bm25(questions_fts, 10.0, 2.0, 1.0)
+                    LIMIT ?
+                ''', [match_query] + params + [limit])
+            else:
+                pattern = f"%{query.strip()}%"
+                where = ''.join(f" AND {f}" for f in filters)
+                cursor.execute(f'''
+                    SELECT q.id, c.name, q.question_text, q.question_type,
+                           q.correct_answer, q.difficulty, s.responses,
+                           s.p_value, s.discrimination, s.avg_time
+                    FROM questions q
+                    JOIN categories c ON q.category_id = c.id
+                    LEFT JOIN question_stats s ON s.question_id = q.id
+                    WHERE (q.question_text LIKE ? OR q.explanation LIKE ?
+                           OR q.options LIKE ?){where}
+                    ORDER BY q.id
+                    LIMIT ?
+                ''', [pattern, pattern, pattern] + params + [limit])
+
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Помилка пошуку питань: {e}")
+            return []
+        finally:
+            conn.close()
+
     def get_categories(self) -> List[Tuple]:
         """Отримання всіх категорій"""
         conn = sqlite3.connect(self.db_name)
@@ -62,7 +163,7 @@ class QuestionManager:
             conn = sqlite3.connect(self.db_name)
             cursor = conn.cursor()
 
-            options_json = json.dumps(options) if options else None
+            options_json = json.dumps(options, ensure_ascii=False) if options else None
 
             cursor.execute('''
                 INSERT INTO questions (category_id, question_text, question_type, 
@@ -70,9 +171,15 @@ class QuestionManager:
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (category_id, question_text, question_type, correct_answer,
                   options_json, difficulty, explanation))
+            question_id = cursor.lastrowid
 
             conn.commit()
             conn.close()
+            invalidate_question_cache(self.db_name, question_id)
+
+            index = get_loaded_dedup_index(self.db_name)
+            if index is not None:
+                index.add(question_id, question_text)
             return True
         except Exception as e:
             print(f"Помилка додавання питання: {e}")
@@ -86,7 +193,7 @@ class QuestionManager:
             conn = sqlite3.connect(self.db_name)
             cursor = conn.cursor()
 
-            options_json = json.dumps(options) if options else None
+            options_json = json.dumps(options, ensure_ascii=False) if options else None
 
             cursor.execute('''
                 UPDATE questions 
@@ -98,6 +205,12 @@ class QuestionManager:
 
             conn.commit()
             conn.close()
+            # Нові тести перевірятимуться вже за зміненою відповіддю
+            invalidate_question_cache(self.db_name, question_id)
+
+            index = get_loaded_dedup_index(self.db_name)
+            if index is not None:
+                index.add(question_id, question_text)
             return True
         except Exception as e:
             print(f"Помилка оновлення питання: {e}")
@@ -123,13 +236,51 @@ class QuestionManager:
                 cursor.execute(
                     "DELETE FROM questions WHERE id = ?", (question_id,))
 
+                index = get_loaded_dedup_index(self.db_name)
+                if index is not None:
+                    index.remove(question_id)
+
             conn.commit()
             conn.close()
+            invalidate_question_cache(self.db_name, question_id)
             return True
         except Exception as e:
             print(f"Помилка видалення питання: {e}")
             return False
 
+    def find_similar_questions(self, question_text: str,
+                               exclude_id: Optional[int] = None) -> List[Tuple[int, str, float]]:
+        """Питання, майже однакові з заданим текстом: (id, текст, схожість)"""
+        matches = get_dedup_index(self.db_name).query(question_text, exclude_id)
+        if not matches:
+            return []
+
+        texts = self._get_question_texts([question_id for question_id, _ in matches])
+        return [(question_id, texts[question_id], score)
+                for question_id, score in matches if question_id in texts]
+
+    def get_duplicate_report(self) -> List[Tuple[int, str, int, str, float]]:
+        """Звіт про пари майже однакових питань у всьому банку"""
+        pairs = get_dedup_index(self.db_name).find_duplicate_pairs()
+        texts = self._get_question_texts(
+            list({question_id for pair in pairs for question_id in pair[:2]}))
+        return [(first, texts[first], second, texts[second], score)
+                for first, second, score in pairs if first in texts and second in texts]
+
+    def _get_question_texts(self, question_ids: List[int]) -> Dict[int, str]:
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        texts = {}
+        # Обмеження SQLite на кількість параметрів запиту
+        for start in range(0, len(question_ids), 500):
+            chunk = question_ids[start:start + 500]
+            cursor.execute(
+                f"SELECT id, question_text FROM questions WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk)
+            texts.update(cursor.fetchall())
+        conn.close()
+        return texts
+
     def add_category(self, name: str, description: str) -> bool:
         """Додавання нової категорії"""
         try:
@@ -152,21 +303,29 @@ class UserManager:
 
     def __init__(self, db_name: str):
         self.db_name = db_name
+        self.statements = get_statements('sqlite')
 
-    def get_all_users(self) -> List[Tuple]:
-        """Отримання всіх користувачів"""
+    def get_all_users(self, group_id: Optional[int] = None) -> List[Tuple]:
+        """Отримання всіх користувачів (або лише учнів класу group_id)"""
         conn = sqlite3.connect(self.db_name)
         cursor = conn.cursor()
 
-        cursor.execute('''
+        group_filter = ''
+        params: Tuple = ()
+        if group_id is not None:
+            group_filter = 'WHERE u.id IN (SELECT user_id FROM class_members WHERE group_id = ?)'
+            params = (group_id,)
+
+        cursor.execute(f'''
             SELECT u.id, u.username, u.email, u.registration_date, u.is_admin,
                    COUNT(tr.id) as tests_count,
                    AVG(CAST(tr.correct_answers AS FLOAT) / tr.total_questions * 100) as avg_score
             FROM users u
             LEFT JOIN test_results tr ON u.id = tr.user_id
+            {group_filter}
             GROUP BY u.id, u.username, u.email, u.registration_date, u.is_admin
             ORDER BY u.registration_date DESC
-        ''')
+        ''', params)
 
         users = cursor.fetchall()
         conn.close()
@@ -174,56 +333,45 @@ class UserManager:
 
     def get_user_statistics(self, user_id: int) -> Dict[str, Any]:
         """Отримання детальної статистики користувача"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        # Загальна статистика
-        cursor.execute('''
-            SELECT COUNT(*) as total_tests,
-                   SUM(total_questions) as total_questions,
-                   SUM(correct_answers) as total_correct,
-                   SUM(time_spent) as total_time,
-                   AVG(CAST(correct_answers AS FLOAT) / total_questions * 100) as avg_percentage
-            FROM test_results
-            WHERE user_id = ?
-        ''', (user_id,))
+        # Те саме зведення, що бачить студент (без агрегації історії)
+        store = get_user_stats_store(self.db_name)
+        stats = store.get(user_id)
+        general_stats = (stats.tests, stats.total_questions, stats.correct_answers,
+                         stats.time_spent, stats.average_percentage)
+        category_stats = store.get_user_categories(user_id)
 
-        general_stats = cursor.fetchone()
-
-        # Статистика по категоріях
-        cursor.execute('''
-            SELECT c.name, COUNT(*) as tests_count,
-                   AVG(CAST(tr.correct_answers AS FLOAT) / tr.total_questions * 100) as avg_score
-            FROM test_results tr
-            JOIN categories c ON tr.category_id = c.id
-            WHERE tr.user_id = ?
-            GROUP BY c.name
-            ORDER BY avg_score DESC
-        ''', (user_id,))
-
-        category_stats = cursor.fetchall()
-
-        # Останні тести
-        cursor.execute('''
-            SELECT c.name, tr.test_date, tr.total_questions, tr.correct_answers,
-                   CAST(tr.correct_answers AS FLOAT) / tr.total_questions * 100 as percentage
-            FROM test_results tr
-            JOIN categories c ON tr.category_id = c.id
-            WHERE tr.user_id = ?
-            ORDER BY tr.test_date DESC
-            LIMIT 10
-        ''', (user_id,))
-
-        recent_tests = cursor.fetchall()
-
-        conn.close()
+        recent_tests, recent_cursor = self.get_user_history_page(
+            user_id, None, config.UI_CONFIG['history_page_size'])
 
         return {
             'general': general_stats,
             'categories': category_stats,
-            'recent_tests': recent_tests
+            'recent_tests': recent_tests,
+            'recent_cursor': recent_cursor
         }
 
+    def get_user_history_page(self, user_id: int, after: Optional[Tuple] = None,
+                              limit: int = 50) -> Tuple[List[Tuple], Optional[Tuple]]:
+        """Сторінка тестів користувача: (категорія, дата, питань, правильно, відсоток)
+
+        after - курсор (дата, id) попередньої сторінки; повертається курсор наступної.
+        """
+        conn = sqlite3.connect(read_database(self.db_name))
+        try:
+            cursor = conn.cursor()
+            if after is None:
+                cursor.execute(self.statements.get('result.history'), (user_id, limit))
+            else:
+                cursor.execute(self.statements.get('result.history_after'),
+                               (user_id, after[0], after[0], after[1], limit))
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        next_cursor = (rows[-1][0], rows[-1][5]) if len(rows) == limit else None
+        return [(name, test_date, total, correct, correct * 100.0 / total)
+                for test_date, name, total, correct, _, _ in rows], next_cursor
+
     def toggle_admin_status(self, user_id: int) -> bool:
         """Зміна статусу адміністратора"""
         try:
@@ -232,9 +380,12 @@ class UserManager:
 
             cursor.execute(
                 "UPDATE users SET is_admin = NOT is_admin WHERE id = ?", (user_id,))
+            # Сесії зі старим статусом завершуються, права беруться при новому вході
+            cursor.execute("UPDATE user_sessions SET is_active = 0 WHERE user_id = ?", (user_id,))
 
             conn.commit()
             conn.close()
+            get_credential_cache(self.db_name).invalidate_user_id(user_id)
             return True
         except Exception as e:
             print(f"Помилка зміни статусу: {e}")
@@ -251,113 +402,42 @@ class UserManager:
                 "DELETE FROM answer_details WHERE test_result_id IN (SELECT id FROM test_results WHERE user_id = ?)", (user_id,))
             cursor.execute(
                 "DELETE FROM test_results WHERE user_id = ?", (user_id,))
+            cursor.execute("DELETE FROM result_rollups WHERE user_id = ?", (user_id,))
+            cursor.execute("DELETE FROM class_members WHERE user_id = ?", (user_id,))
+            cursor.execute("UPDATE user_sessions SET is_active = 0 WHERE user_id = ?", (user_id,))
+            cursor.execute(self.statements.get('user_stats.delete'), (user_id,))
             cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
 
             conn.commit()
             conn.close()
+            get_credential_cache(self.db_name).invalidate_user_id(user_id)
+            get_user_stats_store(self.db_name).invalidate(user_id)
+            leaderboards = get_loaded_leaderboards(self.db_name)
+            if leaderboards:
+                leaderboards.remove_user(user_id)
             return True
         except Exception as e:
             print(f"Помилка видалення користувача: {e}")
             return False
 
 
-class SystemStatistics:
-    """Клас для системної статистики"""
-
-    def __init__(self, db_name: str):
-        self.db_name = db_name
-
-    def get_general_statistics(self) -> Dict[str, Any]:
-        """Отримання загальної статистики системи"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        # Загальні показники
-        cursor.execute("SELECT COUNT(*) FROM users")
-        total_users = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM users WHERE is_admin = 1")
-        admin_users = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM questions")
-        total_questions = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM categories")
-        total_categories = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM test_results")
-        total_tests = cursor.fetchone()[0]
-
-        cursor.execute("SELECT SUM(total_questions) FROM test_results")
-        total_answered = cursor.fetchone()[0] or 0
-
-        cursor.execute("SELECT SUM(correct_answers) FROM test_results")
-        total_correct = cursor.fetchone()[0] or 0
-
-        cursor.execute(
-            "SELECT AVG(CAST(correct_answers AS FLOAT) / total_questions * 100) FROM test_results")
-        avg_success_rate = cursor.fetchone()[0] or 0
-
-        # Активність по днях (останні 30 днів)
-        cursor.execute('''
-            SELECT DATE(test_date) as test_day, COUNT(*) as tests_count
-            FROM test_results
-            WHERE test_date >= date('now', '-30 days')
-            GROUP BY DATE(test_date)
-            ORDER BY test_day
-        ''')
-        daily_activity = cursor.fetchall()
-
-        # Популярність категорій
-        cursor.execute('''
-            SELECT c.name, COUNT(*) as tests_count
-            FROM test_results tr
-            JOIN categories c ON tr.category_id = c.id
-            GROUP BY c.name
-            ORDER BY tests_count DESC
-        ''')
-        category_popularity = cursor.fetchall()
-
-        # Розподіл по складності
-        cursor.execute('''
-            SELECT q.difficulty, COUNT(ad.id) as answers_count
-            FROM answer_details ad
-            JOIN questions q ON ad.question_id = q.id
-            GROUP BY q.difficulty
-            ORDER BY q.difficulty
-        ''')
-        difficulty_distribution = cursor.fetchall()
-
-        conn.close()
-
-        return {
-            'general': {
-                'total_users': total_users,
-                'admin_users': admin_users,
-                'regular_users': total_users - admin_users,
-                'total_questions': total_questions,
-                'total_categories': total_categories,
-                'total_tests': total_tests,
-                'total_answered': total_answered,
-                'total_correct': total_correct,
-                'avg_success_rate': round(avg_success_rate, 2) if avg_success_rate else 0
-            },
-            'daily_activity': daily_activity,
-            'category_popularity': category_popularity,
-            'difficulty_distribution': difficulty_distribution
-        }
-
-
 class DataExporter:
     """Клас для експорту даних"""
 
     def __init__(self, db_name: str):
         self.db_name = db_name
 
-    def export_to_csv(self, data_type: str, filename: str) -> bool:
+    def connect(self, full_history: bool = False) -> sqlite3.Connection:
+        """З'єднання для експорту; full_history - разом з архівами результатів"""
+        db_name = read_database(self.db_name)
+        if full_history:
+            return connect_full_history(db_name, archives_of=self.db_name)
+        return sqlite3.connect(db_name)
+
+    def export_to_csv(self, data_type: str, filename: str, full_history: bool = False) -> bool:
         """Експорт даних у CSV формат"""
         try:
-            conn = sqlite3.connect(self.db_name)
+            conn = self.connect(full_history)
 
             if data_type == "users":
                 df = pd.read_sql_query('''
@@ -372,7 +452,7 @@ class DataExporter:
             elif data_type == "questions":
                 df = pd.read_sql_query('''
                     SELECT q.id, c.name as category, q.question_text, q.question_type,
-                           q.correct_answer, q.difficulty, q.explanation
+                           q.correct_answer, q.options, q.difficulty, q.explanation
                     FROM questions q
                     JOIN categories c ON q.category_id = c.id
                 ''', conn)
@@ -389,6 +469,13 @@ class DataExporter:
                     ORDER BY tr.test_date DESC
                 ''', conn)
 
+            elif data_type == "class_report":
+                # Архівні результати вже враховано через result_rollups
+                report = ClassGroupManager(self.db_name).get_class_report()
+                df = pd.DataFrame([row[1:] for row in report], columns=[
+                    'class', 'category', 'students', 'tests', 'total_questions',
+                    'correct_answers', 'avg_percentage'])
+
             else:
                 return False
 
@@ -400,10 +487,10 @@ class DataExporter:
             print(f"Помилка експорту CSV: {e}")
             return False
 
-    def export_to_json(self, data_type: str, filename: str) -> bool:
+    def export_to_json(self, data_type: str, filename: str, full_history: bool = False) -> bool:
         """Експорт даних у JSON формат"""
         try:
-            conn = sqlite3.connect(self.db_name)
+            conn = self.connect(full_history)
             cursor = conn.cursor()
 
             if data_type == "full_backup":
@@ -519,6 +606,32 @@ class DataExporter:
 
                 story.append(cat_table)
 
+            elif report_type == "class_report":
+                story.append(Paragraph("Результати класів по категоріях", title_style))
+                story.append(Spacer(1, 20))
+
+                report = ClassGroupManager(self.db_name).get_class_report()
+                classes: Dict[str, List] = {}
+                for _, class_name, category, students, tests, _, _, avg in report:
+                    classes.setdefault(class_name, []).append(
+                        [category, students, tests, f"{avg:.1f}%"])
+
+                for class_name, rows in classes.items():
+                    story.append(Paragraph(class_name, styles['Heading2']))
+                    story.append(Spacer(1, 10))
+
+                    class_table = Table([['Категорія', 'Учнів', 'Тестів', 'Середній бал']] + rows)
+                    class_table.setStyle(TableStyle([
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+                    ]))
+
+                    story.append(class_table)
+                    story.append(Spacer(1, 20))
+
             doc.build(story)
             return True
 
@@ -531,6 +644,9 @@ class AdminPanelGUI:
     """Графічний інтерфейс адміністративної панелі"""
 
     def __init__(self, parent, db_name: str, current_user):
+        # sqlite3.connect створив би новий порожній файл (наприклад, для "mysql://...")
+        if not os.path.isfile(db_name):
+            raise ValueError(f"Адміністративна панель потребує файл SQLite: {db_name}")
         self.parent = parent
         self.db_name = db_name
         self.current_user = current_user
@@ -538,6 +654,7 @@ class AdminPanelGUI:
         # Ініціалізуємо менеджери
         self.question_manager = QuestionManager(db_name)
         self.user_manager = UserManager(db_name)
+        self.class_manager = ClassGroupManager(db_name)
         self.statistics = SystemStatistics(db_name)
         self.exporter = DataExporter(db_name)
 
@@ -567,6 +684,8 @@ class AdminPanelGUI:
                    command=self.show_question_management, width=25).pack(side='left', padx=5)
         ttk.Button(menu_frame, text="Управління користувачами",
                    command=self.show_user_management, width=25).pack(side='left', padx=5)
+        ttk.Button(menu_frame, text="Класи",
+                   command=self.show_class_management, width=25).pack(side='left', padx=5)
         ttk.Button(menu_frame, text="Статистика системи",
                    command=self.show_system_statistics, width=25).pack(side='left', padx=5)
         ttk.Button(menu_frame, text="Експорт даних",
@@ -684,25 +803,61 @@ class AdminPanelGUI:
                    command=self.delete_question).pack(side='left', padx=5)
         ttk.Button(button_frame, text="Оновити",
                    command=self.refresh_questions).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Пошук дублікатів",
+                   command=self.show_duplicate_report).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Імпорт питань",
+                   command=self.import_questions).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Оновити аналітику",
+                   command=self.update_question_analytics).pack(side='left', padx=5)
         ttk.Button(button_frame, text="Додати категорію",
                    command=self.add_category_dialog).pack(side='right', padx=5)
 
+        # Панель пошуку
+        search_frame = ttk.Frame(self.work_frame)
+        search_frame.pack(fill='x', pady=5)
+
+        ttk.Label(search_frame, text="Пошук:").pack(side='left', padx=5)
+        self.question_search_var = tk.StringVar()
+        search_entry = ttk.Entry(
+            search_frame, textvariable=self.question_search_var, width=40)
+        search_entry.pack(side='left', padx=5)
+        search_entry.bind('<Return>', lambda e: self.refresh_questions())
+        search_entry.bind('<KeyRelease>', self.schedule_question_search)
+
+        self.search_categories = {
+            name: category_id for category_id, name, _ in self.question_manager.get_categories()}
+        self.search_category_var = tk.StringVar(value="Всі категорії")
+        category_combo = ttk.Combobox(
+            search_frame, textvariable=self.search_category_var, state='readonly', width=25,
+            values=["Всі категорії"] + list(self.search_categories))
+        category_combo.pack(side='left', padx=5)
+        category_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh_questions())
+
+        self.search_difficulty_var = tk.StringVar(value="Будь-яка")
+        difficulty_combo = ttk.Combobox(
+            search_frame, textvariable=self.search_difficulty_var, state='readonly', width=12,
+            values=["Будь-яка", "Легкий", "Середній", "Важкий"])
+        difficulty_combo.pack(side='left', padx=5)
+        difficulty_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh_questions())
+
+        ttk.Button(search_frame, text="Скинути",
+                   command=self.reset_question_search).pack(side='left', padx=5)
+        self._search_after_id = None
+
         # Таблиця питань
         table_frame = ttk.Frame(self.work_frame)
         table_frame.pack(fill='both', expand=True, pady=10)
 
-        columns = ('ID', 'Категорія', 'Питання',
-                   'Тип', 'Складність', 'Використання')
+        columns = ('ID', 'Категорія', 'Питання', 'Тип', 'Складність',
+                   'Використання', 'Правильних', 'Дискримінація', 'Сер. час')
         self.questions_tree = ttk.Treeview(
             table_frame, columns=columns, show='headings', height=20)
 
-        # Налаштування колонок
-        self.questions_tree.heading('ID', text='ID')
-        self.questions_tree.heading('Категорія', text='Категорія')
-        self.questions_tree.heading('Питання', text='Питання')
-        self.questions_tree.heading('Тип', text='Тип')
-        self.questions_tree.heading('Складність', text='Складність')
-        self.questions_tree.heading('Використання', text='Використання')
+        # Налаштування колонок (клік по заголовку - сортування)
+        for column in columns:
+            self.questions_tree.heading(
+                column, text=column,
+                command=lambda c=column: self.sort_questions(c))
 
         self.questions_tree.column('ID', width=50)
         self.questions_tree.column('Категорія', width=150)
@@ -710,6 +865,10 @@ class AdminPanelGUI:
         self.questions_tree.column('Тип', width=120)
         self.questions_tree.column('Складність', width=100)
         self.questions_tree.column('Використання', width=100)
+        self.questions_tree.column('Правильних', width=90)
+        self.questions_tree.column('Дискримінація', width=100)
+        self.questions_tree.column('Сер. час', width=80)
+        self._questions_sort = (None, False)
 
         # Скролбар
         scrollbar_q = ttk.Scrollbar(
@@ -728,8 +887,18 @@ class AdminPanelGUI:
         for item in self.questions_tree.get_children():
             self.questions_tree.delete(item)
 
-        # Завантажуємо питання
-        questions = self.question_manager.get_all_questions()
+        # Завантажуємо питання (з урахуванням пошуку та фільтрів)
+        query = self.question_search_var.get().strip()
+        category = self.search_categories.get(self.search_category_var.get())
+        difficulty = {"Легкий": 1, "Середній": 2,
+                      "Важкий": 3}.get(self.search_difficulty_var.get())
+
+        if query:
+            questions = self.question_manager.search(query, category, difficulty)
+        else:
+            questions = [q for q in self.question_manager.get_all_questions()
+                         if (category is None or q[1] == self.search_category_var.get())
+                         and (difficulty is None or q[5] == difficulty)]
 
         for question in questions:
             # Обрізаємо довгий текст питання
@@ -745,9 +914,135 @@ class AdminPanelGUI:
                 question_text,  # Питання (обрізане)
                 question[3],  # Тип
                 difficulty_text,  # Складність
-                question[6] or 0  # Використання
+                question[6] or 0,  # Використання (кількість відповідей)
+                f"{question[7]:.0%}" if question[7] is not None else "-",
+                f"{question[8]:.2f}" if question[8] is not None else "-",
+                f"{question[9]:.0f} с" if question[9] is not None else "-"
             ))
 
+    def sort_questions(self, column: str):
+        """Сортування таблиці питань за колонкою (повторний клік - у зворотному порядку)"""
+        previous, descending = self._questions_sort
+        descending = not descending if previous == column else False
+        self._questions_sort = (column, descending)
+
+        def sort_key(item):
+            value = self.questions_tree.set(item, column)
+            number = value.rstrip('%с ').strip()
+            try:
+                return (0, float(number), '')
+            except ValueError:
+                # Числа, текст і порожні показники ("-") сортуються окремими групами
+                return (2 if value == "-" else 1, 0.0, value)
+
+        items = sorted(self.questions_tree.get_children(), key=sort_key, reverse=descending)
+        for position, item in enumerate(items):
+            self.questions_tree.move(item, '', position)
+
+    def update_question_analytics(self):
+        """Перерахунок показників якості питань за всіма відповідями"""
+        try:
+            from item_analytics import ItemAnalytics
+            count = ItemAnalytics(self.db_name).run()
+        except (ImportError, sqlite3.Error) as e:
+            messagebox.showerror("Помилка", f"Не вдалося оновити аналітику: {e}")
+            return
+
+        messagebox.showinfo("Аналітика", f"Оновлено показники {count} питань")
+        self.refresh_questions()
+
+    def schedule_question_search(self, event=None):
+        """Пошук під час введення (із затримкою, щоб не шукати на кожну літеру)"""
+        if self._search_after_id:
+            self.parent.after_cancel(self._search_after_id)
+        self._search_after_id = self.parent.after(250, self.refresh_questions)
+
+    def reset_question_search(self):
+        """Скидання пошуку та фільтрів"""
+        self.question_search_var.set("")
+        self.search_category_var.set("Всі категорії")
+        self.search_difficulty_var.set("Будь-яка")
+        self.refresh_questions()
+
+    def show_duplicate_report(self):
+        """Звіт про майже однакові питання"""
+        report = self.question_manager.get_duplicate_report()
+        if not report:
+            messagebox.showinfo("Дублікати", "Майже однакових питань не знайдено")
+            return
+
+        dialog = tk.Toplevel(self.window)
+        dialog.title(f"Майже однакові питання ({len(report)})")
+        dialog.geometry("900x500")
+
+        columns = ('Схожість', 'ID 1', 'Питання 1', 'ID 2', 'Питання 2')
+        tree = ttk.Treeview(dialog, columns=columns, show='headings')
+        for column, width in zip(columns, (80, 50, 330, 50, 330)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width)
+
+        for first, first_text, second, second_text, score in report:
+            tree.insert('', 'end', values=(
+                f"{score:.0%}", first, first_text[:60], second, second_text[:60]))
+
+        scrollbar = ttk.Scrollbar(dialog, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+    def import_questions(self):
+        """Масовий імпорт питань з файлу (спочатку перевірка без змін)"""
+        filename = filedialog.askopenfilename(
+            title="Імпорт питань",
+            filetypes=[("Усі підтримувані", "*.csv *.json *.jsonl *.gift *.txt"),
+                       ("CSV files", "*.csv"), ("JSON files", "*.json *.jsonl"),
+                       ("Moodle GIFT", "*.gift *.txt"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+
+        importer = QuestionImporter(self.db_name)
+        self.window.config(cursor='watch')
+        self.window.update()
+        try:
+            report = importer.import_file(filename, dry_run=True)
+        finally:
+            self.window.config(cursor='')
+
+        if not report.imported:
+            messagebox.showerror("Імпорт", f"Немає питань для імпорту\n\n{report.summary()}")
+            self.offer_import_error_report(report)
+            return
+
+        if not messagebox.askyesno("Імпорт", f"{report.summary()}\n\nВиконати імпорт?"):
+            return
+
+        self.window.config(cursor='watch')
+        self.window.update()
+        try:
+            report = importer.import_file(filename)
+        finally:
+            self.window.config(cursor='')
+        invalidate_question_cache(self.db_name)
+
+        messagebox.showinfo("Імпорт", report.summary())
+        self.offer_import_error_report(report)
+        self.refresh_questions()
+
+    def offer_import_error_report(self, report):
+        """Збереження звіту про помилки імпорту"""
+        if not report.errors or not messagebox.askyesno(
+                "Імпорт", f"Зберегти звіт про помилки ({len(report.errors)})?"):
+            return
+
+        filename = filedialog.asksaveasfilename(
+            title="Звіт про помилки імпорту",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if filename:
+            report.save_errors(filename)
+
     def add_question_dialog(self):
         """Діалог додавання питання"""
         self.question_dialog(mode='add')
@@ -909,6 +1204,23 @@ class AdminPanelGUI:
                         "Помилка", "Для множинного вибору потрібно мінімум 2 варіанти")
                     return
 
+            regex_error = regex_answer_error(q_type, correct_ans)
+            if regex_error:
+                messagebox.showerror("Помилка", regex_error, parent=dialog)
+                return
+
+            # Попередження про майже однакові питання
+            similar = self.question_manager.find_similar_questions(
+                q_text, question_id if mode == 'edit' else None)
+            if similar:
+                listing = "\n".join(f"#{sid} ({score:.0%}): {text[:80]}"
+                                     for sid, text, score in similar[:5])
+                if not messagebox.askyesno(
+                        "Схожі питання",
+                        f"У банку вже є схожі питання:\n\n{listing}\n\nЗберегти все одно?",
+                        parent=dialog):
+                    return
+
             # Збереження
             if mode == 'add':
                 success = self.question_manager.add_question(
@@ -1018,6 +1330,17 @@ class AdminPanelGUI:
         ttk.Button(button_frame, text="Оновити",
                    command=self.refresh_users).pack(side='left', padx=5)
 
+        # Фільтр за класом
+        self.user_groups = {"Усі користувачі": None}
+        self.user_groups.update({name: group_id for group_id, name, _, _
+                                 in self.class_manager.get_groups()})
+        self.user_group_var = tk.StringVar(value="Усі користувачі")
+        group_combo = ttk.Combobox(button_frame, textvariable=self.user_group_var,
+                                   values=list(self.user_groups), state='readonly', width=25)
+        group_combo.pack(side='right', padx=5)
+        group_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh_users())
+        ttk.Label(button_frame, text="Клас:").pack(side='right')
+
         # Таблиця користувачів
         table_frame = ttk.Frame(self.work_frame)
         table_frame.pack(fill='both', expand=True, pady=10)
@@ -1052,7 +1375,7 @@ class AdminPanelGUI:
         for item in self.users_tree.get_children():
             self.users_tree.delete(item)
 
-        users = self.user_manager.get_all_users()
+        users = self.user_manager.get_all_users(self.user_groups.get(self.user_group_var.get()))
 
         for user in users:
             avg_score = round(user[6], 1) if user[6] else 0
@@ -1139,12 +1462,36 @@ class AdminPanelGUI:
             recent_tree.heading('Дата', text='Дата')
             recent_tree.heading('Результат', text='Результат')
 
-            for test in stats['recent_tests']:
-                recent_tree.insert('', 'end', values=(
-                    test[0], test[1][:
-                                     16], f"{test[2]}/{test[3]} ({test[4]:.1f}%)"
-                ))
-
+            def insert_tests(tests):
+                for test in tests:
+                    recent_tree.insert('', 'end', values=(
+                        test[0], test[1][:
+                                         16], f"{test[2]}/{test[3]} ({test[4]:.1f}%)"
+                    ))
+
+            insert_tests(stats['recent_tests'])
+
+            # Старіші тести довантажуються при прокручуванні до кінця списку
+            scrollbar = ttk.Scrollbar(
+                recent_frame, orient='vertical', command=recent_tree.yview)
+            paging = {'cursor': stats['recent_cursor'], 'loading': False}
+
+            def load_next_page():
+                try:
+                    tests, paging['cursor'] = self.user_manager.get_user_history_page(
+                        user_id, paging['cursor'], config.UI_CONFIG['history_page_size'])
+                    insert_tests(tests)
+                finally:
+                    paging['loading'] = False
+
+            def on_scroll(first, last):
+                scrollbar.set(first, last)
+                if paging['cursor'] is not None and not paging['loading'] and float(last) > 0.9:
+                    paging['loading'] = True
+                    details_window.after_idle(load_next_page)
+
+            recent_tree.configure(yscrollcommand=on_scroll)
+            scrollbar.pack(side='right', fill='y')
             recent_tree.pack(fill='both', expand=True)
 
     def toggle_admin_status(self):
@@ -1192,6 +1539,228 @@ class AdminPanelGUI:
                 messagebox.showerror(
                     "Помилка", "Не вдалося видалити користувача")
 
+    def show_class_management(self):
+        """Класи учнів та їх результати по категоріях"""
+        self.clear_work_frame()
+
+        ttk.Label(self.work_frame, text="Класи",
+                  font=('Arial', 14, 'bold')).pack(pady=10)
+
+        # Панель кнопок
+        button_frame = ttk.Frame(self.work_frame)
+        button_frame.pack(fill='x', pady=5)
+
+        ttk.Button(button_frame, text="Створити клас",
+                   command=self.add_class_dialog).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Склад класу",
+                   command=self.class_members_dialog).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Видалити клас",
+                   command=self.delete_class).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Експорт CSV",
+                   command=lambda: self.export_class_report('csv')).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="Експорт PDF",
+                   command=lambda: self.export_class_report('pdf')).pack(side='right', padx=5)
+
+        # Таблиця класів
+        classes_frame = ttk.Frame(self.work_frame)
+        classes_frame.pack(fill='x', pady=10)
+
+        columns = ('ID', 'Клас', 'Опис', 'Учнів')
+        self.classes_tree = ttk.Treeview(
+            classes_frame, columns=columns, show='headings', height=8)
+
+        for col in columns:
+            self.classes_tree.heading(col, text=col)
+
+        self.classes_tree.column('ID', width=50)
+        self.classes_tree.column('Клас', width=150)
+        self.classes_tree.column('Опис', width=400)
+        self.classes_tree.column('Учнів', width=80)
+
+        scrollbar_c = ttk.Scrollbar(
+            classes_frame, orient='vertical', command=self.classes_tree.yview)
+        self.classes_tree.configure(yscrollcommand=scrollbar_c.set)
+
+        self.classes_tree.pack(side='left', fill='both', expand=True)
+        scrollbar_c.pack(side='right', fill='y')
+        self.classes_tree.bind('<<TreeviewSelect>>', lambda e: self.refresh_class_report())
+
+        # Звіт по категоріях для обраних класів (або всіх)
+        report_frame = ttk.LabelFrame(
+            self.work_frame, text="Результати по категоріях", padding="10")
+        report_frame.pack(fill='both', expand=True, pady=10)
+
+        columns = ('Клас', 'Категорія', 'Учнів', 'Тестів', 'Правильних', 'Середній бал')
+        self.class_report_tree = ttk.Treeview(
+            report_frame, columns=columns, show='headings', height=12)
+
+        for col in columns:
+            self.class_report_tree.heading(col, text=col)
+            self.class_report_tree.column(col, width=120)
+        self.class_report_tree.column('Категорія', width=250)
+
+        scrollbar_r = ttk.Scrollbar(
+            report_frame, orient='vertical', command=self.class_report_tree.yview)
+        self.class_report_tree.configure(yscrollcommand=scrollbar_r.set)
+
+        self.class_report_tree.pack(side='left', fill='both', expand=True)
+        scrollbar_r.pack(side='right', fill='y')
+
+        self.refresh_classes()
+
+    def refresh_classes(self):
+        """Оновлення списку класів і звіту"""
+        for item in self.classes_tree.get_children():
+            self.classes_tree.delete(item)
+
+        for group_id, name, description, members in self.class_manager.get_groups():
+            self.classes_tree.insert('', 'end', values=(
+                group_id, name, description or '', members))
+
+        self.refresh_class_report()
+
+    def selected_class_ids(self) -> List[int]:
+        return [self.classes_tree.item(item)['values'][0]
+                for item in self.classes_tree.selection()]
+
+    def refresh_class_report(self):
+        """Звіт для обраних класів одним груповим запитом"""
+        for item in self.class_report_tree.get_children():
+            self.class_report_tree.delete(item)
+
+        report = self.class_manager.get_class_report(self.selected_class_ids())
+        for _, class_name, category, students, tests, questions, correct, avg in report:
+            self.class_report_tree.insert('', 'end', values=(
+                class_name, category, students, tests,
+                f"{correct}/{questions}", f"{avg:.1f}%"))
+
+    def add_class_dialog(self):
+        """Діалог створення класу"""
+        dialog = tk.Toplevel(self.window)
+        dialog.title("Створити клас")
+        dialog.geometry("400x300")
+        dialog.configure(bg='#f0f0f0')
+
+        main_frame = ttk.Frame(dialog, padding="20")
+        main_frame.pack(fill='both', expand=True)
+
+        ttk.Label(main_frame, text="Назва класу:").pack(anchor='w')
+        name_entry = ttk.Entry(main_frame)
+        name_entry.pack(fill='x', pady=(0, 10))
+
+        ttk.Label(main_frame, text="Опис:").pack(anchor='w')
+        desc_text = scrolledtext.ScrolledText(
+            main_frame, height=5, wrap=tk.WORD)
+        desc_text.pack(fill='both', expand=True, pady=(0, 10))
+
+        def save_class():
+            name = name_entry.get().strip()
+            description = desc_text.get('1.0', 'end').strip()
+
+            if not name:
+                messagebox.showerror("Помилка", "Введіть назву класу")
+                return
+
+            if self.class_manager.create_group(name, description):
+                dialog.destroy()
+                self.refresh_classes()
+            else:
+                messagebox.showerror("Помилка", "Клас з такою назвою вже існує")
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill='x', pady=10)
+
+        ttk.Button(button_frame, text="Зберегти",
+                   command=save_class).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Скасувати",
+                   command=dialog.destroy).pack(side='left')
+
+    def class_members_dialog(self):
+        """Діалог складу класу"""
+        selected = self.classes_tree.selection()
+        if not selected:
+            messagebox.showwarning("Увага", "Оберіть клас")
+            return
+
+        group_id, class_name = self.classes_tree.item(selected[0])['values'][:2]
+        students = self.class_manager.get_students()
+        members = set(self.class_manager.get_member_ids(group_id))
+
+        dialog = tk.Toplevel(self.window)
+        dialog.title(f"Склад класу {class_name}")
+        dialog.geometry("400x500")
+        dialog.configure(bg='#f0f0f0')
+
+        main_frame = ttk.Frame(dialog, padding="20")
+        main_frame.pack(fill='both', expand=True)
+
+        ttk.Label(main_frame, text="Учні класу (Ctrl/Shift - кілька):").pack(anchor='w')
+
+        list_frame = ttk.Frame(main_frame)
+        list_frame.pack(fill='both', expand=True, pady=(0, 10))
+
+        students_list = tk.Listbox(list_frame, selectmode='extended', exportselection=False)
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=students_list.yview)
+        students_list.configure(yscrollcommand=scrollbar.set)
+        students_list.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        for index, (user_id, username) in enumerate(students):
+            students_list.insert('end', username)
+            if user_id in members:
+                students_list.selection_set(index)
+
+        def save_members():
+            user_ids = [students[index][0] for index in students_list.curselection()]
+            if self.class_manager.set_members(group_id, user_ids):
+                dialog.destroy()
+                self.refresh_classes()
+            else:
+                messagebox.showerror("Помилка", "Не вдалося зберегти склад класу")
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill='x', pady=10)
+
+        ttk.Button(button_frame, text="Зберегти",
+                   command=save_members).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Скасувати",
+                   command=dialog.destroy).pack(side='left')
+
+    def delete_class(self):
+        """Видалення класу"""
+        selected = self.classes_tree.selection()
+        if not selected:
+            messagebox.showwarning("Увага", "Оберіть клас")
+            return
+
+        group_id, class_name = self.classes_tree.item(selected[0])['values'][:2]
+        if messagebox.askyesno("Підтвердження",
+                               f"Видалити клас {class_name}?\n"
+                               "Учні та їх результати залишаться."):
+            if self.class_manager.delete_group(group_id):
+                self.refresh_classes()
+            else:
+                messagebox.showerror("Помилка", "Не вдалося видалити клас")
+
+    def export_class_report(self, file_format: str):
+        """Експорт звіту по всіх класах"""
+        filename = filedialog.asksaveasfilename(
+            title=f"Зберегти звіт по класах як {file_format.upper()}",
+            defaultextension=f".{file_format}",
+            filetypes=[(f"{file_format.upper()} files", f"*.{file_format}"), ("All files", "*.*")]
+        )
+
+        if filename:
+            if file_format == 'csv':
+                success = self.exporter.export_to_csv('class_report', filename)
+            else:
+                success = self.exporter.export_to_pdf('class_report', filename)
+
+            if success:
+                messagebox.showinfo("Успіх", f"Звіт збережено в {filename}")
+            else:
+                messagebox.showerror("Помилка", "Не вдалося експортувати звіт")
+
     def show_system_statistics(self):
         """Показ системної статистики"""
         self.clear_work_frame()
@@ -1331,6 +1900,8 @@ class AdminPanelGUI:
                    command=lambda: self.export_csv('questions')).pack(side='left', padx=5)
         ttk.Button(csv_frame, text="Експорт результатів",
                    command=lambda: self.export_csv('results')).pack(side='left', padx=5)
+        ttk.Button(csv_frame, text="Звіт по класах",
+                   command=lambda: self.export_csv('class_report')).pack(side='left', padx=5)
 
         # JSON експорт
         json_frame = ttk.LabelFrame(
@@ -1347,6 +1918,13 @@ class AdminPanelGUI:
 
         ttk.Button(pdf_frame, text="Звіт про стан системи",
                    command=lambda: self.export_pdf('system_report')).pack(side='left', padx=5)
+        ttk.Button(pdf_frame, text="Звіт по класах",
+                   command=lambda: self.export_pdf('class_report')).pack(side='left', padx=5)
+
+        # Архіви результатів включаються лише на вимогу
+        self.export_full_history = tk.BooleanVar(value=False)
+        ttk.Checkbutton(export_frame, text="Включити архів результатів минулих років",
+                        variable=self.export_full_history).pack(anchor='w', pady=5)
 
         # Статус експорту
         self.export_status = ttk.Label(
@@ -1362,7 +1940,8 @@ class AdminPanelGUI:
         )
 
         if filename:
-            if self.exporter.export_to_csv(data_type, filename):
+            if self.exporter.export_to_csv(data_type, filename,
+                                           self.export_full_history.get()):
                 self.export_status.config(
                     text=f"✅ {data_type} успішно експортовано в {filename}")
             else:
@@ -1378,7 +1957,8 @@ class AdminPanelGUI:
         )
 
         if filename:
-            if self.exporter.export_to_json(data_type, filename):
+            if self.exporter.export_to_json(data_type, filename,
+                                            self.export_full_history.get()):
                 self.export_status.config(
                     text=f"✅ {data_type} успішно експортовано в {filename}")
             else:
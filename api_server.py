@@ -0,0 +1,486 @@
+"""
+Серверний режим тренажера: JSON HTTP API для одночасного тестування багатьох студентів
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from config import config
+from incremental_analytics import IncrementalAnalytics
+from main import AuthenticationManager, TestEngine, TestSession, User
+from repositories import create_backend
+from security import get_password_hasher
+from session_journal import SessionJournal
+from session_store import SessionStore
+from system_statistics import SystemStatistics
+from user_stats import get_user_stats_store
+
+
+logger = logging.getLogger(__name__)
+
+
+class APIError(Exception):
+    """Помилка API з HTTP-статусом"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class TestSessionRegistry:
+    """Реєстр активних тестових сесій, які зберігаються в пам'яті"""
+
+    def __init__(self, engine: TestEngine, max_sessions: int = 5000,
+                 idle_minutes: int = 120, journal: Optional[SessionJournal] = None):
+        self.engine = engine
+        self.journal = journal
+        self.max_sessions = max_sessions
+        self.idle_timeout = datetime.timedelta(minutes=idle_minutes)
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, user_id: int, category_id: int, num_questions: int) -> Optional[str]:
+        """Створення нової сесії тестування"""
+        test_session = self.engine.start_session(category_id, num_questions)
+        if not test_session:
+            return None
+
+        session_id = uuid.uuid4().hex
+        # Журнал створюється до реєстрації: сесія без журналу не з'являється в реєстрі
+        if self.journal:
+            try:
+                self.journal.begin(user_id, test_session.category_id,
+                                   test_session.question_ids, test_session.start_time,
+                                   journal_id=session_id)
+            except OSError as e:
+                logger.error(f"Не вдалося створити журнал тесту: {e}")
+                raise APIError(503, "Не вдалося зберегти тест, спробуйте пізніше")
+
+        with self._lock:
+            self._expire_idle()
+            if len(self._sessions) < self.max_sessions:
+                self._add(session_id, user_id, test_session)
+                return session_id
+
+        if self.journal:
+            self.journal.finish(session_id)
+        raise APIError(503, "Перевищено ліміт активних тестів")
+
+    def _add(self, session_id: str, user_id: int, test_session: TestSession):
+        self._sessions[session_id] = {
+            'user_id': user_id,
+            'state': test_session,
+            'lock': threading.Lock(),
+            'finished': False,
+            'last_access': datetime.datetime.now()
+        }
+
+    def restore_from_journal(self) -> int:
+        """Відновлення незавершених сесій після перезапуску сервера"""
+        if not self.journal:
+            return 0
+
+        restored = 0
+        for user_id, session_id in self.journal.find_unfinished():
+            data = self.journal.read(user_id, session_id)
+            test_session = self.engine.restore_session(data) if data else None
+            if not test_session:
+                self.journal.discard(user_id, session_id)
+                continue
+            if list(test_session.question_ids) != data['question_ids']:
+                # Видалені питання відкинуто: журнал приводиться у відповідність до сеансу
+                self.journal.rewrite(user_id, session_id, test_session.category_id,
+                                     test_session.question_ids, test_session.start_time,
+                                     test_session.answers())
+            with self._lock:
+                self._add(session_id, user_id, test_session)
+            restored += 1
+        return restored
+
+    def record_answer(self, session_id: str, test_session: TestSession):
+        """Запис поданої відповіді до журналу"""
+        if self.journal:
+            self.journal.record_answer(session_id, *test_session.last_answer())
+
+    def get(self, session_id: str, user_id: int) -> Dict[str, Any]:
+        """Отримання сесії з перевіркою власника"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session or session['user_id'] != user_id:
+                raise APIError(404, "Тест не знайдено")
+            session['last_access'] = datetime.datetime.now()
+            return session
+
+    def remove(self, session_id: str):
+        """Видалення сесії"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.journal:
+            self.journal.finish(session_id)
+
+    def _expire_idle(self):
+        """Видалення сесій, неактивних довше за дозволений час"""
+        cutoff = datetime.datetime.now() - self.idle_timeout
+        expired = [sid for sid, s in self._sessions.items()
+                   if s['last_access'] < cutoff]
+        for sid in expired:
+            del self._sessions[sid]
+            if self.journal:
+                self.journal.finish(sid)
+
+    def count(self) -> int:
+        """Кількість активних сесій"""
+        with self._lock:
+            return len(self._sessions)
+
+
+class TrainerAPIServer(ThreadingHTTPServer):
+    """HTTP сервер, що обслуговує API тренажера"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], db_name: Optional[str] = None,
+                 pool_size: int = 8):
+        super().__init__(address, TrainerAPIHandler)
+        # Те саме сховище, що й у GUI (DATABASE_CONFIG['backend']); db_name - для SQLite
+        self.db_manager = create_backend(db_name=db_name, pool_size=pool_size)
+        self.auth_manager = AuthenticationManager(self.db_manager)
+        self.test_engine = TestEngine(self.db_manager)
+        self.user_stats = get_user_stats_store(self.db_manager.db_name, self.db_manager)
+        self.test_sessions = TestSessionRegistry(
+            self.test_engine,
+            config.SERVER_CONFIG['max_test_sessions'],
+            config.SERVER_CONFIG['test_session_idle_minutes'],
+            SessionJournal(config.PATHS['sessions_dir'],
+                           config.TEST_CONFIG['journal_fsync_every'],
+                           config.TEST_CONFIG['journal_fsync_interval'],
+                           config.TEST_CONFIG['journal_open_files']))
+        # Калібрування вартості хешування до першого запиту на вхід
+        get_password_hasher()
+        self.auth_manager.preload_credentials()
+        restored = self.test_sessions.restore_from_journal()
+        if restored:
+            logger.info(f"Відновлено незавершених тестів: {restored}")
+        self.session_store = SessionStore(
+            self.db_manager,
+            config.SECURITY_CONFIG['session_timeout_minutes'],
+            config.SERVER_CONFIG['session_flush_seconds'],
+            config.SERVER_CONFIG['session_sweep_seconds'],
+            config.SERVER_CONFIG['session_refresh_seconds'])
+        self.session_store.load()
+        self.session_store.start()
+        # Таблиці накопиченої аналітики є лише у схемі SQLite
+        self.analytics = None
+        if self.db_manager.dialect == 'sqlite':
+            self.analytics = IncrementalAnalytics(self.db_manager)
+            self.analytics.start()
+
+    def issue_token(self, user: User) -> str:
+        """Видача токену авторизованому користувачу"""
+        return self.session_store.create(user)
+
+    def resolve_token(self, token: str) -> Optional[User]:
+        """Пошук користувача за токеном"""
+        return self.session_store.resolve(token)
+
+    def revoke_token(self, token: str):
+        """Анулювання токену"""
+        self.session_store.revoke(token)
+
+    def server_close(self):
+        super().server_close()
+        self.session_store.close()
+        if self.analytics:
+            self.analytics.close()
+        if self.test_sessions.journal:
+            self.test_sessions.journal.close()
+        self.db_manager.close_connection()
+
+
+class TrainerAPIHandler(BaseHTTPRequestHandler):
+    """Обробник HTTP-запитів API"""
+
+    server: TrainerAPIServer
+
+    ROUTES = [
+        ('GET', r'^/api/health$', 'handle_health'),
+        ('POST', r'^/api/register$', 'handle_register'),
+        ('POST', r'^/api/login$', 'handle_login'),
+        ('POST', r'^/api/logout$', 'handle_logout'),
+        ('GET', r'^/api/categories$', 'handle_categories'),
+        ('POST', r'^/api/tests$', 'handle_start_test'),
+        ('GET', r'^/api/tests/(\w+)/question$', 'handle_get_question'),
+        ('POST', r'^/api/tests/(\w+)/answer$', 'handle_submit_answer'),
+        ('POST', r'^/api/tests/(\w+)/finish$', 'handle_finish_test'),
+        ('GET', r'^/api/statistics/me$', 'handle_user_statistics'),
+        ('GET', r'^/api/statistics/system$', 'handle_system_statistics'),
+        ('GET', r'^/api/statistics/aggregates/(\w+)$', 'handle_aggregate_statistics'),
+    ]
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def dispatch(self, method: str):
+        """Маршрутизація запиту до обробника"""
+        path = self.path.split('?', 1)[0]
+        try:
+            for route_method, pattern, handler_name in self.ROUTES:
+                match = re.match(pattern, path)
+                if match and route_method == method:
+                    status, payload = getattr(self, handler_name)(*match.groups())
+                    self.send_json(status, payload)
+                    return
+            raise APIError(404, "Ресурс не знайдено")
+        except APIError as e:
+            self.send_json(e.status, {'error': e.message})
+        except Exception as e:
+            logger.error(f"Помилка обробки запиту {method} {path}: {e}",
+                         exc_info=True)
+            self.send_json(500, {'error': "Внутрішня помилка сервера"})
+
+    def send_json(self, status: int, payload: Any):
+        """Відправка JSON-відповіді"""
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> Dict[str, Any]:
+        """Читання JSON-тіла запиту"""
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            data = json.loads(self.rfile.read(length).decode('utf-8'))
+        except (ValueError, UnicodeDecodeError):
+            raise APIError(400, "Некоректний JSON")
+        if not isinstance(data, dict):
+            raise APIError(400, "Очікується JSON-об'єкт")
+        return data
+
+    def get_token(self) -> str:
+        """Отримання токену із заголовка Authorization"""
+        header = self.headers.get('Authorization', '')
+        if header.startswith('Bearer '):
+            return header[7:].strip()
+        return ''
+
+    def require_user(self) -> User:
+        """Перевірка авторизації"""
+        user = self.server.resolve_token(self.get_token())
+        if not user:
+            raise APIError(401, "Потрібна авторизація")
+        return user
+
+    def require_admin(self) -> User:
+        """Перевірка прав адміністратора за поточним станом у базі"""
+        user = self.require_user()
+        # Статус у сесії міг застаріти: адмін-панель змінює його напряму в базі
+        if not user.is_admin or not self.server.auth_manager.users.is_admin(user.user_id):
+            raise APIError(403, "Доступ заборонено")
+        return user
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    # Обробники
+
+    def handle_health(self):
+        return 200, {'status': 'ok',
+                     'active_tests': self.server.test_sessions.count(),
+                     'active_sessions': self.server.session_store.count()}
+
+    def handle_register(self):
+        data = self.read_json()
+        username = str(data.get('username', '')).strip()
+        password = str(data.get('password', '')).strip()
+        email = str(data.get('email', '')).strip()
+
+        if not username or not password:
+            raise APIError(400, "Заповніть обов'язкові поля")
+        if len(password) < config.SECURITY_CONFIG['password_min_length']:
+            raise APIError(400, "Пароль занадто короткий")
+
+        # Хешування виконується в обмеженому пулі потоків, а не в потоці запиту
+        registered = self.server.auth_manager.register_user_async(
+            username, password, email).result()
+        if not registered:
+            raise APIError(409, "Користувач з таким ім'ям вже існує")
+        return 201, {'status': 'registered'}
+
+    def handle_login(self):
+        data = self.read_json()
+        username = str(data.get('username', '')).strip()
+        user = self.server.auth_manager.authenticate_async(
+            username, str(data.get('password', '')).strip()).result()
+        if not user:
+            lockout = self.server.auth_manager.get_lockout_remaining(username)
+            if lockout:
+                raise APIError(429, f"Забагато невдалих спроб. Повторіть через {lockout} с")
+            raise APIError(401, "Невірне ім'я користувача або пароль")
+
+        return 200, {
+            'token': self.server.issue_token(user),
+            'user': {'id': user.user_id, 'username': user.username,
+                     'email': user.email, 'is_admin': user.is_admin}
+        }
+
+    def handle_logout(self):
+        self.require_user()
+        self.server.revoke_token(self.get_token())
+        return 200, {'status': 'logged_out'}
+
+    def handle_categories(self):
+        self.require_user()
+        categories = self.server.test_engine.get_categories()
+        return 200, [{'id': c[0], 'name': c[1], 'description': c[2]}
+                     for c in categories]
+
+    def handle_start_test(self):
+        user = self.require_user()
+        data = self.read_json()
+        try:
+            category_id = int(data['category_id'])
+            num_questions = int(data.get(
+                'num_questions', config.TEST_CONFIG['default_questions_count']))
+        except (KeyError, TypeError, ValueError):
+            raise APIError(400, "Потрібно вказати category_id")
+
+        num_questions = max(
+            1, min(num_questions, config.TEST_CONFIG['max_questions_count']))
+        session_id = self.server.test_sessions.create(
+            user.user_id, category_id, num_questions)
+        if not session_id:
+            raise APIError(404, "Недостатньо питань в цій категорії")
+
+        session = self.server.test_sessions.get(session_id, user.user_id)
+        return 201, {'test_id': session_id,
+                     'total_questions': session['state'].question_count}
+
+    def handle_get_question(self, session_id: str):
+        user = self.require_user()
+        session = self.server.test_sessions.get(session_id, user.user_id)
+        state: TestSession = session['state']
+
+        with session['lock']:
+            question = self.server.test_engine.get_current_question(state)
+            if not question:
+                return 200, {'finished': True}
+            return 200, {
+                'finished': False,
+                'index': state.current_index,
+                'total_questions': state.question_count,
+                'question': {
+                    'id': question.question_id,
+                    'text': question.question_text,
+                    'type': question.question_type,
+                    'options': list(question.options),
+                    'difficulty': question.difficulty
+                }
+            }
+
+    def handle_submit_answer(self, session_id: str):
+        user = self.require_user()
+        session = self.server.test_sessions.get(session_id, user.user_id)
+        answer = str(self.read_json().get('answer', '')).strip()
+        if not answer:
+            raise APIError(400, "Відповідь не може бути порожньою")
+
+        state: TestSession = session['state']
+
+        with session['lock']:
+            if session['finished'] or not self.server.test_engine.submit_answer(state, answer):
+                raise APIError(409, "Всі питання вже отримали відповідь")
+            self.server.test_sessions.record_answer(session_id, state)
+            remaining = state.question_count - state.current_index
+        return 200, {'accepted': True, 'remaining': remaining}
+
+    def handle_finish_test(self, session_id: str):
+        user = self.require_user()
+        session = self.server.test_sessions.get(session_id, user.user_id)
+
+        with session['lock']:
+            # Паралельний /finish чекає на блокування і не записує результат удруге
+            if session['finished']:
+                raise APIError(409, "Тест уже завершено")
+            session['finished'] = True
+            try:
+                results = self.server.test_engine.finish_session(
+                    session['state'], user.user_id)
+            except Exception:
+                session['finished'] = False
+                raise
+        self.server.test_sessions.remove(session_id)
+        return 200, results
+
+    def handle_user_statistics(self):
+        user = self.require_user()
+        general_stats = self.server.user_stats.get_user_summary(user.user_id)
+        category_stats = self.server.user_stats.get_user_categories(user.user_id)
+
+        return 200, {
+            'total_tests': general_stats[0],
+            'average_percentage': round(general_stats[1] or 0, 2),
+            'total_time': general_stats[2] or 0,
+            'categories': [{'name': c[0], 'tests': c[1],
+                            'average_percentage': round(c[2] or 0, 2)}
+                           for c in category_stats],
+            'recent_tests': [{'date': t[0], 'category': t[1], 'total_questions': t[2],
+                              'correct_answers': t[3], 'time_spent': t[4]}
+                             for t in self.server.user_stats.get_recent_tests(user.user_id)]
+        }
+
+    def handle_system_statistics(self):
+        self.require_admin()
+        if self.server.db_manager.dialect != 'sqlite':
+            raise APIError(404, "Системна статистика доступна лише для SQLite")
+        return 200, SystemStatistics(self.server.db_manager.db_name).get_general_statistics()
+
+    def handle_aggregate_statistics(self, scope: str):
+        self.require_admin()
+        if not self.server.analytics:
+            raise APIError(404, "Накопичена аналітика доступна лише для SQLite")
+        try:
+            # Накопичені показники оновлюються у фоні, запит не сканує відповіді
+            return 200, self.server.analytics.get_summary(scope)
+        except ValueError as e:
+            raise APIError(404, str(e))
+
+
+def main():
+    """Запуск сервера API"""
+    server_config = config.SERVER_CONFIG
+    parser = argparse.ArgumentParser(description="HTTP API тренажера з інформатики")
+    parser.add_argument('--host', default=server_config['host'])
+    parser.add_argument('--port', type=int, default=server_config['port'])
+    parser.add_argument('--db', default=config.DATABASE_CONFIG['sqlite']['db_name'],
+                        help="файл SQLite (для MySQL - DATABASE_CONFIG['mysql'])")
+    parser.add_argument('--pool-size', type=int,
+                        default=server_config['db_pool_size'])
+    args = parser.parse_args()
+
+    server = TrainerAPIServer((args.host, args.port), args.db, args.pool_size)
+    print(f"API тренажера доступне на http://{args.host}:{args.port}/api")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nСервер зупинено")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
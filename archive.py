@@ -0,0 +1,212 @@
+"""
+Архівація старих результатів тестування в окремі бази SQLite за роками
+"""
+
+import argparse
+import glob
+import os
+import re
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+
+
+# Таблиці, що переносяться до архіву (батьківська - першою)
+ARCHIVED_TABLES = ('test_results', 'answer_details')
+
+ARCHIVE_NAME_RE = re.compile(r'\.archive-(\d{4})\.db$')
+
+
+def archive_path(db_name: str, year: int) -> str:
+    """Файл архіву року поруч з основною базою"""
+    return f"{os.path.splitext(db_name)[0]}.archive-{year}.db"
+
+
+def list_archives(db_name: str) -> List[Tuple[int, str]]:
+    """Наявні архіви бази: (рік, шлях), від старших до новіших"""
+    archives = []
+    for path in glob.glob(glob.escape(os.path.splitext(db_name)[0]) + '.archive-*.db'):
+        match = ARCHIVE_NAME_RE.search(path)
+        if match:
+            archives.append((int(match.group(1)), path))
+    return sorted(archives)
+
+
+def connect_full_history(db_name: str, archives_of: Optional[str] = None) -> sqlite3.Connection:
+    """З'єднання, у якому test_results і answer_details включають архіви
+
+    Архіви приєднуються (ATTACH), а тимчасові представлення з іменами
+    архівованих таблиць затіняють основні, тож наявні запити без змін
+    бачать усю історію. Звичайні з'єднання архівів не торкаються.
+    archives_of - основна база, якщо db_name є її знімком-реплікою.
+    """
+    conn = sqlite3.connect(db_name)
+    aliases = []
+    for year, path in list_archives(archives_of or db_name):
+        alias = f"archive_{year}"
+        try:
+            conn.execute("ATTACH DATABASE ? AS " + alias, (path,))
+        except sqlite3.OperationalError as e:
+            # Кількість приєднаних баз обмежена (типово 10)
+            print(f"Архів {path} не приєднано: {e}")
+            break
+        aliases.append(alias)
+
+    for table in ARCHIVED_TABLES:
+        columns = ', '.join(row[1] for row in
+                            conn.execute(f"PRAGMA main.table_info({table})"))
+        parts = [f"SELECT {columns} FROM main.{table}"]
+        parts += [f"SELECT {columns} FROM {alias}.{table}" for alias in aliases]
+        conn.execute(f"CREATE TEMP VIEW {table} AS " + " UNION ALL ".join(parts))
+    return conn
+
+
+class ResultArchiver:
+    """Перенесення результатів, старших за горизонт зберігання, до архівів за роками
+
+    Для кожного року є окрема база (informatics_trainer.archive-2023.db) з
+    тими самими таблицями. Пакет спершу копіюється до архіву і фіксується,
+    а вже потім видаляється з основної бази разом з оновленням result_rollups,
+    тож перерваний запуск безпечно повторюється (копіювання ідемпотентне).
+    Відповіді, ще не враховані накопичувальною аналітикою, не переносяться:
+    перед архівацією аналітика оновлюється, щоб її агрегати лишились повними.
+    Горизонт не коротший за MIN_HORIZON_DAYS: рейтинги за тиждень і місяць
+    читають лише test_results, тож поточний період не має потрапляти до архіву.
+    """
+
+    MIN_HORIZON_DAYS = 32
+
+    def __init__(self, db_manager, horizon_days: Optional[int] = None,
+                 batch_size: Optional[int] = None):
+        settings = config.ARCHIVE_CONFIG
+        self.db_manager = db_manager
+        self.db_name = db_manager.db_name
+        self.horizon_days = horizon_days or settings['horizon_days']
+        if self.horizon_days < self.MIN_HORIZON_DAYS:
+            raise ValueError(f"Горизонт архівації має бути не менше "
+                             f"{self.MIN_HORIZON_DAYS} днів")
+        self.batch_size = batch_size or settings['batch_size']
+
+    def _create_archive_schema(self, conn: sqlite3.Connection, alias: str):
+        """Таблиці архіву з тими самими визначеннями, що й в основній базі"""
+        for table in ARCHIVED_TABLES:
+            sql = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                               (table,)).fetchone()[0]
+            conn.execute(re.sub(r'^CREATE TABLE (IF NOT EXISTS )?"?\w+"?',
+                                f'CREATE TABLE IF NOT EXISTS {alias}.{table}', sql))
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {alias}.idx_test_results_user "
+                     f"ON test_results (user_id, test_date)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {alias}.idx_answer_details_result "
+                     f"ON answer_details (test_result_id)")
+
+    def _pending_batch(self, cursor: sqlite3.Cursor, year: str, high_water_mark: int) -> List[int]:
+        cursor.execute('''
+            SELECT tr.id
+            FROM test_results tr
+            WHERE tr.test_date < datetime('now', ?)
+              AND strftime('%Y', tr.test_date) = ?
+              AND NOT EXISTS (SELECT 1 FROM answer_details ad
+                              WHERE ad.test_result_id = tr.id AND ad.id > ?)
+            ORDER BY tr.id
+            LIMIT ?
+        ''', (f'-{self.horizon_days} days', year, high_water_mark, self.batch_size))
+        return [row[0] for row in cursor.fetchall()]
+
+    def _move_batch(self, conn: sqlite3.Connection, alias: str, ids: List[int]):
+        ids_sql = ','.join('?' * len(ids))
+        cursor = conn.cursor()
+
+        # 1. Копія в архів (окрема фіксація: у режимі WAL транзакція між базами не атомарна)
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO {alias}.test_results
+            SELECT * FROM main.test_results WHERE id IN ({ids_sql})
+        ''', ids)
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO {alias}.answer_details
+            SELECT * FROM main.answer_details WHERE test_result_id IN ({ids_sql})
+        ''', ids)
+        conn.commit()
+
+        # 2. Підсумки користувачів і видалення з основної бази - однією транзакцією
+        cursor.execute(f'''
+            INSERT INTO result_rollups (user_id, category_id, tests, total_questions,
+                                        correct_answers, time_spent, percentage_sum)
+            SELECT user_id, category_id, COUNT(*), SUM(total_questions), SUM(correct_answers),
+                   SUM(time_spent), SUM(correct_answers * 100.0 / total_questions)
+            FROM main.test_results
+            WHERE id IN ({ids_sql})
+            GROUP BY user_id, category_id
+            ON CONFLICT (user_id, category_id) DO UPDATE SET
+                tests = tests + excluded.tests,
+                total_questions = total_questions + excluded.total_questions,
+                correct_answers = correct_answers + excluded.correct_answers,
+                time_spent = time_spent + excluded.time_spent,
+                percentage_sum = percentage_sum + excluded.percentage_sum
+        ''', ids)
+        cursor.execute(f"DELETE FROM main.answer_details WHERE test_result_id IN ({ids_sql})", ids)
+        cursor.execute(f"DELETE FROM main.test_results WHERE id IN ({ids_sql})", ids)
+        conn.commit()
+
+    def archive(self) -> Dict[int, int]:
+        """Перенесення старих результатів; повертає кількість тестів за роками"""
+        # Модуль аналітики тягне numpy, тому імпортуємо за потреби
+        from incremental_analytics import IncrementalAnalytics
+        analytics = IncrementalAnalytics(self.db_manager)
+        analytics.update()
+
+        moved: Dict[int, int] = {}
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        try:
+            cursor = conn.cursor()
+            high_water_mark = analytics.get_high_water_mark(cursor)
+            cursor.execute('''
+                SELECT DISTINCT strftime('%Y', test_date)
+                FROM test_results
+                WHERE test_date < datetime('now', ?)
+            ''', (f'-{self.horizon_days} days',))
+            years = [row[0] for row in cursor.fetchall() if row[0]]
+
+            for year in years:
+                alias = f"archive_{year}"
+                conn.execute("ATTACH DATABASE ? AS " + alias,
+                             (archive_path(self.db_name, int(year)),))
+                try:
+                    self._create_archive_schema(conn, alias)
+                    conn.commit()
+                    while True:
+                        ids = self._pending_batch(cursor, year, high_water_mark)
+                        if not ids:
+                            break
+                        self._move_batch(conn, alias, ids)
+                        moved[int(year)] = moved.get(int(year), 0) + len(ids)
+                finally:
+                    conn.commit()
+                    conn.execute("DETACH DATABASE " + alias)
+        finally:
+            conn.close()
+        return moved
+
+
+def main():
+    """Архівація з командного рядка"""
+    parser = argparse.ArgumentParser(description="Архівація старих результатів тестування")
+    parser.add_argument('--db', default=config.DATABASE_CONFIG['sqlite']['db_name'])
+    parser.add_argument('--horizon-days', type=int,
+                        default=config.ARCHIVE_CONFIG['horizon_days'],
+                        help="результати, старші за стільки днів, переносяться до архіву")
+    args = parser.parse_args()
+
+    from main import DatabaseManager
+    db_manager = DatabaseManager(args.db)
+    try:
+        moved = ResultArchiver(db_manager, args.horizon_days).archive()
+    finally:
+        db_manager.close_connection()
+    for year, count in sorted(moved.items()):
+        print(f"  {year}: {count} тестів -> {archive_path(args.db, year)}")
+    print(f"Заархівовано тестів: {sum(moved.values())}")
+
+
+if __name__ == "__main__":
+    main()
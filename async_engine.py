@@ -0,0 +1,133 @@
+"""
+Асинхронний рушій тестування для одночасного обслуговування тисяч сеансів
+"""
+
+import asyncio
+import functools
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import config
+from main import DatabaseManager, Question, TestEngine, TestSession
+
+
+class AsyncTestEngine:
+    """Asyncio-обгортка над TestEngine: звернення до бази виконуються у пулі потоків
+
+    Сеанси належать користувачу, що їх почав: інші виклики з чужим user_id
+    поводяться як із неіснуючим сеансом. Сеанси без звернень довше за
+    idle_minutes знімаються при створенні нових.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, max_workers: Optional[int] = None,
+                 max_sessions: int = 10000, idle_minutes: Optional[int] = None):
+        self.engine = TestEngine(db_manager)
+        # Кількість потоків не перевищує розмір пулу з'єднань
+        if max_workers is None:
+            max_workers = db_manager.pool.pool_size if db_manager.pool else 4
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="test-db")
+        self.max_sessions = max_sessions
+        if idle_minutes is None:
+            idle_minutes = config.SERVER_CONFIG['test_session_idle_minutes']
+        self.idle_seconds = idle_minutes * 60
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+
+    async def _run_in_executor(self, func, *args):
+        """Виконання блокуючого виклику в пулі потоків"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    async def get_categories(self) -> List[Tuple[int, str, str]]:
+        """Отримання списку категорій"""
+        return await self._run_in_executor(self.engine.get_categories)
+
+    def _expire_idle(self) -> int:
+        """Зняття сеансів, до яких не зверталися довше за дозволений час"""
+        cutoff = time.monotonic() - self.idle_seconds
+        expired = [session_id for session_id, entry in self.sessions.items()
+                   if entry['last_access'] < cutoff and not entry['finishing']]
+        for session_id in expired:
+            del self.sessions[session_id]
+        return len(expired)
+
+    async def start_session(self, user_id: int, category_id: int,
+                            num_questions: int = 10) -> Optional[str]:
+        """Початок тестування; повертає ідентифікатор сеансу"""
+        if len(self.sessions) >= self.max_sessions:
+            self._expire_idle()
+            if len(self.sessions) >= self.max_sessions:
+                return None
+
+        session = await self._run_in_executor(
+            self.engine.start_session, category_id, num_questions)
+        if not session:
+            return None
+
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = {
+            'user_id': user_id,
+            'state': session,
+            'finishing': False,
+            'last_access': time.monotonic()
+        }
+        return session_id
+
+    def _get_entry(self, session_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        entry = self.sessions.get(session_id)
+        if not entry or entry['user_id'] != user_id:
+            return None
+        entry['last_access'] = time.monotonic()
+        return entry
+
+    def get_session(self, session_id: str, user_id: int) -> Optional[TestSession]:
+        """Отримання стану сеансу з перевіркою власника"""
+        entry = self._get_entry(session_id, user_id)
+        return entry['state'] if entry else None
+
+    def get_current_question(self, session_id: str, user_id: int) -> Optional[Question]:
+        """Отримання поточного питання (без звернення до бази)"""
+        session = self.get_session(session_id, user_id)
+        if not session:
+            return None
+        return self.engine.get_current_question(session)
+
+    def submit_answer(self, session_id: str, user_id: int, answer: str) -> bool:
+        """Подача відповіді (без звернення до бази)"""
+        entry = self._get_entry(session_id, user_id)
+        if not entry or entry['finishing']:
+            return False
+        return self.engine.submit_answer(entry['state'], answer)
+
+    async def finish_session(self, session_id: str, user_id: int) -> Dict:
+        """Завершення сеансу та збереження результатів
+
+        Сеанс знімається лише після успішного запису: якщо запис не вдався,
+        відповіді залишаються і завершення можна повторити.
+        """
+        entry = self._get_entry(session_id, user_id)
+        if not entry or entry['finishing']:
+            return {}
+
+        entry['finishing'] = True
+        try:
+            results = await self._run_in_executor(
+                self.engine.finish_session, entry['state'], user_id)
+        except Exception:
+            entry['finishing'] = False
+            raise
+        self.sessions.pop(session_id, None)
+        return results
+
+    def abandon_session(self, session_id: str, user_id: int):
+        """Скасування сеансу без збереження"""
+        entry = self.sessions.get(session_id)
+        if entry and entry['user_id'] == user_id and not entry['finishing']:
+            del self.sessions[session_id]
+
+    async def close(self):
+        """Завершення роботи рушія (очікування записів поза циклом подій)"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self.executor.shutdown, wait=True))
@@ -0,0 +1,148 @@
+"""
+Класи (групи) учнів та зведені звіти по класах
+"""
+
+import sqlite3
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from replica import read_database
+
+
+# Історія користувачів класів по категоріях: поточні результати плюс архівні підсумки
+CLASS_REPORT_QUERY = '''
+    WITH members AS (
+        SELECT group_id, user_id
+        FROM class_members
+        {member_filter}
+    ),
+    history AS (
+        SELECT user_id, category_id, COUNT(*) AS tests, SUM(total_questions) AS questions,
+               SUM(correct_answers) AS correct,
+               SUM(correct_answers * 100.0 / total_questions) AS percentage_sum
+        FROM test_results
+        WHERE user_id IN (SELECT user_id FROM members)
+        GROUP BY user_id, category_id
+        UNION ALL
+        SELECT user_id, category_id, tests, total_questions, correct_answers, percentage_sum
+        FROM result_rollups
+        WHERE user_id IN (SELECT user_id FROM members)
+    )
+    SELECT g.id, g.name, c.name, COUNT(DISTINCT h.user_id), SUM(h.tests),
+           SUM(h.questions), SUM(h.correct), SUM(h.percentage_sum) / SUM(h.tests)
+    FROM members m
+    JOIN class_groups g ON g.id = m.group_id
+    JOIN history h ON h.user_id = m.user_id
+    JOIN categories c ON c.id = h.category_id
+    GROUP BY g.id, g.name, c.id, c.name
+    ORDER BY g.name, c.name
+'''
+
+
+class ClassGroupManager:
+    """Класи учнів: створення, склад і звіт по категоріях"""
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+
+    def get_groups(self) -> List[Tuple[int, str, str, int]]:
+        """Класи: (id, назва, опис, кількість учнів)"""
+        conn = sqlite3.connect(self.db_name)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT g.id, g.name, g.description, COUNT(m.user_id)
+                FROM class_groups g
+                LEFT JOIN class_members m ON m.group_id = g.id
+                GROUP BY g.id, g.name, g.description
+                ORDER BY g.name
+            ''')
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def create_group(self, name: str, description: str = "") -> bool:
+        """Створення класу (False, якщо назва вже зайнята)"""
+        try:
+            conn = sqlite3.connect(self.db_name)
+            try:
+                conn.execute("INSERT INTO class_groups (name, description) VALUES (?, ?)",
+                             (name, description))
+                conn.commit()
+            finally:
+                conn.close()
+            return True
+        except sqlite3.IntegrityError:
+            return False
+        except sqlite3.Error as e:
+            print(f"Помилка створення класу: {e}")
+            return False
+
+    def delete_group(self, group_id: int) -> bool:
+        """Видалення класу разом зі складом (учні залишаються)"""
+        try:
+            conn = sqlite3.connect(self.db_name)
+            try:
+                conn.execute("DELETE FROM class_members WHERE group_id = ?", (group_id,))
+                conn.execute("DELETE FROM class_groups WHERE id = ?", (group_id,))
+                conn.commit()
+            finally:
+                conn.close()
+            return True
+        except sqlite3.Error as e:
+            print(f"Помилка видалення класу: {e}")
+            return False
+
+    def get_students(self) -> List[Tuple[int, str]]:
+        """Учні (не адміністратори), яких можна додати до класу: (id, ім'я)"""
+        conn = sqlite3.connect(self.db_name)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, username FROM users WHERE is_admin = 0 ORDER BY username")
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def get_member_ids(self, group_id: int) -> List[int]:
+        conn = sqlite3.connect(self.db_name)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT user_id FROM class_members WHERE group_id = ?", (group_id,))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def set_members(self, group_id: int, user_ids: Iterable[int]) -> bool:
+        """Заміна складу класу одним пакетом"""
+        try:
+            conn = sqlite3.connect(self.db_name)
+            try:
+                conn.execute("DELETE FROM class_members WHERE group_id = ?", (group_id,))
+                conn.executemany("INSERT INTO class_members (group_id, user_id) VALUES (?, ?)",
+                                 [(group_id, user_id) for user_id in set(user_ids)])
+                conn.commit()
+            finally:
+                conn.close()
+            return True
+        except sqlite3.Error as e:
+            print(f"Помилка зміни складу класу: {e}")
+            return False
+
+    def get_class_report(self, group_ids: Optional[Sequence[int]] = None) -> List[Tuple]:
+        """Результати класів по категоріях одним груповим запитом
+
+        Рядки: (id класу, клас, категорія, учнів з результатами, тестів,
+        питань, правильних відповідей, середній відсоток).
+        """
+        member_filter = ''
+        params: List[int] = []
+        if group_ids:
+            member_filter = f"WHERE group_id IN ({','.join('?' * len(group_ids))})"
+            params = list(group_ids)
+
+        conn = sqlite3.connect(read_database(self.db_name))
+        try:
+            cursor = conn.cursor()
+            cursor.execute(CLASS_REPORT_QUERY.format(member_filter=member_filter), params)
+            return cursor.fetchall()
+        finally:
+            conn.close()
@@ -11,9 +11,15 @@ class Config:
 
     # Налаштування бази даних
     DATABASE_CONFIG = {
+        # Сховище застосунку: sqlite або mysql (див. repositories.py)
+        'backend': 'sqlite',
         'sqlite': {
             'db_name': 'informatics_trainer.db',
-            'backup_interval': 3600  # Резервне копіювання кожну годину
+            'backup_interval': 3600,  # Резервне копіювання кожну годину
+            # Кеш підготовлених запитів на з'єднання (у реєстрі repositories.STATEMENTS ~20)
+            'cached_statements': 256,
+            # Перевірка планів запитів реєстру під час запуску
+            'check_query_plans': True
         },
         'mysql': {
             'host': 'localhost',
@@ -21,7 +27,27 @@ class Config:
             'database': 'informatics_trainer',
             'user': 'root',
             'password': '1111',
-            'charset': 'utf8mb4'
+            'charset': 'utf8mb4',
+            # Час очікування однієї спроби підключення
+            'connect_timeout': 5,
+            # Пул з'єднань
+            'pool_size': 8,
+            'pool_timeout': 30,
+            # З'єднання, що простояло довше, перевіряється перед видачею
+            'validate_idle_seconds': 30,
+            # Повторні підключення з експоненційною затримкою
+            'connect_retries': 5,
+            'retry_backoff': 0.5,
+            'retry_backoff_max': 8.0,
+            # Нові спроби не починаються після цього часу від першої (запуск GUI
+            # чекає щонайбільше connect_deadline + connect_timeout секунд)
+            'connect_deadline': 15,
+            # Використовувати локальний SQLite, якщо MySQL недоступний (інакше - помилка
+            # запуску, щоб дані не розходилися непомітно між MySQL і локальним файлом)
+            'fallback_to_sqlite': False,
+            # Репліка для аналітичного читання (None - читати з основного сервера)
+            'replica_host': None,
+            'replica_port': 3306
         }
     }
 
@@ -44,7 +70,9 @@ class Config:
             'error': '#F44336',
             'warning': '#FF9800',
             'background': '#f0f0f0'
-        }
+        },
+        # Кількість результатів, що довантажуються при прокручуванні історії
+        'history_page_size': 50
     }
 
     # Налаштування тестування
@@ -56,6 +84,14 @@ class Config:
         'show_explanations': True,
         'shuffle_questions': True,
         'shuffle_answers': True,
+        # Поріг схожості для нечіткої перевірки текстових відповідей (0 - вимкнено)
+        'text_answer_fuzzy_threshold': 0.0,
+        # Журнал сеансів для відновлення тесту після збою
+        'session_journal_enabled': True,
+        'journal_fsync_every': 5,
+        'journal_fsync_interval': 2.0,
+        # Скільки файлів журналу тримати відкритими (решта відкривається при записі)
+        'journal_open_files': 256,
         'difficulty_levels': {
             1: 'Легкий',
             2: 'Середній',
@@ -63,6 +99,86 @@ class Config:
         }
     }
 
+    # Пошук майже однакових питань (MinHash/LSH)
+    QUESTION_DEDUP_CONFIG = {
+        'similarity_threshold': 0.7,
+        'num_perm': 64,
+        'bands': 16,
+        'shingle_size': 4
+    }
+
+    # Масовий імпорт питань
+    IMPORT_CONFIG = {
+        # Процеси для перевірки рядків: 1 - у поточному процесі, 0 - за кількістю ядер.
+        # Перевірка дешева порівняно із записом, тож пул окупається лише на
+        # дуже великих файлах
+        'workers': 1,
+        'chunk_size': 5000,
+        'create_missing_categories': True
+    }
+
+    # Адаптивне тестування (модель IRT 2PL)
+    ADAPTIVE_CONFIG = {
+        'questions_count': 10,
+        'calibration_iterations': 50,
+        # Скільки найближчих за складністю питань порівнюється при виборі
+        'selection_window': 8,
+        'ability_grid_points': 81,
+        # Індекси питань перебудовуються не рідше ніж раз на цей час
+        # (калібрування з командного рядка працює в іншому процесі)
+        'index_rebuild_seconds': 600
+    }
+
+    # Інтервальне повторення (SM-2)
+    SPACED_REPETITION_CONFIG = {
+        'review_questions_count': 10,
+        'initial_ease': 2.5,
+        'min_ease': 1.3,
+        # Правильна відповідь швидше за цей час вважається впевненою
+        'fast_answer_seconds': 15,
+        'slow_answer_seconds': 60
+    }
+
+    # Репліка для важких запитів адміністратора (статистика, експорт)
+    REPLICA_CONFIG = {
+        'enabled': True,
+        # Допустима застарілість даних; старіша репліка не використовується
+        'max_staleness_seconds': 300,
+        # SQLite: період оновлення знімка бази
+        'refresh_seconds': 60,
+        'snapshot_suffix': '.replica',
+        # MySQL: як часто перевіряти відставання репліки
+        'lag_check_seconds': 10
+    }
+
+    # Інкрементна аналітика відповідей
+    INCREMENTAL_ANALYTICS_CONFIG = {
+        'interval_seconds': 300,
+        'batch_size': 20000,
+        # Точність HyperLogLog: 2^precision байт на скетч, похибка ~1.04/sqrt(2^precision)
+        'hll_precision': 10
+    }
+
+    # Архівація старих результатів (див. archive.py)
+    ARCHIVE_CONFIG = {
+        # Результати, старші за горизонт, переносяться до архівів за роками
+        'horizon_days': 730,
+        'batch_size': 1000
+    }
+
+    # Зведена статистика користувачів (див. user_stats.py)
+    USER_STATS_CONFIG = {
+        'cache_size': 4096,  # зведень у пам'яті (LRU)
+        'recent_tests': 10  # довжина кільцевого буфера останніх тестів
+    }
+
+    # Рейтинги користувачів (див. leaderboard.py)
+    LEADERBOARD_CONFIG = {
+        'top_size': 50,
+        # Повна перебудова, щоб врахувати результати інших процесів
+        'rebuild_seconds': 600
+    }
+
     # Налаштування безпеки
     SECURITY_CONFIG = {
         'password_min_length': 6,
@@ -72,7 +188,35 @@ class Config:
         'password_require_special': False,
         'session_timeout_minutes': 60,
         'max_login_attempts': 5,
-        'lockout_duration_minutes': 15
+        'lockout_duration_minutes': 15,
+        'credential_cache_size': 2048,
+        # Зміни з інших процесів (адмін-панель) підхоплюються не пізніше ніж за цей час
+        'credential_cache_ttl_seconds': 300,
+        # Хешування паролів: pbkdf2_sha256 або scrypt
+        'password_hash_algorithm': 'pbkdf2_sha256',
+        # Цільовий час перевірки паролю, під який калібрується вартість
+        'password_hash_target_ms': 100,
+        # Мінімальна вартість: ітерації PBKDF2 та параметр n для scrypt
+        'password_hash_min_cost': {
+            'pbkdf2_sha256': 100000,
+            'scrypt': 2 ** 14
+        },
+        # Кількість потоків для хешування (0 - визначити автоматично)
+        'password_hash_workers': 0
+    }
+
+    # Налаштування серверного режиму (HTTP API)
+    SERVER_CONFIG = {
+        'host': '127.0.0.1',
+        'port': 8080,
+        'db_pool_size': 8,
+        'max_test_sessions': 5000,
+        'test_session_idle_minutes': 120,
+        # Пакетний запис активності сесій та очищення прострочених
+        'session_flush_seconds': 30,
+        'session_sweep_seconds': 60,
+        # Звірка сесій з базою: відкликані адмін-панеллю та змінені користувачі
+        'session_refresh_seconds': 60
     }
 
     # Налаштування логування
@@ -87,6 +231,7 @@ class Config:
     # Шляхи до файлів
     PATHS = {
         'data_dir': 'data',
+        'sessions_dir': os.path.join('data', 'sessions'),
         'backup_dir': 'backups',
         'export_dir': 'exports',
         'logs_dir': 'logs',
@@ -2,49 +2,232 @@
 Альтернативна реалізація для роботи з MySQL
 """
 
-import mysql.connector
-from mysql.connector import Error
 import json
-import hashlib
 import datetime
-from typing import List, Tuple, Optional, Dict
+import random
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
 from config import config
+from db_pool import ReconnectingConnectionPool
+from security import hash_password
+from seed_data import builtin_seed_pack, load_seed_pack
 
+try:
+    import mysql.connector
+    from mysql.connector import Error
+except ImportError:
+    # Без драйвера MySQL доступна лише сумісна обгортка SQLite
+    mysql = None
+    Error = sqlite3.Error
 
-class MySQLDatabaseManager:
-    """Клас для управління MySQL базою даних"""
+# Помилки, після яких варто повторити підключення чи відкотити транзакцію
+DATABASE_ERRORS = (Error, sqlite3.Error, OSError)
+
+
+# Блокування рядків MySQL; SQLite і так серіалізує транзакції запису
+FOR_UPDATE = re.compile(r'\s+FOR\s+UPDATE\s*$', re.IGNORECASE)
+# Рядкові літерали (їх вміст не змінюється) або позначка параметра %s
+SQL_TOKENS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|%s")
+
+
+class SQLiteCompatCursor:
+    """Курсор SQLite, що приймає параметри у стилі MySQL (%s)"""
+
+    def __init__(self, cursor: sqlite3.Cursor, dialect: str = 'sqlite'):
+        self._cursor = cursor
+        self._dialect = dialect
+
+    def _translate(self, query: str) -> str:
+        query = SQL_TOKENS.sub(lambda m: '?' if m.group() == '%s' else m.group(), query)
+        if self._dialect == 'mysql':
+            query = FOR_UPDATE.sub('', query)
+        return query
+
+    def execute(self, query: str, params: Tuple = ()):
+        return self._cursor.execute(self._translate(query), params)
+
+    def executemany(self, query: str, seq_of_params):
+        return self._cursor.executemany(self._translate(query), seq_of_params)
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+
+class SQLiteCompatConnection:
+    """З'єднання SQLite з інтерфейсом mysql.connector для пулу та запитів з %s
+
+    Використовується як резервне сховище, коли MySQL недоступний, і як
+    локальна заміна сервера MySQL для перевірки пулу та запитів без
+    зовнішньої бази (dialect='mysql': запити пишуться як для MySQL).
+    """
+
+    def __init__(self, db_name: str, timeout: float = 30.0, dialect: str = 'sqlite'):
+        self.db_name = db_name
+        self.dialect = dialect
+        self._conn = sqlite3.connect(db_name, timeout=timeout, check_same_thread=False)
+        if dialect == 'mysql':
+            self._conn.create_function('RAND', 0, random.random)
+        self._closed = False
 
-    def __init__(self):
-        self.connection = None
-        self.connect()
+    @classmethod
+    def factory(cls, db_name: str,
+                dialect: str = 'sqlite') -> Callable[[], 'SQLiteCompatConnection']:
+        return lambda: cls(db_name, dialect=dialect)
+
+    def cursor(self) -> SQLiteCompatCursor:
+        return SQLiteCompatCursor(self._conn.cursor(), self.dialect)
+
+    def is_connected(self) -> bool:
+        if self._closed:
+            return False
+        try:
+            self._conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._closed = True
+        self._conn.close()
+
+
+class MySQLDatabaseManager:
+    """Клас для управління MySQL базою даних
+
+    З'єднання видаються з пулу з автоматичним повторним підключенням.
+    Якщо MySQL недоступний, а резервне сховище дозволене конфігурацією,
+    використовується файл SQLite через сумісну обгортку.
+    """
+
+    def __init__(self, connect_factory: Optional[Callable[[], Any]] = None):
+        self.settings = config.DATABASE_CONFIG['mysql']
+        self.pool: Optional[ReconnectingConnectionPool] = None
+        self.replica_pool: Optional[ReconnectingConnectionPool] = None
+        self._replica_checked_at = 0.0
+        self._replica_usable = False
+        self.dialect = 'mysql'
+        # Ідентифікатор бази для спільних кешів (як шлях до файлу в DatabaseManager)
+        self.db_name = (f"mysql://{self.settings['host']}:{self.settings['port']}"
+                        f"/{self.settings['database']}")
+        self.connect(connect_factory)
         self.init_database()
 
-    def connect(self):
-        """Підключення до MySQL"""
+    def _connect_mysql(self, host: Optional[str] = None, port: Optional[int] = None):
+        """Нове з'єднання з сервером MySQL (основним або реплікою)"""
+        return mysql.connector.connect(
+            host=host or self.settings['host'],
+            port=port or self.settings['port'],
+            database=self.settings['database'],
+            user=self.settings['user'],
+            password=self.settings['password'],
+            charset=self.settings['charset'],
+            connection_timeout=self.settings['connect_timeout'],
+            autocommit=False
+        )
+
+    def _create_pool(self, connect_factory: Callable[[], Any]) -> ReconnectingConnectionPool:
+        return ReconnectingConnectionPool(
+            connect_factory,
+            pool_size=self.settings['pool_size'],
+            timeout=self.settings['pool_timeout'],
+            retries=self.settings['connect_retries'],
+            backoff=self.settings['retry_backoff'],
+            backoff_max=self.settings['retry_backoff_max'],
+            validate_idle_seconds=self.settings['validate_idle_seconds'],
+            errors=DATABASE_ERRORS,
+            retry_deadline=self.settings['connect_deadline'])
+
+    def connect(self, connect_factory: Optional[Callable[[], Any]] = None):
+        """Створення пулу з'єднань і перевірка підключення"""
         try:
-            mysql_config = config.DATABASE_CONFIG['mysql']
-            self.connection = mysql.connector.connect(
-                host=mysql_config['host'],
-                port=mysql_config['port'],
-                database=mysql_config['database'],
-                user=mysql_config['user'],
-                password=mysql_config['password'],
-                charset=mysql_config['charset'],
-                autocommit=True
-            )
-            print("Успішне підключення до MySQL")
-        except Error as e:
+            if connect_factory is None and mysql is None:
+                raise Error("драйвер mysql-connector-python не встановлено")
+            self.pool = self._create_pool(connect_factory or self._connect_mysql)
+            with self.get_connection() as conn:
+                self.dialect = getattr(conn, 'dialect', 'mysql')
+                self.db_name = getattr(conn, 'db_name', self.db_name)
+            print("Підключено сумісне сховище SQLite" if hasattr(conn, 'db_name')
+                  else "Успішне підключення до MySQL")
+            if connect_factory is None and self.settings['replica_host']:
+                # З'єднання з реплікою відкриваються при першому аналітичному запиті
+                self.replica_pool = self._create_pool(lambda: self._connect_mysql(
+                    self.settings['replica_host'], self.settings['replica_port']))
+        except DATABASE_ERRORS as e:
             print(f"Помилка підключення до MySQL: {e}")
-            # Fallback до SQLite
-            import sqlite3
-            self.connection = sqlite3.connect("informatics_trainer.db")
+            if not self.settings['fallback_to_sqlite']:
+                raise
+            # Резервне сховище: локальний файл SQLite
+            self.db_name = config.DATABASE_CONFIG['sqlite']['db_name']
+            self.pool = self._create_pool(SQLiteCompatConnection.factory(self.db_name))
+            self.dialect = 'sqlite'
+
+    @contextmanager
+    def get_connection(self):
+        """З'єднання з пулу: комміт при успіху, відкат при помилці"""
+        with self.pool.connection() as conn:
+            yield conn
+
+    def _check_replica(self) -> bool:
+        """Чи відстає репліка не більше за допустиму застарілість (з кешуванням перевірки)"""
+        now = time.monotonic()
+        if now - self._replica_checked_at < config.REPLICA_CONFIG['lag_check_seconds']:
+            return self._replica_usable
+
+        lag = None
+        try:
+            with self.replica_pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except Error:
+                    # MySQL до 8.0.22
+                    cursor.execute("SHOW SLAVE STATUS")
+                status = cursor.fetchone() or {}
+                lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        except DATABASE_ERRORS as e:
+            print(f"Репліка MySQL недоступна: {e}")
+
+        # NULL означає, що реплікація зупинена
+        self._replica_usable = (lag is not None
+                                and lag <= config.REPLICA_CONFIG['max_staleness_seconds'])
+        self._replica_checked_at = now
+        return self._replica_usable
+
+    @contextmanager
+    def get_read_connection(self):
+        """З'єднання для аналітичного читання: репліка, якщо вона не надто відстає"""
+        pool = self.pool
+        if self.replica_pool is not None and self._check_replica():
+            pool = self.replica_pool
+        with pool.connection() as conn:
+            yield conn
+
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """Стан пулу: зайняті з'єднання, очікування, перепідключення"""
+        return self.pool.get_metrics()
 
     def init_database(self):
         """Ініціалізація бази даних та створення таблиць"""
-        if not self.connection:
+        with self.get_connection() as conn:
+            sqlite_file = getattr(conn, 'db_name', None)
+        if sqlite_file:
+            # Сховище SQLite: схема та початкові дані - як у настільному режимі
+            from main import DatabaseManager
+            DatabaseManager(sqlite_file)
             return
 
-        cursor = self.connection.cursor()
+        conn = self.pool.acquire()
+        cursor = conn.cursor()
 
         try:
             # Таблиця користувачів
@@ -52,7 +235,7 @@ class MySQLDatabaseManager:
                 CREATE TABLE IF NOT EXISTS users (
                     id INT AUTO_INCREMENT PRIMARY KEY,
                     username VARCHAR(50) UNIQUE NOT NULL,
-                    password_hash VARCHAR(64) NOT NULL,
+                    password_hash VARCHAR(255) NOT NULL,
                     email VARCHAR(100),
                     registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     is_admin BOOLEAN DEFAULT FALSE,
@@ -62,6 +245,10 @@ class MySQLDatabaseManager:
                 )
             ''')
 
+            # Хеші PBKDF2/scrypt довші за 64 символи SHA-256
+            cursor.execute(
+                "ALTER TABLE users MODIFY password_hash VARCHAR(255) NOT NULL")
+
             # Таблиця категорій
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS categories (
@@ -105,6 +292,7 @@ class MySQLDatabaseManager:
                     time_spent INT,
                     difficulty_level INT DEFAULT 1,
                     score DECIMAL(5,2),
+                    INDEX idx_test_results_user (user_id, test_date),
                     FOREIGN KEY (user_id) REFERENCES users (id),
                     FOREIGN KEY (category_id) REFERENCES categories (id)
                 )
@@ -124,6 +312,56 @@ class MySQLDatabaseManager:
                 )
             ''')
 
+            # Підсумки заархівованих результатів
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS result_rollups (
+                    user_id INT NOT NULL,
+                    category_id INT NOT NULL,
+                    tests INT NOT NULL,
+                    total_questions INT NOT NULL,
+                    correct_answers INT NOT NULL,
+                    time_spent INT NOT NULL,
+                    percentage_sum DOUBLE NOT NULL,
+                    PRIMARY KEY (user_id, category_id)
+                )
+            ''')
+
+            # Зведена статистика користувачів
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_stats (
+                    user_id INT PRIMARY KEY,
+                    tests INT NOT NULL,
+                    total_questions INT NOT NULL,
+                    correct_answers INT NOT NULL,
+                    time_spent INT NOT NULL,
+                    percentage_sum DOUBLE NOT NULL,
+                    categories TEXT NOT NULL,
+                    recent TEXT NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            ''')
+
+            # Класи (групи) учнів та їх склад
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS class_groups (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    description TEXT,
+                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE KEY idx_class_groups_name (name)
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS class_members (
+                    group_id INT NOT NULL,
+                    user_id INT NOT NULL,
+                    PRIMARY KEY (group_id, user_id),
+                    INDEX idx_class_members_user (user_id),
+                    FOREIGN KEY (group_id) REFERENCES class_groups (id),
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            ''')
+
             # Таблиця сесій користувачів
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS user_sessions (
@@ -132,7 +370,10 @@ class MySQLDatabaseManager:
                     session_token VARCHAR(128),
                     created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     expires_date TIMESTAMP,
+                    last_seen TIMESTAMP NULL,
                     is_active BOOLEAN DEFAULT TRUE,
+                    UNIQUE KEY idx_session_token (session_token),
+                    INDEX idx_user_sessions_expires (expires_date),
                     FOREIGN KEY (user_id) REFERENCES users (id)
                 )
             ''')
@@ -150,19 +391,22 @@ class MySQLDatabaseManager:
                 )
             ''')
 
-            self.connection.commit()
+            conn.commit()
             print("Таблиці MySQL успішно створені")
-
-            # Додаємо початкові дані
-            self.populate_initial_data()
-
         except Error as e:
             print(f"Помилка створення таблиць MySQL: {e}")
-            self.connection.rollback()
+            conn.rollback()
+            return
+        finally:
+            self.pool.release(conn)
+
+        # Додаємо початкові дані
+        self.populate_initial_data()
 
     def populate_initial_data(self):
         """Додавання початкових даних до MySQL бази"""
-        cursor = self.connection.cursor()
+        conn = self.pool.acquire()
+        cursor = conn.cursor()
 
         try:
             # Перевіряємо чи є дані
@@ -170,162 +414,37 @@ class MySQLDatabaseManager:
             result = cursor.fetchone()
 
             if result[0] == 0:
-                # Додаємо категорії
-                categories = [
-                    ("Основи програмування", "Базові концепції програмування"),
-                    ("Алгоритми та структури даних",
-                     "Алгоритми сортування, пошуку, структури даних"),
-                    ("Бази даних", "SQL, реляційні бази даних"),
-                    ("Мережі та Інтернет", "Протоколи, архітектура мереж"),
-                    ("Операційні системи", "Принципи роботи ОС"),
-                    ("Інформаційна безпека", "Криптографія, захист інформації"),
-                    ("Веб-технології", "HTML, CSS, JavaScript"),
-                    ("Об'єктно-орієнтоване програмування",
-                     "Класи, об'єкти, наслідування")
-                ]
-
-                cursor.executemany(
-                    "INSERT INTO categories (name, description) VALUES (%s, %s)", categories)
-
-                # Додаємо розширений набір питань
-                questions = [
-                    # Основи програмування (category_id = 1)
-                    (1, "Що таке змінна в програмуванні?", "multiple_choice", "Іменована область пам'яті для зберігання даних",
-                     '["Іменована область пам\'яті для зберігання даних", "Функція для обчислень", "Цикл виконання", "Умовний оператор"]', 1,
-                     "Змінна - це іменована область пам'яті, яка використовується для зберігання даних"),
-
-                    (1, "Python є інтерпретованою мовою програмування", "true_false", "True", None, 1,
-                     "Python дійсно є інтерпретованою мовою програмування"),
-
-                    (1, "Який оператор використовується для присвоєння в Python?", "text_input", "=", None, 1,
-                     "Оператор = використовується для присвоєння значень змінним"),
-
-                    (1, "Що виведе код: print(2 ** 3)?", "multiple_choice", "8",
-                     '["6", "8", "9", "16"]', 2,
-                     "Оператор ** означає піднесення до степеня, тому 2**3 = 8"),
-
-                    (1, "Які з наступних є коментарями в Python?", "multiple_choice", "# Це коментар",
-                     '["# Це коментар", "// Це коментар", "/* Це коментар */", "<!-- Це коментар -->"]', 1,
-                     "В Python коментарі починаються з символу #"),
-
-                    # Алгоритми та структури даних (category_id = 2)
-                    (2, "Яка складність алгоритму бульбашкового сортування?", "multiple_choice", "O(n²)",
-                     '["O(n)", "O(n²)", "O(log n)", "O(n log n)"]', 2,
-                     "Бульбашкове сортування має квадратичну складність O(n²)"),
-
-                    (2, "Стек працює за принципом LIFO", "true_false", "True", None, 2,
-                     "LIFO (Last In, First Out) - останній прийшов, перший пішов"),
-
-                    (2, "Яка структура даних використовується для реалізації рекурсії?", "multiple_choice", "Стек",
-                     '["Черга", "Стек", "Список", "Дерево"]', 2,
-                     "Рекурсія використовує стек викликів для збереження контексту функцій"),
-
-                    (2, "Бінарний пошук працює тільки з відсортованими масивами", "true_false", "True", None, 2,
-                     "Бінарний пошук вимагає відсортованого масиву для коректної роботи"),
-
-                    (2, "Яка складність пошуку в хеш-таблиці в середньому випадку?", "multiple_choice", "O(1)",
-                     '["O(1)", "O(log n)", "O(n)", "O(n²)"]', 3,
-                     "Хеш-таблиця забезпечує константний час пошуку O(1) в середньому випадку"),
-
-                    # Бази даних (category_id = 3)
-                    (3, "Що означає SQL?", "text_input", "Structured Query Language", None, 1,
-                     "SQL - Structured Query Language, мова структурованих запитів"),
-
-                    (3, "Який оператор використовується для вибірки даних?", "multiple_choice", "SELECT",
-                     '["INSERT", "SELECT", "UPDATE", "DELETE"]', 1,
-                     "SELECT використовується для вибірки даних з таблиць"),
-
-                    (3, "Первинний ключ може містити NULL значення", "true_false", "False", None, 2,
-                     "Первинний ключ не може містити NULL значення та повинен бути унікальним"),
-
-                    (3, "Яка команда використовується для створення нової таблиці?", "multiple_choice", "CREATE TABLE",
-                     '["CREATE TABLE", "NEW TABLE", "ADD TABLE", "MAKE TABLE"]', 1,
-                     "CREATE TABLE використовується для створення нових таблиць"),
-
-                    (3, "Що таке нормалізація бази даних?", "multiple_choice", "Процес організації даних для зменшення надмірності",
-                     '["Процес організації даних для зменшення надмірності", "Процес видалення даних", "Процес шифрування даних", "Процес резервного копіювання"]', 3,
-                     "Нормалізація - це процес структурування бази даних для зменшення надмірності та покращення цілісності"),
-
-                    # Мережі та Інтернет (category_id = 4)
-                    (4, "HTTP працює на якому рівні моделі OSI?", "multiple_choice", "Прикладному",
-                     '["Фізичному", "Канальному", "Мережевому", "Прикладному"]', 2,
-                     "HTTP працює на прикладному (7-му) рівні моделі OSI"),
-
-                    (4, "IP-адреса складається з 4 октетів", "true_false", "True", None, 1,
-                     "IPv4 адреса дійсно складається з 4 октетів по 8 біт кожен"),
-
-                    (4, "Який протокол використовується для надійної передачі даних?", "multiple_choice", "TCP",
-                     '["UDP", "TCP", "ICMP", "ARP"]', 2,
-                     "TCP (Transmission Control Protocol) забезпечує надійну передачу даних"),
-
-                    (4, "Що означає DNS?", "text_input", "Domain Name System", None, 2,
-                     "DNS - Domain Name System, система доменних імен"),
-
-                    (4, "HTTPS використовує шифрування", "true_false", "True", None, 2,
-                     "HTTPS використовує SSL/TLS шифрування для безпечної передачі даних"),
-
-                    # Операційні системи (category_id = 5)
-                    (5, "Що таке процес в ОС?", "multiple_choice", "Програма в стані виконання",
-                     '["Файл на диску", "Програма в стані виконання", "Системний виклик", "Драйвер пристрою"]', 2,
-                     "Процес - це програма, яка завантажена в пам'ять і виконується"),
-
-                    (5, "Deadlock може виникнути при роботі з ресурсами", "true_false", "True", None, 3,
-                     "Deadlock (взаємне блокування) виникає коли процеси чекають один одного"),
-
-                    (5, "Яка команда в Linux показує запущені процеси?", "multiple_choice", "ps",
-                     '["ls", "ps", "cd", "mkdir"]', 2,
-                     "Команда ps показує список запущених процесів"),
-
-                    (5, "Віртуальна пам'ять дозволяє використовувати більше пам'яті ніж фізично доступно", "true_false", "True", None, 2,
-                     "Віртуальна пам'ять використовує диск як розширення оперативної пам'яті"),
-
-                    # Інформаційна безпека (category_id = 6)
-                    (6, "Що таке хешування?", "multiple_choice", "Перетворення даних у фіксований розмір",
-                     '["Шифрування даних", "Перетворення даних у фіксований розмір", "Стиснення файлів", "Резервне копіювання"]', 2,
-                     "Хешування - це перетворення вхідних даних у рядок фіксованого розміру"),
-
-                    (6, "Симетричне шифрування використовує один ключ для шифрування та розшифрування", "true_false", "True", None, 2,
-                     "При симетричному шифруванні один і той же ключ використовується для обох операцій"),
-
-                    (6, "Що таке фішинг?", "multiple_choice", "Спроба отримати конфіденційну інформацію обманним шляхом",
-                     '["Вірус", "Спроба отримати конфіденційну інформацію обманним шляхом", "Тип шифрування", "Мережевий протокол"]', 2,
-                     "Фішинг - це соціальна інженерія для крадіжки особистих даних"),
-
-                    (6, "Яка довжина ключа вважається безпечною для AES?", "multiple_choice", "256 біт",
-                     '["64 біт", "128 біт", "256 біт", "512 біт"]', 3,
-                     "AES-256 вважається найбільш безпечним варіантом"),
-                ]
-
-                for q in questions:
-                    cursor.execute('''
-                        INSERT INTO questions (category_id, question_text, question_type, correct_answer, options, difficulty, explanation)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ''', q)
+                # Категорії та питання - спільний з SQLite вбудований набір,
+                # вставка пакетами в одній транзакції
+                load_seed_pack(cursor, builtin_seed_pack(), self.dialect)
 
                 # Створюємо адміністратора
-                admin_password = hashlib.sha256(
-                    "admin123".encode()).hexdigest()
+                admin_password = hash_password("admin123")
                 cursor.execute('''
                     INSERT INTO users (username, password_hash, email, is_admin)
                     VALUES (%s, %s, %s, %s)
                 ''', ("admin", admin_password, "admin@example.com", True))
 
                 # Створюємо тестового користувача
-                test_password = hashlib.sha256("test123".encode()).hexdigest()
+                test_password = hash_password("test123")
                 cursor.execute('''
                     INSERT INTO users (username, password_hash, email, is_admin)
                     VALUES (%s, %s, %s, %s)
                 ''', ("test_user", test_password, "test@example.com", False))
 
-            self.connection.commit()
+            conn.commit()
             print("Початкові дані MySQL успішно додані")
 
         except Error as e:
             print(f"Помилка додавання початкових даних MySQL: {e}")
-            self.connection.rollback()
+            conn.rollback()
+        finally:
+            self.pool.release(conn)
 
     def close_connection(self):
         """Закриття з'єднання з базою даних"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        if self.replica_pool:
+            self.replica_pool.close_all()
+        if self.pool:
+            self.pool.close_all()
             print("З'єднання з MySQL закрито")
@@ -0,0 +1,269 @@
+"""
+Пул з'єднань з базою даних для серверного режиму тренажера
+"""
+
+import logging
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteConnectionPool:
+    """Пул з'єднань SQLite, спільний для всіх потоків одного процесу"""
+
+    def __init__(self, db_name: str, pool_size: int = 8, timeout: float = 30.0,
+                 cached_statements: int = 128):
+        self.db_name = db_name
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=pool_size)
+        self._all_connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Створення нового з'єднання"""
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout,
+                               check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        # WAL дозволяє читати паралельно із записом
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Отримання з'єднання з пулу"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all_connections) < self.pool_size:
+                conn = self._create_connection()
+                self._all_connections.append(conn)
+                return conn
+
+        # Пул вичерпано - чекаємо на звільнення з'єднання
+        return self._pool.get(timeout=self.timeout)
+
+    def release(self, conn: sqlite3.Connection):
+        """Повернення з'єднання до пулу"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._pool.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Контекстний менеджер: комміт при успіху, відкат при помилці"""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Закриття всіх з'єднань пулу"""
+        with self._lock:
+            for conn in self._all_connections:
+                conn.close()
+            self._all_connections = []
+            self._pool = queue.Queue(maxsize=self.pool_size)
+
+
+class PoolExhaustedError(Exception):
+    """Не вдалося отримати з'єднання з пулу за відведений час"""
+
+
+class PoolMetrics:
+    """Лічильники використання пулу з'єднань"""
+
+    __slots__ = ('acquired', 'waited', 'wait_seconds', 'timeouts', 'reconnects',
+                 'connect_failures', 'peak_in_use')
+
+    def __init__(self):
+        self.acquired = 0
+        self.waited = 0  # скільки разів пул був вичерпаний і доводилось чекати
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.reconnects = 0
+        self.connect_failures = 0
+        self.peak_in_use = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ReconnectingConnectionPool:
+    """Пул з'єднань з перевіркою життєздатності та повторним підключенням
+
+    Працює з будь-якою фабрикою з'єднань DB-API (MySQL або сумісна обгортка
+    SQLite). З'єднання, що простояло довше validate_idle_seconds, перед
+    видачею перевіряється; розірване замінюється новим. Невдалі спроби
+    підключення повторюються з експоненційною затримкою та випадковим розкидом,
+    але не довше за retry_deadline секунд від першої спроби.
+    """
+
+    def __init__(self, connect: Callable[[], Any], pool_size: int = 8, timeout: float = 30.0,
+                 retries: int = 5, backoff: float = 0.5, backoff_max: float = 8.0,
+                 validate_idle_seconds: float = 30.0,
+                 errors: Tuple[Type[BaseException], ...] = (Exception,),
+                 retry_deadline: Optional[float] = None):
+        self.connect = connect
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.retry_deadline = retry_deadline
+        self.validate_idle_seconds = validate_idle_seconds
+        self.errors = errors
+        self.metrics = PoolMetrics()
+        self._idle: "queue.LifoQueue[Tuple[Any, float]]" = queue.LifoQueue(maxsize=pool_size)
+        self._size = 0
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_alive(conn) -> bool:
+        try:
+            return conn.is_connected()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _open(self):
+        """Нове з'єднання з повторними спробами та експоненційною затримкою"""
+        started = time.monotonic()
+        for attempt in range(self.retries + 1):
+            try:
+                return self.connect()
+            except self.errors as e:
+                with self._lock:
+                    self.metrics.connect_failures += 1
+                if attempt == self.retries:
+                    raise
+                delay = min(self.backoff * 2 ** attempt, self.backoff_max)
+                delay *= random.uniform(0.5, 1.0)
+                if (self.retry_deadline is not None and
+                        time.monotonic() - started + delay > self.retry_deadline):
+                    raise
+                logger.warning(f"Помилка підключення до бази ({e}), повтор через {delay:.1f} с")
+                time.sleep(delay)
+
+    def _checkout(self, conn):
+        with self._lock:
+            self._in_use += 1
+            self.metrics.acquired += 1
+            self.metrics.peak_in_use = max(self.metrics.peak_in_use, self._in_use)
+        return conn
+
+    def _discard(self):
+        with self._lock:
+            self._size -= 1
+
+    def acquire(self):
+        """Отримання з'єднання: вільне з пулу, нове в межах розміру або очікування"""
+        try:
+            conn, released_at = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._size < self.pool_size
+                if can_open:
+                    self._size += 1
+            if can_open:
+                try:
+                    return self._checkout(self._open())
+                except Exception:
+                    self._discard()
+                    raise
+
+            started = time.monotonic()
+            try:
+                conn, released_at = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self.metrics.waited += 1
+                    self.metrics.timeouts += 1
+                    self.metrics.wait_seconds += time.monotonic() - started
+                raise PoolExhaustedError(
+                    f"Усі {self.pool_size} з'єднань зайняті довше {self.timeout} с")
+            with self._lock:
+                self.metrics.waited += 1
+                self.metrics.wait_seconds += time.monotonic() - started
+
+        if (time.monotonic() - released_at > self.validate_idle_seconds
+                and not self.is_alive(conn)):
+            self._close_quietly(conn)
+            with self._lock:
+                self.metrics.reconnects += 1
+            try:
+                conn = self._open()
+            except Exception:
+                self._discard()
+                raise
+        return self._checkout(conn)
+
+    def release(self, conn, broken: bool = False):
+        """Повернення з'єднання; розірване закривається, а місце звільняється"""
+        with self._lock:
+            self._in_use -= 1
+        if broken:
+            self._close_quietly(conn)
+            self._discard()
+            return
+        self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """Контекстний менеджер: комміт при успіху, відкат при помилці"""
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            # Помилка могла бути розривом з'єднання: таке не повертаємо до пулу
+            broken = not self.is_alive(conn)
+            raise
+        finally:
+            self.release(conn, broken)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Поточний стан пулу та накопичені лічильники"""
+        with self._lock:
+            metrics = self.metrics.as_dict()
+            metrics.update(size=self._size, in_use=self._in_use,
+                           idle=self._size - self._in_use, pool_size=self.pool_size)
+        return metrics
+
+    def close_all(self):
+        """Закриття всіх вільних з'єднань пулу"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close_quietly(conn)
+            self._discard()
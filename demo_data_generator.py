@@ -12,6 +12,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import sys
 
+from question_dedup import load_dedup_index
+
 
 class ProgressBar:
     """Простий прогрес-бар для консолі"""
@@ -45,6 +47,7 @@ class EnhancedDemoDataGenerator:
         self.stats = {
             'users_created': 0,
             'questions_created': 0,
+            'questions_skipped': 0,
             'test_results_created': 0,
             'answer_details_created': 0
         }
@@ -64,6 +67,7 @@ class EnhancedDemoDataGenerator:
             cursor.execute("DELETE FROM questions WHERE id > 50")
             cursor.execute(
                 "DELETE FROM users WHERE username LIKE 'demo_%' OR username LIKE '%.%'")
+            self.reset_derived_stats(cursor, ('user_stats', 'result_rollups'))
 
             conn.commit()
             print("✅ Демонстраційні дані очищено")
@@ -74,6 +78,15 @@ class EnhancedDemoDataGenerator:
         finally:
             conn.close()
 
+    @staticmethod
+    def reset_derived_stats(cursor: sqlite3.Cursor, tables: Tuple[str, ...]):
+        """Очищення зведень, що будуються з історії результатів (якщо вони є в схемі)"""
+        cursor.execute(
+            f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({','.join('?' * len(tables))})",
+            tables)
+        for (table,) in cursor.fetchall():
+            cursor.execute(f"DELETE FROM {table}")
+
     def generate_realistic_users(self, count: int = 25):
         """Генерація користувачів"""
         print(f"Генерація {count} користувачів...")
@@ -551,6 +564,9 @@ class EnhancedDemoDataGenerator:
                               for questions in comprehensive_questions.values())
         progress = ProgressBar(total_questions, "Додавання питань")
 
+        # Індекс наявних питань, щоб не додавати майже однакові
+        dedup_index = load_dedup_index(self.db_name)
+
         # Додаємо питання до бази
         for category_name, questions in comprehensive_questions.items():
             # Знаходимо ID категорії
@@ -562,6 +578,11 @@ class EnhancedDemoDataGenerator:
 
             if category_id:
                 for q in questions:
+                    if dedup_index.query(q["question"]):
+                        self.stats['questions_skipped'] += 1
+                        progress.update()
+                        continue
+
                     options_json = json.dumps(
                         q["options"], ensure_ascii=False) if q["options"] else None
 
@@ -573,6 +594,7 @@ class EnhancedDemoDataGenerator:
                         ''', (category_id, q["question"], q["type"], q["answer"],
                               options_json, q["difficulty"], q["explanation"]))
 
+                        dedup_index.add(cursor.lastrowid, q["question"])
                         self.stats['questions_created'] += 1
 
                     except sqlite3.IntegrityError:
@@ -584,6 +606,8 @@ class EnhancedDemoDataGenerator:
         conn.commit()
         conn.close()
         print(f"✅ Додано {self.stats['questions_created']} нових питань")
+        if self.stats['questions_skipped']:
+            print(f"   Пропущено майже однакових: {self.stats['questions_skipped']}")
 
     def generate_realistic_test_results(self, num_results: int = 150):
         """Генерація реалістичних результатів тестування"""
@@ -702,6 +726,8 @@ class EnhancedDemoDataGenerator:
             progress.update()
             time.sleep(0.01)
 
+        # Зведення користувачів перебудуються з нової історії при першому зверненні
+        self.reset_derived_stats(cursor, ('user_stats',))
         conn.commit()
         conn.close()
         print(
@@ -0,0 +1,101 @@
+"""
+Рушій оцінювання відповідей: кожне питання заздалегідь компілюється у перевіряльник
+"""
+
+import difflib
+import re
+from typing import Dict, Optional, Pattern
+
+
+# Синоніми для питань "правда/неправда"
+TRUE_ANSWERS = frozenset({'true', 'так', 'правда', '1'})
+FALSE_ANSWERS = frozenset({'false', 'ні', 'неправда', '0'})
+
+# Правильна відповідь вигляду "re:<вираз>" перевіряється регулярним виразом
+REGEX_PREFIX = 're:'
+
+
+def normalize_answer(answer: str) -> str:
+    """Нормалізація відповіді: регістр та зайві пробіли не враховуються"""
+    return ' '.join(str(answer).lower().split())
+
+
+def regex_answer_error(question_type: str, correct_answer: str) -> Optional[str]:
+    """Помилка у виразі правильної відповіді "re:..." (None - вираз коректний або не вираз)"""
+    correct = correct_answer.strip()
+    if question_type != 'text_input' or not correct.startswith(REGEX_PREFIX):
+        return None
+    try:
+        re.compile(correct[len(REGEX_PREFIX):].strip())
+    except re.error as e:
+        return f"Невірний регулярний вираз у відповіді: {e}"
+    return None
+
+
+class CompiledGrader:
+    """Скомпільований перевіряльник відповіді на одне питання"""
+
+    __slots__ = ('question_id', 'question_type', 'correct', 'correct_index',
+                 'option_index', 'pattern', 'fuzzy_threshold')
+
+    def __init__(self, question, fuzzy_threshold: float = 0.0):
+        self.question_id = question.question_id
+        self.question_type = question.question_type
+        self.fuzzy_threshold = fuzzy_threshold
+        self.pattern: Optional[Pattern] = None
+        self.correct_index: Optional[int] = None
+        self.option_index: Dict[str, int] = {}
+
+        correct = question.correct_answer.strip()
+        if question.question_type == 'text_input' and correct.startswith(REGEX_PREFIX):
+            expression = correct[len(REGEX_PREFIX):].strip()
+            try:
+                self.pattern = re.compile(expression, re.IGNORECASE)
+            except re.error:
+                # Некоректний вираз не ламає тест: відповідь порівнюється як текст
+                correct = expression
+        self.correct = normalize_answer(correct)
+
+        if question.question_type == 'true_false':
+            if self.correct in TRUE_ANSWERS:
+                self.correct_index = 1
+            elif self.correct in FALSE_ANSWERS:
+                self.correct_index = 0
+
+        elif question.question_type == 'multiple_choice':
+            for i, option in enumerate(question.options):
+                self.option_index.setdefault(normalize_answer(option), i)
+            self.correct_index = self.option_index.get(self.correct)
+
+    def grade_index(self, index: int) -> bool:
+        """Перевірка відповіді, заданої індексом варіанту (або 1/0 для правда/неправда)"""
+        return self.correct_index is not None and index == self.correct_index
+
+    def grade(self, answer: str) -> bool:
+        """Перевірка текстової відповіді"""
+        normalized = normalize_answer(answer)
+
+        if self.question_type == 'true_false':
+            if normalized in TRUE_ANSWERS:
+                return self.correct_index == 1
+            if normalized in FALSE_ANSWERS:
+                return self.correct_index == 0
+            return False
+
+        if self.question_type == 'multiple_choice':
+            index = self.option_index.get(normalized)
+            if index is not None and self.correct_index is not None:
+                return index == self.correct_index
+            return normalized == self.correct
+
+        if self.pattern is not None:
+            return self.pattern.fullmatch(answer.strip()) is not None
+
+        if normalized == self.correct:
+            return True
+
+        if self.fuzzy_threshold and normalized:
+            ratio = difflib.SequenceMatcher(None, normalized, self.correct).ratio()
+            return ratio >= self.fuzzy_threshold
+
+        return False
@@ -0,0 +1,330 @@
+"""
+Інкрементна аналітика відповідей: обробляються лише нові рядки answer_details
+"""
+
+import argparse
+import logging
+import math
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import config
+from main import DatabaseManager
+
+
+logger = logging.getLogger(__name__)
+
+# Розрізи, за якими накопичуються агрегати, та що рахує HyperLogLog у кожному
+SCOPES = {
+    'question': 'users',      # скільки різних студентів відповідали на питання
+    'category': 'users',      # скільки різних студентів проходили категорію
+    'user': 'questions'       # скільки різних питань бачив студент
+}
+
+_SQLITE_MAX_PARAMS = 500
+
+
+def _hash64(values: np.ndarray) -> np.ndarray:
+    """Векторний 64-бітний хеш цілих чисел (splitmix64)"""
+    z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class RunningStats:
+    """Агрегат, що зливається: кількість, правильні, сума та сума квадратів часу"""
+
+    __slots__ = ('count', 'correct', 'time_sum', 'time_sq_sum')
+
+    def __init__(self, count: int = 0, correct: int = 0, time_sum: float = 0.0,
+                 time_sq_sum: float = 0.0):
+        self.count = count
+        self.correct = correct
+        self.time_sum = time_sum
+        self.time_sq_sum = time_sq_sum
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        self.count += other.count
+        self.correct += other.correct
+        self.time_sum += other.time_sum
+        self.time_sq_sum += other.time_sq_sum
+        return self
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.count if self.count else 0.0
+
+    @property
+    def mean_time(self) -> float:
+        return self.time_sum / self.count if self.count else 0.0
+
+    @property
+    def std_time(self) -> float:
+        if self.count < 2:
+            return 0.0
+        variance = (self.time_sq_sum - self.time_sum ** 2 / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class HyperLogLog:
+    """Оцінка кількості різних значень у фіксованих 2^precision байтах
+
+    Два скетчі зливаються поелементним максимумом регістрів, тож результат
+    не залежить від того, якими пакетами надходили дані.
+    """
+
+    def __init__(self, precision: int = 10, registers: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = (registers if registers is not None
+                          else np.zeros(self.size, dtype=np.uint8))
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes], precision: int) -> 'HyperLogLog':
+        if not data or len(data) != 1 << precision:
+            return cls(precision)
+        return cls(precision, np.frombuffer(data, dtype=np.uint8).copy())
+
+    def to_bytes(self) -> bytes:
+        return self.registers.tobytes()
+
+    @staticmethod
+    def positions(values: np.ndarray, precision: int):
+        """Номери регістрів і ранги для масиву значень"""
+        hashes = _hash64(values)
+        index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+        # Ранг - позиція першої одиниці у молодших 32 бітах (точно у float64)
+        low = (hashes & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        _, exponent = np.frexp(low)
+        rank = np.where(low > 0, 33 - exponent, 33).astype(np.uint8)
+        return index, rank
+
+    def add_many(self, values: np.ndarray):
+        index, rank = self.positions(values, self.precision)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            # Поправка для малих кількостей (лінійний підрахунок)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class IncrementalAnalytics:
+    """Накопичувальна статистика відповідей з позначкою останнього обробленого рядка
+
+    Кожен запуск читає лише відповіді з id, більшим за збережену позначку,
+    агрегує їх векторно по питаннях, категоріях і користувачах та зливає з
+    уже накопиченим станом. Агрегати і позначка записуються однією транзакцією,
+    тож перерваний запуск просто повторюється наступного разу.
+    """
+
+    JOB_NAME = 'answer_aggregates'
+
+    def __init__(self, db_manager: DatabaseManager, interval_seconds: Optional[float] = None,
+                 batch_size: Optional[int] = None, precision: Optional[int] = None):
+        settings = config.INCREMENTAL_ANALYTICS_CONFIG
+        self.db_manager = db_manager
+        self.interval_seconds = interval_seconds or settings['interval_seconds']
+        self.batch_size = batch_size or settings['batch_size']
+        self.precision = precision or settings['hll_precision']
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def get_high_water_mark(self, cursor: sqlite3.Cursor) -> int:
+        cursor.execute("SELECT last_answer_id FROM analytics_state WHERE job = ?",
+                       (self.JOB_NAME,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def _load_state(self, cursor: sqlite3.Cursor, scope: str, keys: List[int]):
+        """Накопичені агрегати для ключів, яких торкається пакет"""
+        state = {}
+        for start in range(0, len(keys), _SQLITE_MAX_PARAMS):
+            chunk = keys[start:start + _SQLITE_MAX_PARAMS]
+            cursor.execute(f'''
+                SELECT key, responses, correct, time_sum, time_sq_sum, sketch
+                FROM analytics_aggregates
+                WHERE scope = ? AND key IN ({','.join('?' * len(chunk))})
+            ''', [scope] + chunk)
+            for key, responses, correct, time_sum, time_sq_sum, sketch in cursor.fetchall():
+                state[key] = (RunningStats(responses, correct, time_sum, time_sq_sum),
+                              HyperLogLog.from_bytes(sketch, self.precision))
+        return state
+
+    def _fold_scope(self, cursor: sqlite3.Cursor, scope: str, keys: np.ndarray,
+                    correct: np.ndarray, seconds: np.ndarray, distinct: np.ndarray):
+        """Агрегація пакета по одному розрізу та злиття з накопиченим станом"""
+        unique_keys, group = np.unique(keys, return_inverse=True)
+        n_groups = len(unique_keys)
+        counts = np.bincount(group, minlength=n_groups)
+        corrects = np.bincount(group, correct, n_groups)
+        time_sums = np.bincount(group, seconds, n_groups)
+        time_sq_sums = np.bincount(group, seconds * seconds, n_groups)
+
+        # Максимальний ранг HyperLogLog для кожної пари (група, регістр)
+        index, rank = HyperLogLog.positions(distinct, self.precision)
+        cells, cell_group = np.unique(group.astype(np.int64) << self.precision | index,
+                                      return_inverse=True)
+        cell_rank = np.zeros(len(cells), dtype=np.uint8)
+        np.maximum.at(cell_rank, cell_group, rank)
+        cell_owner = cells >> self.precision
+        cell_index = cells & ((1 << self.precision) - 1)
+        bounds = np.searchsorted(cell_owner, np.arange(n_groups + 1))
+
+        state = self._load_state(cursor, scope, unique_keys.tolist())
+        rows = []
+        for g, key in enumerate(unique_keys.tolist()):
+            stats, sketch = state.get(key) or (RunningStats(), HyperLogLog(self.precision))
+            stats.merge(RunningStats(int(counts[g]), int(corrects[g]),
+                                     float(time_sums[g]), float(time_sq_sums[g])))
+            lo, hi = bounds[g], bounds[g + 1]
+            np.maximum.at(sketch.registers, cell_index[lo:hi], cell_rank[lo:hi])
+            rows.append((scope, key, stats.count, stats.correct, stats.time_sum,
+                         stats.time_sq_sum, sketch.to_bytes(), sketch.count()))
+
+        cursor.executemany('''
+            INSERT OR REPLACE INTO analytics_aggregates
+                (scope, key, responses, correct, time_sum, time_sq_sum, sketch, distinct_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    def update(self) -> int:
+        """Обробка нових відповідей пакетами; повертає кількість оброблених рядків"""
+        processed = 0
+        with self._lock:
+            while True:
+                with self.db_manager.get_connection() as conn:
+                    cursor = conn.cursor()
+                    last_id = self.get_high_water_mark(cursor)
+                    cursor.execute('''
+                        SELECT ad.id, ad.question_id, tr.category_id, tr.user_id,
+                               COALESCE(ad.is_correct, 0), COALESCE(ad.time_spent, 0)
+                        FROM answer_details ad
+                        JOIN test_results tr ON ad.test_result_id = tr.id
+                        WHERE ad.id > ?
+                        ORDER BY ad.id
+                        LIMIT ?
+                    ''', (last_id, self.batch_size))
+                    batch = cursor.fetchall()
+                    if not batch:
+                        break
+
+                    rows = np.array(batch, dtype=np.float64)
+                    ids = rows[:, 0].astype(np.int64)
+                    question_ids = rows[:, 1].astype(np.int64)
+                    category_ids = rows[:, 2].astype(np.int64)
+                    user_ids = rows[:, 3].astype(np.int64)
+                    correct = (rows[:, 4] != 0).astype(np.float64)
+                    seconds = rows[:, 5]
+
+                    self._fold_scope(cursor, 'question', question_ids, correct, seconds, user_ids)
+                    self._fold_scope(cursor, 'category', category_ids, correct, seconds, user_ids)
+                    self._fold_scope(cursor, 'user', user_ids, correct, seconds, question_ids)
+
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO analytics_state (job, last_answer_id, updated_at)
+                        VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ''', (self.JOB_NAME, int(ids[-1])))
+                    conn.commit()
+
+                processed += len(batch)
+                if len(batch) < self.batch_size:
+                    break
+        return processed
+
+    def rebuild(self) -> int:
+        """Повний перерахунок з нуля (після видалення відповідей; архіви не враховуються)"""
+        with self._lock:
+            with self.db_manager.get_connection() as conn:
+                conn.execute("DELETE FROM analytics_aggregates")
+                conn.execute("DELETE FROM analytics_state WHERE job = ?", (self.JOB_NAME,))
+                conn.commit()
+        return self.update()
+
+    def get_summary(self, scope: str, keys: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Накопичені показники розрізу (усі ключі або вказані)"""
+        if scope not in SCOPES:
+            raise ValueError(f"Невідомий розріз аналітики: {scope}")
+
+        query = '''
+            SELECT key, responses, correct, time_sum, time_sq_sum, distinct_count
+            FROM analytics_aggregates
+            WHERE scope = ?
+        '''
+        params: List = [scope]
+        if keys is not None:
+            keys = list(keys)
+            query += f" AND key IN ({','.join('?' * len(keys))})"
+            params += keys
+
+        with self.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query + " ORDER BY key", params)
+            rows = cursor.fetchall()
+
+        summary = []
+        for key, responses, correct, time_sum, time_sq_sum, distinct_count in rows:
+            stats = RunningStats(responses, correct, time_sum, time_sq_sum)
+            summary.append({
+                'id': key,
+                'responses': stats.count,
+                'accuracy': round(stats.accuracy * 100, 2),
+                'avg_time': round(stats.mean_time, 1),
+                'std_time': round(stats.std_time, 1),
+                f'distinct_{SCOPES[scope]}': distinct_count
+            })
+        return summary
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                processed = self.update()
+                if processed:
+                    logger.info(f"Аналітика: оброблено нових відповідей {processed}")
+            except sqlite3.Error as e:
+                logger.error(f"Помилка інкрементної аналітики: {e}")
+
+    def start(self):
+        """Запуск періодичного оновлення у фоновому потоці"""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='incremental-analytics',
+                                            daemon=True)
+            self._worker.start()
+
+    def close(self):
+        """Зупинка фонового потоку"""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+
+def main():
+    """Оновлення накопиченої аналітики з командного рядка"""
+    parser = argparse.ArgumentParser(description="Інкрементна аналітика відповідей")
+    parser.add_argument('--db', default=config.DATABASE_CONFIG['sqlite']['db_name'])
+    parser.add_argument('--rebuild', action='store_true',
+                        help="перерахувати все з нуля")
+    args = parser.parse_args()
+
+    analytics = IncrementalAnalytics(DatabaseManager(args.db))
+    processed = analytics.rebuild() if args.rebuild else analytics.update()
+    print(f"Оброблено нових відповідей: {processed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Аналіз якості питань: індекс складності, дискримінація, час та дистрактори
+"""
+
+import argparse
+import json
+import sqlite3
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from config import config
+from replica import read_database
+
+
+class ItemAnalytics:
+    """Пакетний розрахунок показників питань за всією таблицею answer_details
+
+    Для кожного питання обчислюються:
+    - p_value: частка правильних відповідей (індекс складності);
+    - discrimination: точково-бісеріальна кореляція правильності з результатом
+      решти тесту (без самого питання);
+    - avg_time: середній час відповіді;
+    - distractors: частоти вибору неправильних варіантів (множинний вибір).
+    """
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+
+    def load_answers(self, conn: sqlite3.Connection) -> pd.DataFrame:
+        """Усі відповіді разом з результатом тесту, до якого вони належать"""
+        return pd.read_sql_query('''
+            SELECT ad.question_id, ad.user_answer, ad.is_correct, ad.time_spent,
+                   tr.total_questions, tr.correct_answers, q.question_type
+            FROM answer_details ad
+            JOIN test_results tr ON ad.test_result_id = tr.id
+            JOIN questions q ON ad.question_id = q.id
+            WHERE ad.is_correct IS NOT NULL
+        ''', conn)
+
+    def compute(self, answers: pd.DataFrame) -> pd.DataFrame:
+        """Показники питань векторними групуваннями"""
+        if answers.empty:
+            return pd.DataFrame(columns=['question_id', 'responses', 'p_value',
+                                         'discrimination', 'avg_time', 'distractors'])
+
+        x = answers['is_correct'].astype(float)
+        # Результат решти тесту, щоб питання не корелювало саме з собою
+        rest_total = (answers['total_questions'] - 1).clip(lower=1)
+        y = (answers['correct_answers'] - x).clip(lower=0) / rest_total
+
+        frame = pd.DataFrame({'question_id': answers['question_id'], 'x': x, 'y': y,
+                              'xy': x * y, 'yy': y * y,
+                              'time': answers['time_spent'].astype(float)})
+        grouped = frame.groupby('question_id').agg(
+            responses=('x', 'size'), p_value=('x', 'mean'), mean_y=('y', 'mean'),
+            mean_xy=('xy', 'mean'), mean_yy=('yy', 'mean'), avg_time=('time', 'mean'))
+
+        # Для бінарного x: E[x^2] = E[x], тож дисперсія p(1 - p)
+        covariance = grouped['mean_xy'] - grouped['p_value'] * grouped['mean_y']
+        deviation = np.sqrt(grouped['p_value'] * (1 - grouped['p_value'])
+                            * (grouped['mean_yy'] - grouped['mean_y'] ** 2).clip(lower=0))
+        grouped['discrimination'] = (covariance / deviation.where(deviation > 0)).round(3)
+
+        grouped['distractors'] = self.compute_distractors(answers)
+        grouped['p_value'] = grouped['p_value'].round(3)
+        grouped['avg_time'] = grouped['avg_time'].round(1)
+
+        return grouped.reset_index()[['question_id', 'responses', 'p_value',
+                                      'discrimination', 'avg_time', 'distractors']]
+
+    @staticmethod
+    def compute_distractors(answers: pd.DataFrame) -> pd.Series:
+        """Частки вибору кожного неправильного варіанту (JSON) для множинного вибору"""
+        choice = answers[answers['question_type'] == 'multiple_choice']
+        wrong = choice[choice['is_correct'] == 0]
+        if wrong.empty:
+            return pd.Series(dtype=object)
+
+        counts = wrong.groupby(['question_id', 'user_answer']).size()
+        totals = choice.groupby('question_id').size()
+        shares = (counts / totals.reindex(counts.index.get_level_values(0)).values).round(3)
+
+        result: Dict[int, str] = {}
+        for question_id, group in shares.groupby(level=0):
+            result[question_id] = json.dumps(
+                dict(zip(group.index.get_level_values(1), group.values.tolist())),
+                ensure_ascii=False)
+        return pd.Series(result, dtype=object)
+
+    def save(self, conn: sqlite3.Connection, stats: pd.DataFrame):
+        """Заміна вмісту question_stats новими показниками"""
+        rows = [(int(row.question_id), int(row.responses), float(row.p_value),
+                 None if pd.isna(row.discrimination) else float(row.discrimination),
+                 float(row.avg_time),
+                 None if not isinstance(row.distractors, str) else row.distractors)
+                for row in stats.itertuples(index=False)]
+
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM question_stats")
+        cursor.executemany('''
+            INSERT INTO question_stats (question_id, responses, p_value, discrimination,
+                                        avg_time, distractors)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+
+    def run(self) -> int:
+        """Розрахунок і збереження показників; повертає кількість питань"""
+        # Відповіді читаємо зі знімка, якщо він досить свіжий
+        read_conn = sqlite3.connect(read_database(self.db_name))
+        try:
+            answers = self.load_answers(read_conn)
+        finally:
+            read_conn.close()
+
+        conn = sqlite3.connect(self.db_name)
+        try:
+            stats = self.compute(answers)
+            self.save(conn, stats)
+            return len(stats)
+        finally:
+            conn.close()
+
+
+def main():
+    """Запуск розрахунку з командного рядка"""
+    parser = argparse.ArgumentParser(description="Аналіз якості питань")
+    parser.add_argument('--db', default=config.DATABASE_CONFIG['sqlite']['db_name'])
+    args = parser.parse_args()
+
+    count = ItemAnalytics(args.db).run()
+    print(f"Оновлено показники {count} питань")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Рейтинги користувачів: загальний, по категоріях, за тиждень і за місяць
+"""
+
+import datetime
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+from repositories import LeaderboardRepository
+
+
+# Види рейтингів: за весь час, у категорії, з початку тижня чи місяця
+BOARD_KINDS = ('all_time', 'category', 'week', 'month')
+
+
+class Leaderboard:
+    """Відсортований рейтинг: список ключів (-бали, user_id) та бали користувачів
+
+    Місце і вікно лідерів знаходяться двійковим пошуком. Оновлення бала -
+    пошук старого ключа і вставка нового (bisect), без пересортування.
+    Вставка й видалення зсувають хвіст списку, тож оновлення коштує O(n)
+    (memmove): для десятків тисяч учасників це мікросекунди, що дешевше за
+    дерево на Python; пошук місця - O(log n).
+    Користувачі з однаковими балами ділять місце.
+    """
+
+    def __init__(self, points: Optional[Dict[int, int]] = None, last_result_id: int = 0):
+        self.points: Dict[int, int] = dict(points or {})
+        self._keys: List[Tuple[int, int]] = sorted(
+            (-score, user_id) for user_id, score in self.points.items())
+        # Результати з меншим або рівним id уже враховано
+        self.last_result_id = last_result_id
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, user_id: int, points: int):
+        """Додавання балів користувачу"""
+        old = self.points.get(user_id)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, user_id))]
+        new = (old or 0) + points
+        self.points[user_id] = new
+        insort(self._keys, (-new, user_id))
+
+    def remove(self, user_id: int):
+        """Вилучення користувача з рейтингу"""
+        old = self.points.pop(user_id, None)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, user_id))]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Місце користувача (1 - перше) або None, якщо його немає в рейтингу"""
+        score = self.points.get(user_id)
+        if score is None:
+            return None
+        # Кількість користувачів зі строго більшими балами
+        return bisect_left(self._keys, (-score,)) + 1
+
+    def top(self, limit: int) -> List[Tuple[int, int, int]]:
+        """Лідери: (місце, user_id, бали)"""
+        result = []
+        for key in self._keys[:limit]:
+            score, user_id = -key[0], key[1]
+            result.append((bisect_left(self._keys, (-score,)) + 1, user_id, score))
+        return result
+
+
+def period_start(kind: str, now: Optional[datetime.datetime] = None) -> str:
+    """Початок поточного тижня чи місяця у форматі test_date (UTC)"""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    if kind == 'week':
+        start = now - datetime.timedelta(days=now.weekday())
+    else:
+        start = now.replace(day=1)
+    return start.strftime('%Y-%m-%d 00:00:00')
+
+
+class LeaderboardService:
+    """Рейтинги в пам'яті, що будуються з історії при першому зверненні
+
+    Після побудови рейтинги лише доповнюються результатами, які записує
+    finish_session; результат з id, уже врахованим при побудові, пропускається.
+    Щоб підхопити результати інших процесів (сервер і GUI працюють з однією
+    базою), рейтинг перебудовується не рідше ніж раз на rebuild_seconds.
+
+    Запит до бази виконується поза спільним блокуванням, тож record_result і
+    get_rank не чекають на перебудову: результати, що надійшли під час неї,
+    запам'ятовуються і доповнюють новий рейтинг перед заміною старого.
+    Рейтинги за тиждень і місяць не читають result_rollups: архівуються лише
+    результати, старші за ResultArchiver.MIN_HORIZON_DAYS, тобто за межами
+    будь-якого поточного тижня чи місяця.
+    """
+
+    def __init__(self, backend, rebuild_seconds: Optional[float] = None):
+        self.repository = LeaderboardRepository(backend)
+        self.rebuild_seconds = rebuild_seconds or config.LEADERBOARD_CONFIG['rebuild_seconds']
+        # (вид, категорія, початок періоду) -> (рейтинг, час побудови)
+        self._boards: Dict[Tuple, Tuple[Leaderboard, float]] = {}
+        # Рейтинги, що перебудовуються: зміни, які треба застосувати після побудови
+        self._pending: Dict[Tuple, List[Tuple[Optional[int], int, int]]] = {}
+        self._build_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _board_key(kind: str, category_id: Optional[int] = None) -> Tuple:
+        if kind not in BOARD_KINDS:
+            raise ValueError(f"Невідомий рейтинг: {kind}")
+        if kind == 'category':
+            return kind, category_id, None
+        if kind in ('week', 'month'):
+            return kind, None, period_start(kind)
+        return kind, None, None
+
+    @staticmethod
+    def _accepts(key: Tuple, category_id: int) -> bool:
+        """Чи належить новий результат категорії до рейтингу з ключем key"""
+        kind, board_category, since = key
+        if kind == 'category' and board_category != category_id:
+            return False
+        # Рейтинг минулого періоду: результат належить вже новому
+        return since is None or since == period_start(kind)
+
+    def _fresh(self, key: Tuple) -> Optional[Leaderboard]:
+        entry = self._boards.get(key)
+        if entry and time.monotonic() - entry[1] < self.rebuild_seconds:
+            return entry[0]
+        return None
+
+    def get_board(self, kind: str, category_id: Optional[int] = None) -> Leaderboard:
+        """Рейтинг (будується з бази, якщо його ще немає або він застарів)
+
+        Поки інший потік перебудовує застарілий рейтинг, повертається старий.
+        """
+        key = self._board_key(kind, category_id)
+        with self._lock:
+            board = self._fresh(key)
+            if board:
+                return board
+            entry = self._boards.get(key)
+            if entry and key in self._pending:
+                return entry[0]
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                # Рейтинг міг побудувати потік, на якого ми чекали
+                board = self._fresh(key)
+                if board:
+                    return board
+                pending = self._pending[key] = []
+            try:
+                last_result_id = self.repository.get_last_result_id()
+                points = self.repository.get_points(last_result_id, category_id, key[2])
+            finally:
+                with self._lock:
+                    del self._pending[key]
+            board = Leaderboard(points, last_result_id)
+
+            with self._lock:
+                for result_id, user_id, result_points in pending:
+                    if result_id is None:
+                        board.remove(user_id)
+                    elif result_id > last_result_id:
+                        board.add(user_id, result_points)
+                if kind in ('week', 'month'):
+                    # Рейтинги минулих періодів більше не потрібні
+                    for old_key in [k for k in self._boards if k[0] == kind and k != key]:
+                        del self._boards[old_key]
+                self._boards[key] = (board, time.monotonic())
+                return board
+
+    def record_result(self, result_id: int, user_id: int, category_id: int, points: int):
+        """Врахування нового результату в уже побудованих рейтингах"""
+        with self._lock:
+            for key, pending in self._pending.items():
+                if self._accepts(key, category_id):
+                    pending.append((result_id, user_id, points))
+            for key, (board, _) in self._boards.items():
+                if result_id > board.last_result_id and self._accepts(key, category_id):
+                    board.add(user_id, points)
+
+    def remove_user(self, user_id: int):
+        """Вилучення видаленого користувача з усіх рейтингів"""
+        with self._lock:
+            for pending in self._pending.values():
+                pending.append((None, user_id, 0))
+            for board, _ in self._boards.values():
+                board.remove(user_id)
+
+    def get_top(self, kind: str, category_id: Optional[int] = None,
+                limit: Optional[int] = None) -> List[Tuple[int, str, int]]:
+        """Лідери рейтингу: (місце, ім'я користувача, бали)"""
+        board = self.get_board(kind, category_id)
+        with self._lock:
+            top = board.top(limit or config.LEADERBOARD_CONFIG['top_size'])
+        names = self.repository.get_usernames([user_id for _, user_id, _ in top])
+        return [(rank, names.get(user_id, str(user_id)), score) for rank, user_id, score in top]
+
+    def get_rank(self, user_id: int, kind: str,
+                 category_id: Optional[int] = None) -> Optional[Tuple[int, int, int]]:
+        """(місце, бали, учасників) користувача або None, якщо він ще без балів"""
+        board = self.get_board(kind, category_id)
+        with self._lock:
+            rank = board.rank(user_id)
+            if rank is None:
+                return None
+            return rank, board.points[user_id], len(board)
+
+
+_services: Dict[str, LeaderboardService] = {}
+_registry_lock = threading.Lock()
+
+
+def get_leaderboards(db_name: str, backend) -> LeaderboardService:
+    """Спільні рейтинги для бази"""
+    with _registry_lock:
+        if db_name not in _services:
+            _services[db_name] = LeaderboardService(backend)
+        return _services[db_name]
+
+
+def get_loaded_leaderboards(db_name: str) -> Optional[LeaderboardService]:
+    """Рейтинги бази, якщо вони вже створені в цьому процесі"""
+    return _services.get(db_name)
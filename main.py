@@ -1,19 +1,119 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import sqlite3
-import hashlib
 import datetime
 import json
 import random
+import threading
+import time
+from array import array
+from concurrent.futures import Future
+from contextlib import contextmanager
 from typing import Dict, List, Tuple, Optional
 
+from config import config
+from db_pool import SQLiteConnectionPool
+from grading import CompiledGrader
+from leaderboard import get_leaderboards
+from replica import read_database
+from repositories import (DATABASE_ERRORS, QuestionRepository, Repositories,
+                          ResultRepository, UserRepository, check_query_plans,
+                          create_backend)
+from security import (CachedCredentials, get_credential_cache, get_lockout_tracker,
+                      get_password_hasher, hash_password, submit_hash_task)
+from seed_data import builtin_seed_pack, load_seed_pack
+from session_journal import SessionJournal
+from spaced_repetition import ReviewScheduler, init_review_schema
+from user_stats import get_user_stats_store
+
+
+# Токенізатор пошуку: апострофи входять до слова ("м'ясо", "комп’ютер")
+SEARCH_TOKENIZER = "unicode61 remove_diacritics 2 tokenchars '''ʼ’'"
+
 
 class DatabaseManager:
     """Клас для управління базою даних"""
 
-    def __init__(self, db_name: str = "informatics_trainer.db"):
+    # Діалект запитів для шару репозиторіїв
+    dialect = 'sqlite'
+
+    def __init__(self, db_name: str = "informatics_trainer.db", pool_size: int = 0):
         self.db_name = db_name
+        sqlite_config = config.DATABASE_CONFIG['sqlite']
+        self.cached_statements = sqlite_config['cached_statements']
+        # Пул використовується у серверному режимі, GUI працює без нього
+        self.pool = SQLiteConnectionPool(
+            db_name, pool_size, cached_statements=self.cached_statements
+        ) if pool_size > 0 else None
+        # Без пулу - одне довгоживуче з'єднання, щоб кеш підготовлених запитів не губився
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_lock = threading.RLock()
+        self._connection_depth = 0
         self.init_database()
+        if sqlite_config['check_query_plans']:
+            self.check_query_plans()
+
+    @contextmanager
+    def get_connection(self):
+        """Отримання з'єднання з бази (з пулу, якщо він налаштований)"""
+        if self.pool:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+
+        with self._connection_lock:
+            if self._connection is None:
+                self._connection = sqlite3.connect(
+                    self.db_name, check_same_thread=False,
+                    cached_statements=self.cached_statements)
+            conn = self._connection
+            # Вкладені виклики працюють в одній транзакції, фіксує зовнішній
+            self._connection_depth += 1
+            try:
+                yield conn
+                if self._connection_depth == 1:
+                    conn.commit()
+            except Exception:
+                if self._connection_depth == 1:
+                    conn.rollback()
+                raise
+            finally:
+                self._connection_depth -= 1
+
+    def check_query_plans(self):
+        """Попередження про запити реєстру, що переглядають таблицю повністю"""
+        try:
+            with self.get_connection() as conn:
+                warnings = check_query_plans(conn)
+        except sqlite3.Error as e:
+            print(f"Не вдалося перевірити плани запитів: {e}")
+            return
+        for warning in warnings:
+            print(f"Увага: повний перегляд таблиці у запиті {warning}")
+
+    def close_connection(self):
+        """Закриття з'єднань з базою даних"""
+        with self._connection_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+        if self.pool:
+            self.pool.close_all()
+
+    @contextmanager
+    def get_read_connection(self):
+        """З'єднання для аналітичного читання: знімок-репліка, якщо він досить свіжий"""
+        read_name = read_database(self.db_name)
+        if read_name == self.db_name:
+            with self.get_connection() as conn:
+                yield conn
+            return
+
+        conn = sqlite3.connect(read_name)
+        try:
+            yield conn
+        finally:
+            conn.close()
 
     def init_database(self):
         """Ініціалізація бази даних та створення таблиць"""
@@ -85,12 +185,196 @@ class DatabaseManager:
             )
         ''')
 
+        # Індекс для вибору питань категорії
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_questions_category ON questions (category_id)")
+        # Статистика та історія користувача без перегляду всіх результатів
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_test_results_user ON test_results (user_id, test_date)")
+        # Відповіді результату: архівація, видалення та перегляд деталей тесту
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answer_details_result ON answer_details (test_result_id)")
+
+        # Підсумки заархівованих результатів (див. archive.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS result_rollups (
+                user_id INTEGER NOT NULL,
+                category_id INTEGER NOT NULL,
+                tests INTEGER NOT NULL,
+                total_questions INTEGER NOT NULL,
+                correct_answers INTEGER NOT NULL,
+                time_spent INTEGER NOT NULL,
+                percentage_sum REAL NOT NULL,
+                PRIMARY KEY (user_id, category_id)
+            ) WITHOUT ROWID
+        ''')
+
+        # Зведена статистика користувачів (див. user_stats.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_stats (
+                user_id INTEGER PRIMARY KEY,
+                tests INTEGER NOT NULL,
+                total_questions INTEGER NOT NULL,
+                correct_answers INTEGER NOT NULL,
+                time_spent INTEGER NOT NULL,
+                percentage_sum REAL NOT NULL,
+                categories TEXT NOT NULL, -- JSON: category_id -> [тестів, сума відсотків]
+                recent TEXT NOT NULL, -- JSON: останні тести, від старших до новіших
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+
+        # Класи (групи) учнів та їх склад (див. class_groups.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS class_groups (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                description TEXT,
+                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS class_members (
+                group_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                PRIMARY KEY (group_id, user_id),
+                FOREIGN KEY (group_id) REFERENCES class_groups (id),
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_class_members_user ON class_members (user_id)")
+
+        # Таблиця сесій користувачів (серверний режим)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                session_token TEXT UNIQUE NOT NULL,
+                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_date TIMESTAMP,
+                last_seen TIMESTAMP,
+                is_active BOOLEAN DEFAULT TRUE,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        # Відбір дійсних і видалення прострочених сесій
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_user_sessions_expires ON user_sessions (expires_date)")
+
+        # Параметри питань моделі IRT (калібруються пакетно, див. adaptive_testing.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS question_irt_params (
+                question_id INTEGER PRIMARY KEY,
+                difficulty REAL NOT NULL,
+                discrimination REAL NOT NULL,
+                responses INTEGER DEFAULT 0,
+                calibrated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (question_id) REFERENCES questions (id)
+            )
+        ''')
+
+        # Показники якості питань (розраховуються пакетно, див. item_analytics.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS question_stats (
+                question_id INTEGER PRIMARY KEY,
+                responses INTEGER NOT NULL,
+                p_value REAL,
+                discrimination REAL,
+                avg_time REAL,
+                distractors TEXT,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (question_id) REFERENCES questions (id)
+            )
+        ''')
+
+        # Накопичувальна аналітика відповідей (див. incremental_analytics.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analytics_state (
+                job TEXT PRIMARY KEY,
+                last_answer_id INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analytics_aggregates (
+                scope TEXT NOT NULL,
+                key INTEGER NOT NULL,
+                responses INTEGER NOT NULL,
+                correct INTEGER NOT NULL,
+                time_sum REAL NOT NULL,
+                time_sq_sum REAL NOT NULL,
+                sketch BLOB,
+                distinct_count INTEGER,
+                PRIMARY KEY (scope, key)
+            ) WITHOUT ROWID
+        ''')
+
+        # Стан інтервального повторення питань
+        init_review_schema(cursor)
+
+        self.init_search_index(cursor)
+
         conn.commit()
         conn.close()
 
         # Додаємо початкові дані
         self.populate_initial_data()
 
+    def init_search_index(self, cursor: sqlite3.Cursor):
+        """Повнотекстовий індекс питань (FTS5), синхронізований тригерами"""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'questions_fts'")
+        exists = cursor.fetchone() is not None
+
+        try:
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+                    question_text, explanation, options,
+                    content='questions', content_rowid='id',
+                    tokenize="{SEARCH_TOKENIZER}",
+                    prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite зібрано без FTS5 - пошук працюватиме через LIKE
+            return
+
+        cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions BEGIN
+                INSERT INTO questions_fts (rowid, question_text, explanation, options)
+                VALUES (new.id, new.question_text, new.explanation, new.options);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN
+                INSERT INTO questions_fts (questions_fts, rowid, question_text, explanation, options)
+                VALUES ('delete', old.id, old.question_text, old.explanation, old.options);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS questions_fts_update AFTER UPDATE ON questions BEGIN
+                INSERT INTO questions_fts (questions_fts, rowid, question_text, explanation, options)
+                VALUES ('delete', old.id, old.question_text, old.explanation, old.options);
+                INSERT INTO questions_fts (rowid, question_text, explanation, options)
+                VALUES (new.id, new.question_text, new.explanation, new.options);
+            END;
+        ''')
+
+        if not exists:
+            # Індексуємо питання, додані до появи індексу
+            cursor.execute("INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')")
+
+        # Варіанти, записані з екрануванням \uXXXX, не знаходилися пошуком:
+        # переписуємо їх у UTF-8 (тригер оновлення переіндексує питання)
+        cursor.execute("SELECT id, options FROM questions WHERE options LIKE '%\\u%'")
+        for question_id, options in cursor.fetchall():
+            try:
+                decoded = json.dumps(json.loads(options), ensure_ascii=False)
+            except ValueError:
+                continue
+            if decoded != options:
+                cursor.execute("UPDATE questions SET options = ? WHERE id = ?",
+                               (decoded, question_id))
+
     def populate_initial_data(self):
         """Додавання початкових даних до бази"""
         conn = sqlite3.connect(self.db_name)
@@ -99,76 +383,11 @@ class DatabaseManager:
         # Перевіряємо чи є дані
         cursor.execute("SELECT COUNT(*) FROM categories")
         if cursor.fetchone()[0] == 0:
-            # Додаємо категорії
-            categories = [
-                ("Основи програмування", "Базові концепції програмування"),
-                ("Алгоритми та структури даних",
-                 "Алгоритми сортування, пошуку, структури даних"),
-                ("Бази даних", "SQL, реляційні бази даних"),
-                ("Мережі та Інтернет", "Протоколи, архітектура мереж"),
-                ("Операційні системи", "Принципи роботи ОС"),
-                ("Інформаційна безпека", "Криптографія, захист інформації")
-            ]
-
-            cursor.executemany(
-                "INSERT INTO categories (name, description) VALUES (?, ?)", categories)
-
-            # Додаємо питання
-            questions = [
-                # Основи програмування
-                (1, "Що таке змінна в програмуванні?", "multiple_choice", "Іменована область пам'яті для зберігання даних",
-                 '["Іменована область пам\'яті для зберігання даних", "Функція для обчислень", "Цикл виконання", "Умовний оператор"]', 1,
-                 "Змінна - це іменована область пам'яті, яка використовується для зберігання даних"),
-
-                (1, "Python є інтерпретованою мовою програмування", "true_false", "True", None, 1,
-                 "Python дійсно є інтерпретованою мовою програмування"),
-
-                (1, "Який оператор використовується для присвоєння в Python?", "text_input", "=", None, 1,
-                 "Оператор = використовується для присвоєння значень змінним"),
-
-                # Алгоритми
-                (2, "Яка складність алгоритму бульбашкового сортування?", "multiple_choice", "O(n²)",
-                 '["O(n)", "O(n²)", "O(log n)", "O(n log n)"]', 2,
-                 "Бульбашкове сортування має квадратичну складність O(n²)"),
-
-                (2, "Стек працює за принципом LIFO", "true_false", "True", None, 2,
-                 "LIFO (Last In, First Out) - останній прийшов, перший пішов"),
-
-                # Бази даних
-                (3, "Що означає SQL?", "text_input", "Structured Query Language", None, 1,
-                 "SQL - Structured Query Language, мова структурованих запитів"),
-
-                (3, "Який оператор використовується для вибірки даних?", "multiple_choice", "SELECT",
-                 '["INSERT", "SELECT", "UPDATE", "DELETE"]', 1,
-                 "SELECT використовується для вибірки даних з таблиць"),
-
-                # Мережі
-                (4, "HTTP працює на якому рівні моделі OSI?", "multiple_choice", "Прикладному",
-                 '["Фізичному", "Канальному", "Мережевому", "Прикладному"]', 2,
-                 "HTTP працює на прикладному (7-му) рівні моделі OSI"),
-
-                (4, "IP-адреса складається з 4 октетів", "true_false", "True", None, 1,
-                 "IPv4 адреса дійсно складається з 4 октетів по 8 біт кожен"),
-
-                # Операційні системи
-                (5, "Що таке процес в ОС?", "multiple_choice", "Програма в стані виконання",
-                 '["Файл на диску", "Програма в стані виконання", "Системний виклик", "Драйвер пристрою"]', 2,
-                 "Процес - це програма, яка завантажена в пам'ять і виконується"),
-
-                # Інформаційна безпека
-                (6, "Що таке хешування?", "multiple_choice", "Перетворення даних у фіксований розмір",
-                 '["Шифрування даних", "Перетворення даних у фіксований розмір", "Стиснення файлів", "Резервне копіювання"]', 2,
-                 "Хешування - це перетворення вхідних даних у рядок фіксованого розміру")
-            ]
-
-            for q in questions:
-                cursor.execute('''
-                    INSERT INTO questions (category_id, question_text, question_type, correct_answer, options, difficulty, explanation)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', q)
+            # Категорії та питання - спільний з MySQL вбудований набір
+            load_seed_pack(cursor, builtin_seed_pack())
 
             # Створюємо адміністратора
-            admin_password = hashlib.sha256("admin123".encode()).hexdigest()
+            admin_password = hash_password("admin123")
             cursor.execute('''
                 INSERT INTO users (username, password_hash, email, is_admin)
                 VALUES (?, ?, ?, ?)
@@ -178,30 +397,128 @@ class DatabaseManager:
         conn.close()
 
 
-class User:
+class FrozenSlots:
+    """Базовий клас для компактних незмінних об'єктів (без __dict__)"""
+
+    __slots__ = ()
+
+    def _set_fields(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Об'єкт {type(self).__name__} не можна змінювати")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Об'єкт {type(self).__name__} не можна змінювати")
+
+
+class User(FrozenSlots):
     """Клас для представлення користувача"""
 
+    __slots__ = ('user_id', 'username', 'email', 'is_admin')
+
     def __init__(self, user_id: int, username: str, email: str = "", is_admin: bool = False):
-        self.user_id = user_id
-        self.username = username
-        self.email = email
-        self.is_admin = is_admin
+        self._set_fields(user_id=user_id, username=username,
+                         email=email, is_admin=is_admin)
+
 
+class Question(FrozenSlots):
+    """Клас для представлення питання (один екземпляр спільний для всіх сеансів)"""
 
-class Question:
-    """Клас для представлення питання"""
+    __slots__ = ('question_id', 'category_id', 'question_text', 'question_type',
+                 'correct_answer', 'options', 'difficulty', 'explanation')
 
     def __init__(self, question_id: int, category_id: int, question_text: str,
                  question_type: str, correct_answer: str, options: List[str] = None,
                  difficulty: int = 1, explanation: str = ""):
-        self.question_id = question_id
-        self.category_id = category_id
-        self.question_text = question_text
-        self.question_type = question_type
-        self.correct_answer = correct_answer
-        self.options = options or []
-        self.difficulty = difficulty
-        self.explanation = explanation
+        self._set_fields(question_id=question_id, category_id=category_id,
+                         question_text=question_text, question_type=question_type,
+                         correct_answer=correct_answer, options=tuple(options or ()),
+                         difficulty=difficulty, explanation=explanation)
+
+
+class QuestionCache:
+    """Кеш питань: об'єкти Question спільні для всіх сеансів
+
+    Разом з питанням зберігається його скомпільований перевіряльник відповідей.
+    Сеанс отримує питання на початку тесту і тримає їх до завершення, тож
+    закінчення терміну кешу чи зміна питання не впливають на розпочаті тести.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, ttl_seconds: int = 300,
+                 fuzzy_threshold: float = 0.0):
+        self.db_manager = db_manager
+        self.repository = QuestionRepository(db_manager)
+        self.ttl_seconds = ttl_seconds
+        self.fuzzy_threshold = fuzzy_threshold
+        self._entries: Dict[int, Tuple[Question, CompiledGrader]] = {}
+        self._loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _check_expiry(self):
+        """Скидання кешу після закінчення терміну актуальності"""
+        if time.monotonic() - self._loaded_at > self.ttl_seconds:
+            self._entries = {}
+            self._loaded_at = time.monotonic()
+
+    def resolve(self, question_ids) -> Dict[int, Tuple[Question, CompiledGrader]]:
+        """Питання з перевіряльниками за ідентифікаторами (відсутні в базі не повертаються)"""
+        with self._lock:
+            self._check_expiry()
+            found = {qid: self._entries[qid] for qid in question_ids if qid in self._entries}
+        missing = [qid for qid in question_ids if qid not in found]
+
+        if missing:
+            loaded = {}
+            for q_data in self.repository.get_many(missing):
+                options = json.loads(q_data[5]) if q_data[5] else []
+                question = Question(q_data[0], q_data[1], q_data[2], q_data[3],
+                                    q_data[4], options, q_data[6], q_data[7])
+                loaded[question.question_id] = (
+                    question, CompiledGrader(question, self.fuzzy_threshold))
+            with self._lock:
+                self._entries.update(loaded)
+            found.update(loaded)
+        return found
+
+    def get_many(self, question_ids) -> List[Question]:
+        """Отримання питань за ідентифікаторами (відсутні завантажуються одним запитом)"""
+        entries = self.resolve(question_ids)
+        return [entries[qid][0] for qid in question_ids if qid in entries]
+
+    def get(self, question_id: int) -> Optional[Question]:
+        """Отримання одного питання"""
+        questions = self.get_many([question_id])
+        return questions[0] if questions else None
+
+    def invalidate(self, question_id: Optional[int] = None):
+        """Видалення питання (або всіх питань) з кешу"""
+        with self._lock:
+            if question_id is None:
+                self._entries = {}
+            else:
+                self._entries.pop(question_id, None)
+
+
+_question_caches: Dict[str, QuestionCache] = {}
+_question_caches_lock = threading.Lock()
+
+
+def get_question_cache(db_manager: DatabaseManager) -> QuestionCache:
+    """Спільний кеш питань бази"""
+    with _question_caches_lock:
+        if db_manager.db_name not in _question_caches:
+            _question_caches[db_manager.db_name] = QuestionCache(
+                db_manager, fuzzy_threshold=config.TEST_CONFIG['text_answer_fuzzy_threshold'])
+        return _question_caches[db_manager.db_name]
+
+
+def invalidate_question_cache(db_name: str, question_id: Optional[int] = None):
+    """Скидання питання в кеші цього процесу після його зміни (інші процеси - за TTL)"""
+    cache = _question_caches.get(db_name)
+    if cache is not None:
+        cache.invalidate(question_id)
 
 
 class AuthenticationManager:
@@ -209,176 +526,528 @@ class AuthenticationManager:
 
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
+        self.users = UserRepository(db_manager)
         self.current_user: Optional[User] = None
+        self.credential_cache = get_credential_cache(db_manager.db_name)
+        self.lockout_tracker = get_lockout_tracker(db_manager.db_name)
 
     def register_user(self, username: str, password: str, email: str = "") -> bool:
         """Реєстрація нового користувача"""
+        return self.users.create(username, hash_password(password), email)
+
+    def _load_credentials(self, username: str, refresh: bool = False) -> Optional[CachedCredentials]:
+        """Облікові дані з кешу або (при промаху чи refresh) з бази"""
+        if not refresh:
+            credentials = self.credential_cache.get(username)
+            if credentials is not None:
+                return credentials
+
+        result = self.users.get_credentials(username)
+        if not result:
+            self.credential_cache.invalidate(username)
+            return None
+
+        credentials = CachedCredentials(result[0], result[1], result[2] or "",
+                                        result[3], bool(result[4]))
+        self.credential_cache.put(credentials)
+        return credentials
+
+    def preload_credentials(self, limit: int = 1000):
+        """Попереднє завантаження облікових даних одним запитом (перед заняттям)"""
+        for row in self.users.get_recent_credentials(limit):
+            self.credential_cache.put(CachedCredentials(
+                row[0], row[1], row[2] or "", row[3], bool(row[4])))
+
+    def get_lockout_remaining(self, username: str) -> int:
+        """Скільки секунд користувач ще заблокований після невдалих спроб"""
+        return self.lockout_tracker.get_remaining_lockout(username)
+
+    def authenticate(self, username: str, password: str) -> Optional[User]:
+        """Перевірка облікових даних без зміни поточного користувача"""
+        if self.lockout_tracker.get_remaining_lockout(username):
+            return None
+
+        cached = self.credential_cache.get(username)
+        credentials = cached or self._load_credentials(username, refresh=True)
+        hasher = get_password_hasher()
+        verified = credentials is not None and hasher.verify(password, credentials.password_hash)
+        if cached is not None and not verified:
+            # Пароль могли змінити в іншому процесі: одна перевірка за даними з бази
+            credentials = self._load_credentials(username, refresh=True)
+            if credentials is not None and credentials.password_hash != cached.password_hash:
+                verified = hasher.verify(password, credentials.password_hash)
+
+        if verified:
+            self.lockout_tracker.register_success(username)
+            if hasher.needs_rehash(credentials.password_hash):
+                # Старий хеш оновлюється у фоні, вхід не чекає на це
+                submit_hash_task(self._rehash_password, credentials, password)
+            return User(credentials.user_id, credentials.username,
+                        credentials.email, credentials.is_admin)
+
+        self.lockout_tracker.register_failure(username)
+        return None
+
+    def _rehash_password(self, credentials: CachedCredentials, password: str):
+        """Заміна застарілого хешу паролю після успішного входу"""
+        password_hash = hash_password(password)
         try:
-            conn = sqlite3.connect(self.db_manager.db_name)
-            cursor = conn.cursor()
+            updated = self.users.replace_password(
+                credentials.user_id, credentials.password_hash, password_hash)
+        except DATABASE_ERRORS:
+            # Хеш буде оновлено при наступному вході
+            return
 
-            password_hash = hashlib.sha256(password.encode()).hexdigest()
-            cursor.execute('''
-                INSERT INTO users (username, password_hash, email)
-                VALUES (?, ?, ?)
-            ''', (username, password_hash, email))
+        if updated:
+            self.credential_cache.put(credentials._replace(password_hash=password_hash))
 
-            conn.commit()
-            conn.close()
-            return True
-        except sqlite3.IntegrityError:
-            return False
+    def authenticate_async(self, username: str, password: str) -> Future:
+        """Перевірка облікових даних у пулі потоків хешування"""
+        return submit_hash_task(self.authenticate, username, password)
+
+    def register_user_async(self, username: str, password: str, email: str = "") -> Future:
+        """Реєстрація у пулі потоків хешування"""
+        return submit_hash_task(self.register_user, username, password, email)
 
     def login_user(self, username: str, password: str) -> bool:
         """Авторизація користувача"""
-        conn = sqlite3.connect(self.db_manager.db_name)
-        cursor = conn.cursor()
+        user = self.authenticate(username, password)
+        if user:
+            self.current_user = user
+            return True
+        return False
 
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        cursor.execute('''
-            SELECT id, username, email, is_admin
-            FROM users
-            WHERE username = ? AND password_hash = ?
-        ''', (username, password_hash))
+    def change_password(self, old_password: str, new_password: str) -> bool:
+        """Зміна паролю поточного користувача"""
+        if not self.current_user:
+            return False
+        if not self.authenticate(self.current_user.username, old_password):
+            return False
 
-        result = cursor.fetchone()
-        conn.close()
+        self.users.set_password(self.current_user.user_id, hash_password(new_password))
 
-        if result:
-            self.current_user = User(
-                result[0], result[1], result[2], bool(result[3]))
-            return True
-        return False
+        self.credential_cache.invalidate(self.current_user.username)
+        return True
+
+    def change_password_async(self, old_password: str, new_password: str) -> Future:
+        """Зміна паролю у пулі потоків хешування"""
+        return submit_hash_task(self.change_password, old_password, new_password)
 
     def logout_user(self):
         """Вихід користувача"""
         self.current_user = None
 
 
+class TestSession:
+    """Компактний стан одного сеансу тестування (окремий для кожного студента)
+
+    Зберігаються ідентифікатори питань, індекси відповідей та час у масивах і
+    посилання на спільні об'єкти питань та перевіряльників з кешу.
+    Для множинного вибору індекс вказує на варіант, для правда/неправда 1/0,
+    текстові відповіді зберігаються окремо.
+    """
+
+    __slots__ = ('category_id', 'question_ids', 'questions', 'graders', 'answer_indexes',
+                 'answer_times', 'text_answers', 'start_time', 'question_start_time')
+
+    TEXT_ANSWER = -1
+
+    def __init__(self, category_id: int, entries=()):
+        self.category_id = category_id
+        self.question_ids = array('l')
+        self.questions: List[Question] = []
+        self.graders: List[CompiledGrader] = []
+        for question, grader in entries:
+            self.add_question(question, grader)
+        self.answer_indexes = array('b')
+        self.answer_times = array('H')  # секунди на кожне питання
+        self.text_answers: Optional[Dict[int, str]] = None
+        self.start_time = time.time()
+        self.question_start_time = self.start_time
+
+    @property
+    def current_index(self) -> int:
+        return len(self.answer_indexes)
+
+    @property
+    def question_count(self) -> int:
+        return len(self.question_ids)
+
+    def is_finished(self) -> bool:
+        """Чи отримали відповідь всі питання"""
+        return self.current_index >= len(self.question_ids)
+
+    def add_question(self, question: Question, grader: CompiledGrader):
+        self.question_ids.append(question.question_id)
+        self.questions.append(question)
+        self.graders.append(grader)
+
+    def truncate(self, count: int):
+        """Залишення лише перших count питань"""
+        del self.question_ids[count:]
+        del self.questions[count:]
+        del self.graders[count:]
+
+    def answers(self) -> List[Tuple[int, int, Optional[str]]]:
+        """Подані відповіді: (індекс, секунди, текст)"""
+        text_answers = self.text_answers or {}
+        return [(answer_index, self.answer_times[i], text_answers.get(i))
+                for i, answer_index in enumerate(self.answer_indexes)]
+
+    def last_answer(self) -> Tuple[int, int, int, Optional[str]]:
+        """Остання подана відповідь: (номер, індекс, секунди, текст)"""
+        index = self.current_index - 1
+        answer_index = self.answer_indexes[index]
+        text = self.text_answers[index] if answer_index == self.TEXT_ANSWER else None
+        return index, answer_index, self.answer_times[index], text
+
+
+class TestEngine:
+    """Рушій тестування без власного стану: весь стан передається у TestSession"""
+
+    def __init__(self, db_manager: DatabaseManager, question_cache: Optional[QuestionCache] = None):
+        self.db_manager = db_manager
+        self.question_cache = question_cache or get_question_cache(db_manager)
+        self.questions = QuestionRepository(db_manager)
+        self.results = ResultRepository(db_manager)
+        self.user_stats = get_user_stats_store(db_manager.db_name, db_manager)
+        self.leaderboards = get_leaderboards(db_manager.db_name, db_manager)
+        self.review_scheduler = ReviewScheduler()
+        # Повторення та адаптивний режим зберігають стан у таблицях лише схеми SQLite
+        self.local_features = db_manager.dialect == 'sqlite'
+
+    def get_categories(self) -> List[Tuple[int, str, str]]:
+        """Отримання списку категорій"""
+        return self.questions.get_categories()
+
+    def select_question_ids(self, category_id: int, num_questions: int) -> List[int]:
+        """Вибір випадкових питань категорії"""
+        return self.questions.get_random_ids(category_id, num_questions)
+
+    def resolve_entries(self, question_ids) -> List[Tuple[Question, CompiledGrader]]:
+        """Питання та перевіряльники за порядком ідентифікаторів (видалені пропускаються)"""
+        entries = self.question_cache.resolve(question_ids)
+        return [entries[qid] for qid in question_ids if qid in entries]
+
+    def start_session(self, category_id: int, num_questions: int = 10) -> Optional[TestSession]:
+        """Створення нового сеансу тестування"""
+        question_ids = self.select_question_ids(category_id, num_questions)
+        # Питання всього тесту завантажуються одним запитом і тримаються сеансом
+        entries = self.resolve_entries(question_ids)
+        if not entries:
+            return None
+        return TestSession(category_id, entries)
+
+    def start_review_session(self, user_id: int, category_id: int,
+                             num_questions: int = 10) -> Optional[TestSession]:
+        """Сеанс повторення питань, час яких настав"""
+        if not self.local_features:
+            return None
+        with self.db_manager.get_connection() as conn:
+            question_ids = self.review_scheduler.get_due_question_ids(
+                conn.cursor(), user_id, category_id, num_questions)
+        entries = self.resolve_entries(question_ids)
+        if not entries:
+            return None
+        return TestSession(category_id, entries)
+
+    def get_due_review_counts(self, user_id: int) -> Dict[int, int]:
+        """Кількість питань до повторення по категоріях"""
+        if not self.local_features:
+            return {}
+        with self.db_manager.get_connection() as conn:
+            return self.review_scheduler.get_due_counts(conn.cursor(), user_id)
+
+    def restore_session(self, data: Dict) -> Optional[TestSession]:
+        """Відновлення сеансу з даних журналу"""
+        entries = self.question_cache.resolve(data['question_ids'])
+        answers = data['answers']
+        session = TestSession(data['category_id'])
+        for position, question_id in enumerate(data['question_ids']):
+            if question_id not in entries:
+                # Питання видалене: відкидається разом з відповіддю на нього
+                continue
+            session.add_question(*entries[question_id])
+            if position >= len(answers):
+                continue
+            answer_index, seconds, text = answers[position]
+            if answer_index == TestSession.TEXT_ANSWER:
+                if session.text_answers is None:
+                    session.text_answers = {}
+                session.text_answers[session.current_index] = text
+            session.answer_indexes.append(answer_index)
+            session.answer_times.append(seconds)
+
+        if not session.question_ids:
+            return None
+
+        # Час простою після збою не враховується
+        now = time.time()
+        session.start_time = now - sum(session.answer_times)
+        session.question_start_time = now
+        return session
+
+    def get_questions(self, session: TestSession) -> List[Question]:
+        """Питання сеансу (спільні об'єкти з кешу)"""
+        return session.questions
+
+    def get_current_question(self, session: TestSession) -> Optional[Question]:
+        """Отримання поточного питання сеансу (без звернення до бази)"""
+        if 0 <= session.current_index < len(session.questions):
+            return session.questions[session.current_index]
+        return None
+
+    @staticmethod
+    def encode_answer(question: Question, answer: str) -> int:
+        """Перетворення відповіді на компактний індекс"""
+        if question.question_type == "multiple_choice" and answer in question.options:
+            return question.options.index(answer)
+        if question.question_type == "true_false" and answer in ("True", "False"):
+            return 1 if answer == "True" else 0
+        return TestSession.TEXT_ANSWER
+
+    def get_answers(self, session: TestSession) -> List[str]:
+        """Відновлення рядків відповідей сеансу"""
+        answers = []
+        for i, question in enumerate(session.questions[:session.current_index]):
+            index = session.answer_indexes[i]
+            if index == TestSession.TEXT_ANSWER:
+                answers.append(session.text_answers[i])
+            elif question.question_type == "true_false":
+                answers.append("True" if index else "False")
+            else:
+                answers.append(question.options[index])
+        return answers
+
+    def submit_answer(self, session: TestSession, answer: str) -> bool:
+        """Подача відповіді на поточне питання сеансу"""
+        question = self.get_current_question(session)
+        if not question:
+            return False
+
+        now = time.time()
+        index = self.encode_answer(question, answer)
+        if index == TestSession.TEXT_ANSWER:
+            if session.text_answers is None:
+                session.text_answers = {}
+            session.text_answers[session.current_index] = answer
+
+        session.answer_times.append(
+            min(int(now - session.question_start_time), 0xFFFF))
+        session.answer_indexes.append(index)
+        session.question_start_time = now
+        return True
+
+    @staticmethod
+    def grade_answer(session: TestSession, i: int, grader: CompiledGrader) -> bool:
+        """Перевірка i-ї відповіді сеансу"""
+        index = session.answer_indexes[i]
+        if index == TestSession.TEXT_ANSWER:
+            return grader.grade(session.text_answers[i])
+        return grader.grade_index(index)
+
+    def grade_session(self, session: TestSession) -> List[bool]:
+        """Перевірка всіх поданих відповідей сеансу"""
+        return [self.grade_answer(session, i, session.graders[i])
+                for i in range(session.current_index)]
+
+    def finish_session(self, session: TestSession, user_id: int) -> Dict:
+        """Завершення сеансу та збереження результатів"""
+        questions = session.questions
+        if not questions:
+            return {}
+
+        total_time = int(time.time() - session.start_time)
+        user_answers = self.get_answers(session)
+        # Один і той же результат перевірки йде і в підрахунок, і в is_correct
+        correctness = self.grade_session(session)
+        correct_count = sum(correctness)
+
+        # Збереження результатів та детальних відповідей в базу
+        details = [(question.question_id, user_answers[i], correctness[i],
+                    session.answer_times[i])
+                   for i, question in enumerate(questions[:len(correctness)])]
+
+        with self.user_stats.lock_for(user_id):
+            # Зведення має бути в базі до транзакції запису результату
+            cached = self.user_stats.prepare(user_id)
+            updated = []
+
+            def on_saved(cursor, rows):
+                if self.local_features:
+                    # Графік повторень оновлюється лише для питань цього тесту
+                    self.review_scheduler.record_answers(
+                        cursor, user_id, [(question_id, is_correct, seconds)
+                                          for _, question_id, _, is_correct, seconds in rows])
+                # Інший процес міг оновити зведення після потрапляння в кеш
+                stats = self.user_stats.reload(cursor, cached)
+                stats.record(session.category_id, len(questions), correct_count, total_time)
+                self.user_stats.write(cursor, stats)
+                updated.append(stats)
+
+            result_id = self.results.save(user_id, session.category_id, len(questions),
+                                          correct_count, total_time, details, on_saved)
+            # У кеш зведення потрапляє лише після успішного запису
+            self.user_stats.put(updated[0])
+        self.leaderboards.record_result(result_id, user_id, session.category_id, correct_count)
+
+        return {
+            'total_questions': len(questions),
+            'correct_answers': correct_count,
+            'percentage': round((correct_count / len(questions)) * 100, 2),
+            'time_spent': total_time
+        }
+
+
 class TestManager:
-    """Клас для управління тестуванням"""
+    """Клас для управління тестуванням одного користувача (обгортка над TestEngine)"""
 
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, journal: Optional[SessionJournal] = None):
         self.db_manager = db_manager
-        self.current_questions: List[Question] = []
-        self.current_question_index = 0
-        self.user_answers: List[str] = []
-        self.start_time = None
-        self.question_start_time = None
+        self.engine = TestEngine(db_manager)
+        self.session: Optional[TestSession] = None
+        self.journal = journal
+        self.journal_id: Optional[str] = None
+
+    @property
+    def current_questions(self) -> List[Question]:
+        return self.engine.get_questions(self.session) if self.session else []
+
+    @property
+    def current_question_index(self) -> int:
+        return self.session.current_index if self.session else 0
+
+    @property
+    def user_answers(self) -> List[str]:
+        return self.engine.get_answers(self.session) if self.session else []
+
+    @property
+    def answer_results(self) -> List[bool]:
+        return self.engine.grade_session(self.session) if self.session else []
+
+    @property
+    def start_time(self) -> Optional[datetime.datetime]:
+        if not self.session:
+            return None
+        return datetime.datetime.fromtimestamp(self.session.start_time)
+
+    @property
+    def question_start_time(self) -> Optional[datetime.datetime]:
+        if not self.session:
+            return None
+        return datetime.datetime.fromtimestamp(self.session.question_start_time)
 
     def get_categories(self) -> List[Tuple[int, str, str]]:
         """Отримання списку категорій"""
-        conn = sqlite3.connect(self.db_manager.db_name)
-        cursor = conn.cursor()
+        return self.engine.get_categories()
+
+    def start_test(self, category_id: int, num_questions: int = 10,
+                   user_id: Optional[int] = None) -> bool:
+        """Початок тестування (з журналюванням, якщо вказано користувача)"""
+        return self._begin_session(self.engine.start_session(category_id, num_questions),
+                                   user_id)
+
+    def start_review_test(self, category_id: int, num_questions: int, user_id: int) -> bool:
+        """Початок повторення питань, час яких настав"""
+        return self._begin_session(
+            self.engine.start_review_session(user_id, category_id, num_questions), user_id)
+
+    def get_due_review_counts(self, user_id: int) -> Dict[int, int]:
+        """Кількість питань до повторення по категоріях"""
+        return self.engine.get_due_review_counts(user_id)
+
+    def _begin_session(self, session: Optional[TestSession], user_id: Optional[int]) -> bool:
+        """Перехід до нового сеансу (з журналюванням, якщо вказано користувача)"""
+        if not session:
+            return False
 
-        cursor.execute("SELECT id, name, description FROM categories")
-        categories = cursor.fetchall()
+        self._close_journal()
+        self.session = session
+        if self.journal and user_id is not None:
+            self.journal_id = self.journal.begin(
+                user_id, session.category_id, session.question_ids, session.start_time)
+        return True
 
-        conn.close()
-        return categories
+    def start_adaptive_test(self, category_id: int, num_questions: int = 10) -> bool:
+        """Початок адаптивного тесту (питання добираються за рівнем знань)"""
+        if not self.engine.local_features:
+            return False
 
-    def start_test(self, category_id: int, num_questions: int = 10) -> bool:
-        """Початок тестування"""
-        conn = sqlite3.connect(self.db_manager.db_name)
-        cursor = conn.cursor()
+        # numpy та модель IRT завантажуються лише для адаптивного режиму
+        from adaptive_testing import AdaptiveTestEngine
 
-        cursor.execute('''
-            SELECT id, category_id, question_text, question_type, correct_answer, options, difficulty, explanation
-            FROM questions
-            WHERE category_id = ?
-            ORDER BY RANDOM()
-            LIMIT ?
-        ''', (category_id, num_questions))
-
-        questions_data = cursor.fetchall()
-        conn.close()
+        if not isinstance(self.engine, AdaptiveTestEngine):
+            self.engine = AdaptiveTestEngine(self.db_manager, self.engine.question_cache)
 
-        if not questions_data:
+        session = self.engine.start_adaptive_session(category_id, num_questions)
+        if not session:
             return False
 
-        self.current_questions = []
-        for q_data in questions_data:
-            options = json.loads(q_data[5]) if q_data[5] else []
-            question = Question(q_data[0], q_data[1], q_data[2],
-                                q_data[3], q_data[4], options, q_data[6], q_data[7])
-            self.current_questions.append(question)
+        # Склад адаптивного тесту залежить від відповідей, тому він не журналюється
+        self._close_journal()
+        self.session = session
+        return True
+
+    def get_unfinished_tests(self, user_id: int) -> List[str]:
+        """Ідентифікатори незавершених тестів користувача"""
+        if not self.journal:
+            return []
+        return [journal_id for _, journal_id in self.journal.find_unfinished(user_id)]
+
+    def resume_test(self, user_id: int, journal_id: str) -> bool:
+        """Відновлення перерваного тесту з журналу"""
+        data = self.journal.read(user_id, journal_id) if self.journal else None
+        session = self.engine.restore_session(data) if data else None
+        if not session:
+            if self.journal:
+                self.journal.discard(user_id, journal_id)
+            return False
 
-        self.current_question_index = 0
-        self.user_answers = []
-        self.start_time = datetime.datetime.now()
-        self.question_start_time = datetime.datetime.now()
+        if list(session.question_ids) != data['question_ids']:
+            # Видалені питання відкинуто: журнал приводиться у відповідність до сеансу
+            self.journal.rewrite(user_id, journal_id, session.category_id,
+                                 session.question_ids, session.start_time, session.answers())
 
+        self._close_journal()
+        self.session = session
+        self.journal_id = journal_id
         return True
 
+    def discard_unfinished_test(self, user_id: int, journal_id: str):
+        """Відмова від відновлення перерваного тесту"""
+        if self.journal:
+            self.journal.discard(user_id, journal_id)
+
+    def _close_journal(self):
+        """Закриття журналу поточного сеансу"""
+        if self.journal and self.journal_id:
+            self.journal.finish(self.journal_id)
+        self.journal_id = None
+
     def get_current_question(self) -> Optional[Question]:
         """Отримання поточного питання"""
-        if 0 <= self.current_question_index < len(self.current_questions):
-            return self.current_questions[self.current_question_index]
-        return None
+        if not self.session:
+            return None
+        return self.engine.get_current_question(self.session)
 
     def submit_answer(self, answer: str) -> bool:
         """Подача відповіді на поточне питання"""
-        if self.current_question_index < len(self.current_questions):
-            self.user_answers.append(answer)
-            self.current_question_index += 1
-            self.question_start_time = datetime.datetime.now()
-            return True
-        return False
+        if not self.session:
+            return False
+        if not self.engine.submit_answer(self.session, answer):
+            return False
+
+        if self.journal and self.journal_id:
+            self.journal.record_answer(self.journal_id, *self.session.last_answer())
+        return True
 
     def finish_test(self, user_id: int) -> Dict:
         """Завершення тестування та збереження результатів"""
-        if not self.current_questions:
+        if not self.session:
             return {}
-
-        end_time = datetime.datetime.now()
-        total_time = int((end_time - self.start_time).total_seconds())
-
-        correct_count = 0
-        for i, question in enumerate(self.current_questions):
-            if i < len(self.user_answers):
-                user_answer = self.user_answers[i].strip().lower()
-                correct_answer = question.correct_answer.strip().lower()
-
-                if question.question_type == "true_false":
-                    if user_answer in ["true", "так", "1"] and correct_answer in ["true", "так", "1"]:
-                        correct_count += 1
-                    elif user_answer in ["false", "ні", "0"] and correct_answer in ["false", "ні", "0"]:
-                        correct_count += 1
-                else:
-                    if user_answer == correct_answer:
-                        correct_count += 1
-
-        # Збереження результатів в базу
-        conn = sqlite3.connect(self.db_manager.db_name)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT INTO test_results (user_id, category_id, total_questions, correct_answers, time_spent)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, self.current_questions[0].category_id, len(self.current_questions), correct_count, total_time))
-
-        test_result_id = cursor.lastrowid
-
-        # Збереження детальних відповідей
-        for i, question in enumerate(self.current_questions):
-            if i < len(self.user_answers):
-                user_answer = self.user_answers[i]
-                is_correct = user_answer.strip().lower() == question.correct_answer.strip().lower()
-
-                cursor.execute('''
-                    INSERT INTO answer_details (test_result_id, question_id, user_answer, is_correct, time_spent)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (test_result_id, question.question_id, user_answer, is_correct, 30))
-
-        conn.commit()
-        conn.close()
-
-        return {
-            'total_questions': len(self.current_questions),
-            'correct_answers': correct_count,
-            'percentage': round((correct_count / len(self.current_questions)) * 100, 2),
-            'time_spent': total_time
-        }
+        results = self.engine.finish_session(self.session, user_id)
+        self._close_journal()
+        return results
 
 
 class InformaticsTrainerGUI:
@@ -391,9 +1060,17 @@ class InformaticsTrainerGUI:
         self.root.configure(bg='#f0f0f0')
 
         # Ініціалізація компонентів
-        self.db_manager = DatabaseManager()
+        self.db_manager = create_backend()
+        self.repositories = Repositories(self.db_manager)
+        self.user_stats = get_user_stats_store(self.db_manager.db_name, self.db_manager)
         self.auth_manager = AuthenticationManager(self.db_manager)
-        self.test_manager = TestManager(self.db_manager)
+        journal = None
+        if config.TEST_CONFIG['session_journal_enabled']:
+            journal = SessionJournal(config.PATHS['sessions_dir'],
+                                     config.TEST_CONFIG['journal_fsync_every'],
+                                     config.TEST_CONFIG['journal_fsync_interval'],
+                                     config.TEST_CONFIG['journal_open_files'])
+        self.test_manager = TestManager(self.db_manager, journal)
 
         # Стилі
         self.setup_styles()
@@ -535,12 +1212,46 @@ class InformaticsTrainerGUI:
                 text="Заповніть всі поля", style='Error.TLabel')
             return
 
-        if self.auth_manager.login_user(username, password):
+        self.message_label.config(text="Перевірка...", style='TLabel')
+        self.run_in_background(
+            self.auth_manager.authenticate_async(username, password),
+            lambda user: self.on_login_result(username, user),
+            on_error=lambda: self.message_label.config(text="", style='TLabel'))
+
+    def on_login_result(self, username: str, user: Optional[User]):
+        """Результат перевірки входу (виконується в потоці інтерфейсу)"""
+        if user:
+            self.auth_manager.current_user = user
             self.show_main_menu()
+            return
+
+        lockout = self.auth_manager.get_lockout_remaining(username)
+        if lockout:
+            self.message_label.config(
+                text=f"Забагато невдалих спроб. Спробуйте через {lockout // 60 + 1} хв",
+                style='Error.TLabel')
         else:
             self.message_label.config(
                 text="Невірне ім'я користувача або пароль", style='Error.TLabel')
 
+    def run_in_background(self, future: Future, callback, poll_ms: int = 30, on_error=None):
+        """Очікування результату фонової задачі без блокування інтерфейсу
+
+        Помилка задачі (наприклад, недоступна база) показується повідомленням,
+        після чого викликається on_error замість callback.
+        """
+        if not future.done():
+            self.root.after(poll_ms, self.run_in_background, future, callback, poll_ms, on_error)
+            return
+
+        error = future.exception()
+        if error is not None:
+            messagebox.showerror("Помилка", f"Операцію не виконано: {error}")
+            if on_error:
+                on_error()
+            return
+        callback(future.result())
+
     def demo_admin_login(self):
         """Демо-вхід адміністратора"""
         self.username_entry.delete(0, tk.END)
@@ -571,7 +1282,14 @@ class InformaticsTrainerGUI:
                 text="Пароль повинен містити мінімум 6 символів", style='Error.TLabel')
             return
 
-        if self.auth_manager.register_user(username, password, email):
+        self.run_in_background(
+            self.auth_manager.register_user_async(username, password, email),
+            self.on_register_result,
+            on_error=lambda: self.reg_message_label.config(text="", style='TLabel'))
+
+    def on_register_result(self, registered: bool):
+        """Результат реєстрації (виконується в потоці інтерфейсу)"""
+        if registered:
             self.reg_message_label.config(
                 text="Реєстрація успішна! Тепер ви можете увійти", style='Success.TLabel')
             self.root.after(2000, self.show_login_screen)
@@ -609,6 +1327,9 @@ class InformaticsTrainerGUI:
         ttk.Button(menu_frame, text="Статистика", command=self.show_statistics,
                    style='Custom.TButton', width=25).pack(pady=10)
 
+        ttk.Button(menu_frame, text="Рейтинг", command=self.show_leaderboard,
+                   style='Custom.TButton', width=25).pack(pady=10)
+
         if self.auth_manager.current_user.is_admin:
             ttk.Button(menu_frame, text="Адміністрування", command=self.show_admin_panel,
                        style='Custom.TButton', width=25).pack(pady=10)
@@ -619,6 +1340,21 @@ class InformaticsTrainerGUI:
         ttk.Button(menu_frame, text="Вихід", command=self.logout,
                    style='Custom.TButton', width=25).pack(pady=20)
 
+        self.offer_resume_test()
+
+    def offer_resume_test(self):
+        """Пропозиція продовжити тест, перерваний збоєм програми"""
+        user_id = self.auth_manager.current_user.user_id
+        for journal_id in self.test_manager.get_unfinished_tests(user_id):
+            if messagebox.askyesno("Незавершений тест",
+                                   "Знайдено незавершений тест. Продовжити з місця зупинки?"):
+                if self.test_manager.resume_test(user_id, journal_id):
+                    self.show_test_question()
+                    return
+                messagebox.showerror("Помилка", "Не вдалося відновити тест")
+            else:
+                self.test_manager.discard_unfinished_test(user_id, journal_id)
+
     def show_category_selection(self):
         """Вибір категорії для тестування"""
         self.clear_window()
@@ -636,6 +1372,8 @@ class InformaticsTrainerGUI:
 
         # Отримуємо категорії
         categories = self.test_manager.get_categories()
+        due_counts = self.test_manager.get_due_review_counts(
+            self.auth_manager.current_user.user_id)
 
         for category in categories:
             category_frame = ttk.LabelFrame(
@@ -652,7 +1390,14 @@ class InformaticsTrainerGUI:
             ttk.Button(button_frame, text="Стандартний тест (10 питань)",
                        command=lambda c=category[0]: self.start_test(c, 10)).pack(side='left', padx=(0, 10))
             ttk.Button(button_frame, text="Розширений тест (15 питань)",
-                       command=lambda c=category[0]: self.start_test(c, 15)).pack(side='left')
+                       command=lambda c=category[0]: self.start_test(c, 15)).pack(side='left', padx=(0, 10))
+            ttk.Button(button_frame, text="Адаптивний тест",
+                       command=lambda c=category[0]: self.start_adaptive_test(c)).pack(side='left')
+
+            due_count = due_counts.get(category[0], 0)
+            if due_count:
+                ttk.Button(button_frame, text=f"Повторення ({due_count})",
+                           command=lambda c=category[0]: self.start_review_test(c)).pack(side='right')
 
         # Кнопка назад
         ttk.Button(main_frame, text="Назад до меню",
@@ -660,7 +1405,26 @@ class InformaticsTrainerGUI:
 
     def start_test(self, category_id: int, num_questions: int):
         """Початок тестування"""
-        if self.test_manager.start_test(category_id, num_questions):
+        if self.test_manager.start_test(category_id, num_questions,
+                                        self.auth_manager.current_user.user_id):
+            self.show_test_question()
+        else:
+            messagebox.showerror(
+                "Помилка", "Недостатньо питань в цій категорії")
+
+    def start_review_test(self, category_id: int):
+        """Початок повторення питань, час яких настав"""
+        if self.test_manager.start_review_test(
+                category_id, config.SPACED_REPETITION_CONFIG['review_questions_count'],
+                self.auth_manager.current_user.user_id):
+            self.show_test_question()
+        else:
+            messagebox.showinfo("Повторення", "Зараз немає питань для повторення")
+
+    def start_adaptive_test(self, category_id: int):
+        """Початок адаптивного тестування"""
+        if self.test_manager.start_adaptive_test(
+                category_id, config.ADAPTIVE_CONFIG['questions_count']):
             self.show_test_question()
         else:
             messagebox.showerror(
@@ -679,7 +1443,9 @@ class InformaticsTrainerGUI:
         main_frame.pack(expand=True, fill='both')
 
         # Прогрес
-        progress_text = f"Питання {self.test_manager.current_question_index + 1} з {len(self.test_manager.current_questions)}"
+        question_index = self.test_manager.current_question_index
+        questions_count = self.test_manager.session.question_count
+        progress_text = f"Питання {question_index + 1} з {questions_count}"
         progress_label = ttk.Label(
             main_frame, text=progress_text, style='Heading.TLabel')
         progress_label.pack(pady=(0, 10))
@@ -687,8 +1453,7 @@ class InformaticsTrainerGUI:
         # Прогрес-бар
         progress_bar = ttk.Progressbar(
             main_frame, length=400, mode='determinate')
-        progress_bar['value'] = ((self.test_manager.current_question_index) /
-                                 len(self.test_manager.current_questions)) * 100
+        progress_bar['value'] = (question_index / questions_count) * 100
         progress_bar.pack(pady=(0, 20))
 
         # Питання
@@ -788,6 +1553,11 @@ class InformaticsTrainerGUI:
         ttk.Label(results_frame, text=f"Час виконання: {results['time_spent']} секунд",
                   style='Heading.TLabel').pack(anchor='w', pady=5)
 
+        if 'ability' in results:
+            ttk.Label(results_frame,
+                      text=f"Оцінка рівня знань (IRT): {results['ability']:+.2f} ± {results['ability_error']:.2f}",
+                      style='Heading.TLabel').pack(anchor='w', pady=5)
+
         # Оцінка
         percentage = results['percentage']
         if percentage >= 90:
@@ -807,7 +1577,10 @@ class InformaticsTrainerGUI:
             anchor='w', pady=10)
 
         # Детальний розбір
-        if self.test_manager.current_questions:
+        questions = self.test_manager.current_questions
+        user_answers = self.test_manager.user_answers
+        answer_results = self.test_manager.answer_results
+        if questions:
             details_frame = ttk.LabelFrame(
                 main_frame, text="Детальний розбір", padding="10")
             details_frame.pack(fill='both', expand=True, pady=10)
@@ -817,10 +1590,10 @@ class InformaticsTrainerGUI:
                 details_frame, height=10, wrap=tk.WORD)
             details_text.pack(fill='both', expand=True)
 
-            for i, question in enumerate(self.test_manager.current_questions):
-                user_answer = self.test_manager.user_answers[i] if i < len(
-                    self.test_manager.user_answers) else "Не відповів"
-                is_correct = user_answer.strip().lower() == question.correct_answer.strip().lower()
+            for i, question in enumerate(questions):
+                user_answer = user_answers[i] if i < len(
+                    user_answers) else "Не відповів"
+                is_correct = i < len(answer_results) and answer_results[i]
 
                 details_text.insert(
                     tk.END, f"Питання {i+1}: {question.question_text}\n")
@@ -856,21 +1629,11 @@ class InformaticsTrainerGUI:
             main_frame, text="Історія результатів", style='Title.TLabel')
         title_label.pack(pady=(0, 20))
 
-        # Отримуємо результати з бази
-        conn = sqlite3.connect(self.db_manager.db_name)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT tr.test_date, c.name, tr.total_questions, tr.correct_answers, tr.time_spent
-            FROM test_results tr
-            JOIN categories c ON tr.category_id = c.id
-            WHERE tr.user_id = ?
-            ORDER BY tr.test_date DESC
-            LIMIT 20
-        ''', (self.auth_manager.current_user.user_id,))
-
-        results = cursor.fetchall()
-        conn.close()
+        # Перша сторінка історії; наступні довантажуються при прокручуванні
+        user_id = self.auth_manager.current_user.user_id
+        page_size = config.UI_CONFIG['history_page_size']
+        results, next_cursor = self.repositories.results.get_history_page(
+            user_id, None, page_size)
 
         if not results:
             ttk.Label(main_frame, text="Ви ще не проходили тестування",
@@ -886,23 +1649,45 @@ class InformaticsTrainerGUI:
                 tree.heading(col, text=col)
                 tree.column(col, width=120)
 
-            for result in results:
-                date = result[0][:16]
-                category = result[1]
-                total = result[2]
-                correct = result[3]
-                percentage = round((correct / total) * 100, 1)
-                time_spent = f"{result[4]}с"
+            def insert_results(rows):
+                for result in rows:
+                    date = result[0][:16]
+                    category = result[1]
+                    total = result[2]
+                    correct = result[3]
+                    percentage = round((correct / total) * 100, 1)
+                    time_spent = f"{result[4]}с"
 
-                tree.insert('', 'end', values=(date, category, total,
-                            correct, f"{percentage}%", time_spent))
+                    tree.insert('', 'end', values=(date, category, total,
+                                correct, f"{percentage}%", time_spent))
 
+            insert_results(results)
             tree.pack(fill='both', expand=True, pady=10)
 
             # Скролбар
             scrollbar = ttk.Scrollbar(
                 main_frame, orient='vertical', command=tree.yview)
-            tree.configure(yscrollcommand=scrollbar.set)
+            paging = {'cursor': next_cursor, 'loading': False}
+
+            def load_next_page():
+                try:
+                    rows, paging['cursor'] = self.repositories.results.get_history_page(
+                        user_id, paging['cursor'], page_size)
+                    insert_results(rows)
+                except DATABASE_ERRORS as e:
+                    paging['cursor'] = None
+                    print(f"Помилка завантаження історії: {e}")
+                finally:
+                    paging['loading'] = False
+
+            def on_scroll(first, last):
+                scrollbar.set(first, last)
+                # Близько до кінця списку - довантажуємо наступну сторінку
+                if paging['cursor'] is not None and not paging['loading'] and float(last) > 0.9:
+                    paging['loading'] = True
+                    self.root.after_idle(load_next_page)
+
+            tree.configure(yscrollcommand=on_scroll)
             scrollbar.pack(side='right', fill='y')
 
         ttk.Button(main_frame, text="Назад",
@@ -919,30 +1704,10 @@ class InformaticsTrainerGUI:
             main_frame, text="Статистика", style='Title.TLabel')
         title_label.pack(pady=(0, 20))
 
-        # Отримуємо статистику
-        conn = sqlite3.connect(self.db_manager.db_name)
-        cursor = conn.cursor()
-
-        # Загальна статистика
-        cursor.execute('''
-            SELECT COUNT(*), AVG(CAST(correct_answers AS FLOAT) / total_questions * 100), SUM(time_spent)
-            FROM test_results
-            WHERE user_id = ?
-        ''', (self.auth_manager.current_user.user_id,))
-
-        general_stats = cursor.fetchone()
-
-        # Статистика по категоріях
-        cursor.execute('''
-            SELECT c.name, COUNT(*), AVG(CAST(tr.correct_answers AS FLOAT) / tr.total_questions * 100)
-            FROM test_results tr
-            JOIN categories c ON tr.category_id = c.id
-            WHERE tr.user_id = ?
-            GROUP BY c.name
-        ''', (self.auth_manager.current_user.user_id,))
-
-        category_stats = cursor.fetchall()
-        conn.close()
+        # Зведення користувача з кешу (оновлюється при завершенні кожного тесту)
+        user_id = self.auth_manager.current_user.user_id
+        general_stats = self.user_stats.get_user_summary(user_id)
+        category_stats = self.user_stats.get_user_categories(user_id)
 
         if general_stats[0] == 0:
             ttk.Label(main_frame, text="Статистика недоступна - пройдіть хоча б один тест",
@@ -971,6 +1736,68 @@ class InformaticsTrainerGUI:
                     ttk.Label(category_frame, text=cat_text).pack(
                         anchor='w', pady=2)
 
+            # Останні тести
+            recent_tests = self.user_stats.get_recent_tests(user_id)
+            if recent_tests:
+                recent_frame = ttk.LabelFrame(
+                    main_frame, text="Останні тести", padding="15")
+                recent_frame.pack(fill='x', pady=10)
+
+                for test_date, category, total, correct, _ in recent_tests:
+                    ttk.Label(recent_frame, text=f"{test_date[:16]}  {category}: {correct}/{total}").pack(
+                        anchor='w', pady=1)
+
+        ttk.Button(main_frame, text="Назад",
+                   command=self.show_main_menu).pack(pady=20)
+
+    def show_leaderboard(self):
+        """Рейтинг користувачів за балами (правильними відповідями)"""
+        self.clear_window()
+
+        main_frame = ttk.Frame(self.root, padding="20")
+        main_frame.pack(expand=True, fill='both')
+
+        title_label = ttk.Label(
+            main_frame, text="Рейтинг", style='Title.TLabel')
+        title_label.pack(pady=(0, 20))
+
+        # Вибір рейтингу: загальний, за період або по категорії
+        boards = [("Загальний", 'all_time', None), ("Цього тижня", 'week', None),
+                  ("Цього місяця", 'month', None)]
+        boards += [(f"Категорія: {name}", 'category', category_id)
+                   for category_id, name, _ in self.test_manager.get_categories()]
+        board_var = tk.StringVar(value=boards[0][0])
+        ttk.Combobox(main_frame, textvariable=board_var, values=[b[0] for b in boards],
+                     state='readonly', width=40).pack(pady=5)
+
+        rank_label = ttk.Label(main_frame, style='Heading.TLabel')
+        rank_label.pack(pady=5)
+
+        columns = ('Місце', 'Користувач', 'Бали')
+        tree = ttk.Treeview(main_frame, columns=columns, show='headings', height=15)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=150)
+        tree.pack(fill='both', expand=True, pady=10)
+
+        leaderboards = self.test_manager.engine.leaderboards
+        user_id = self.auth_manager.current_user.user_id
+
+        def show_board(*_):
+            _, kind, category_id = next(b for b in boards if b[0] == board_var.get())
+            tree.delete(*tree.get_children())
+            for rank, username, points in leaderboards.get_top(kind, category_id):
+                tree.insert('', 'end', values=(rank, username, points))
+
+            my_rank = leaderboards.get_rank(user_id, kind, category_id)
+            if my_rank:
+                rank_label.config(text=f"Ваше місце: {my_rank[0]} з {my_rank[2]} ({my_rank[1]} балів)")
+            else:
+                rank_label.config(text="Ви ще не маєте балів у цьому рейтингу")
+
+        board_var.trace_add('write', show_board)
+        show_board()
+
         ttk.Button(main_frame, text="Назад",
                    command=self.show_main_menu).pack(pady=20)
 
@@ -1061,8 +1888,58 @@ class InformaticsTrainerGUI:
 
     def change_password(self):
         """Зміна паролю"""
-        messagebox.showinfo(
-            "Інформація", "Функція зміни паролю буде реалізована в наступній версії")
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Зміна паролю")
+        dialog.geometry("400x320")
+        dialog.configure(bg='#f0f0f0')
+
+        main_frame = ttk.Frame(dialog, padding="20")
+        main_frame.pack(fill='both', expand=True)
+
+        ttk.Label(main_frame, text="Поточний пароль:").pack(anchor='w')
+        old_entry = ttk.Entry(main_frame, show="*")
+        old_entry.pack(fill='x', pady=(0, 10))
+
+        ttk.Label(main_frame, text="Новий пароль:").pack(anchor='w')
+        new_entry = ttk.Entry(main_frame, show="*")
+        new_entry.pack(fill='x', pady=(0, 10))
+
+        ttk.Label(main_frame, text="Підтвердження паролю:").pack(anchor='w')
+        confirm_entry = ttk.Entry(main_frame, show="*")
+        confirm_entry.pack(fill='x', pady=(0, 10))
+
+        def save_password():
+            new_password = new_entry.get().strip()
+            if len(new_password) < 6:
+                messagebox.showerror(
+                    "Помилка", "Пароль повинен містити мінімум 6 символів", parent=dialog)
+                return
+            if new_password != confirm_entry.get().strip():
+                messagebox.showerror(
+                    "Помилка", "Паролі не співпадають", parent=dialog)
+                return
+
+            self.run_in_background(
+                self.auth_manager.change_password_async(old_entry.get().strip(), new_password),
+                on_changed)
+
+        def on_changed(changed: bool):
+            if changed:
+                messagebox.showinfo("Успіх", "Пароль змінено", parent=dialog)
+                dialog.destroy()
+            else:
+                messagebox.showerror(
+                    "Помилка", "Невірний поточний пароль", parent=dialog)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill='x', pady=10)
+
+        ttk.Button(button_frame, text="Зберегти",
+                   command=save_password).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Скасувати",
+                   command=dialog.destroy).pack(side='left')
+
+        old_entry.focus()
 
     def logout(self):
         """Вихід з системи"""
@@ -1071,7 +1948,10 @@ class InformaticsTrainerGUI:
 
     def run(self):
         """Запуск додатку"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.db_manager.close_connection()
 
 
 if __name__ == "__main__":
@@ -32,6 +32,13 @@ class EnhancedInformaticsTrainerGUI(InformaticsTrainerGUI):
             messagebox.showerror("Помилка", "Доступ заборонено")
             return
 
+        # Панель працює з файлом SQLite напряму: для MySQL вона відкрила б порожній файл
+        if self.db_manager.dialect != 'sqlite':
+            self.admin_panel = None
+            messagebox.showerror(
+                "Помилка", "Адміністративна панель доступна лише для сховища SQLite")
+            return
+
         # Закриваємо попередню панель якщо вона відкрита
         if self.admin_panel and hasattr(self.admin_panel, 'window'):
             try:
@@ -0,0 +1,194 @@
+"""
+Пошук майже однакових питань: шинґли, MinHash та LSH-індекс
+"""
+
+import re
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import config
+
+
+# Просте число Мерсенна 2^31 - 1: a * h + b вміщується в uint64 без переповнення
+_MERSENNE_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"[\w'ʼ’]+")
+
+
+def normalize_text(text: str) -> str:
+    """Нормалізація тексту: регістр, розділові знаки та пробіли не враховуються"""
+    return ' '.join(_WORD_RE.findall(text.lower()))
+
+
+def shingles(text: str, size: int = 4) -> Set[int]:
+    """Множина хешів символьних k-грам нормалізованого тексту"""
+    normalized = normalize_text(text)
+    if len(normalized) <= size:
+        return {zlib.crc32(normalized.encode())} if normalized else set()
+    return {zlib.crc32(normalized[i:i + size].encode())
+            for i in range(len(normalized) - size + 1)}
+
+
+class QuestionDedupIndex:
+    """LSH-індекс MinHash-підписів тексту питань
+
+    Підпис з num_perm значень ділиться на bands смуг; питання, що збігаються
+    хоча б в одній смузі, стають кандидатами, а їх схожість оцінюється
+    за часткою однакових значень підпису (оцінка коефіцієнта Жаккара).
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.7,
+                 shingle_size: int = 4, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm має ділитися на bands без остачі")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=(num_perm, 1)).astype(np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=(num_perm, 1)).astype(np.uint64)
+
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[int]]] = [defaultdict(set) for _ in range(bands)]
+        self._lock = threading.RLock()
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash-підпис тексту"""
+        hashes = np.fromiter(shingles(text, self.shingle_size), dtype=np.uint64)
+        if not len(hashes):
+            return np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes()
+                for i in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, question_id: int, text: str):
+        """Додавання (або заміна) питання в індексі"""
+        signature = self.signature(text)
+        with self._lock:
+            self._remove(question_id)
+            self._signatures[question_id] = signature
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band][key].add(question_id)
+
+    def _remove(self, question_id: int):
+        signature = self._signatures.pop(question_id, None)
+        if signature is None:
+            return
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(question_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def remove(self, question_id: int):
+        """Видалення питання з індексу"""
+        with self._lock:
+            self._remove(question_id)
+
+    def build(self, rows: Iterable[Tuple[int, str]]):
+        """Побудова індексу з пар (id, текст)"""
+        for question_id, text in rows:
+            self.add(question_id, text)
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        """Оцінка коефіцієнта Жаккара за MinHash-підписами"""
+        return float(np.count_nonzero(first == second)) / self.num_perm
+
+    def query(self, text: str, exclude_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Питання, схожі на текст не менше ніж на threshold (від найсхожіших)"""
+        signature = self.signature(text)
+        with self._lock:
+            candidates: Set[int] = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            candidates.discard(exclude_id)
+
+            result = []
+            for candidate in candidates:
+                score = self.similarity(signature, self._signatures[candidate])
+                if score >= self.threshold:
+                    result.append((candidate, score))
+
+        result.sort(key=lambda item: -item[1])
+        return result
+
+    def find_duplicate_pairs(self) -> List[Tuple[int, int, float]]:
+        """Пари схожих питань у всьому індексі
+
+        У кожному кошику порівнюються всі пари питань (векторно, рядок
+        підписів проти решти кошика); пара, що трапилась у кількох смугах,
+        оцінюється один раз. Кошики різнотекстових питань малі, тож час
+        близький до O(bands * N), а група з m копій дає всі m(m-1)/2 пар.
+        """
+        pairs: Dict[Tuple[int, int], float] = {}
+        with self._lock:
+            for buckets in self._buckets:
+                for bucket in buckets.values():
+                    if len(bucket) < 2:
+                        continue
+                    members = sorted(bucket)
+                    matrix = np.stack([self._signatures[member] for member in members])
+                    for i, first in enumerate(members[:-1]):
+                        matches = np.count_nonzero(matrix[i + 1:] == matrix[i], axis=1)
+                        for second, count in zip(members[i + 1:], matches):
+                            if (first, second) not in pairs:
+                                pairs[(first, second)] = float(count) / self.num_perm
+
+        return sorted(((first, second, score) for (first, second), score in pairs.items()
+                       if score >= self.threshold), key=lambda item: -item[2])
+
+
+def create_dedup_index() -> QuestionDedupIndex:
+    """Порожній індекс з параметрами з конфігурації"""
+    dedup_config = config.QUESTION_DEDUP_CONFIG
+    return QuestionDedupIndex(dedup_config['num_perm'], dedup_config['bands'],
+                              dedup_config['similarity_threshold'],
+                              dedup_config['shingle_size'])
+
+
+def load_dedup_index(db_name: str) -> QuestionDedupIndex:
+    """Індекс, побудований з усіх питань бази"""
+    index = create_dedup_index()
+    conn = sqlite3.connect(db_name)
+    try:
+        index.build(conn.execute("SELECT id, question_text FROM questions"))
+    finally:
+        conn.close()
+    return index
+
+
+# Індекси спільні для всіх менеджерів питань, що працюють з однією базою
+_indexes: Dict[str, QuestionDedupIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_dedup_index(db_name: str) -> QuestionDedupIndex:
+    """Спільний індекс бази (будується при першому зверненні)"""
+    with _indexes_lock:
+        if db_name not in _indexes:
+            _indexes[db_name] = load_dedup_index(db_name)
+        return _indexes[db_name]
+
+
+def get_loaded_dedup_index(db_name: str) -> Optional[QuestionDedupIndex]:
+    """Індекс бази, якщо він уже побудований (для інкрементного оновлення)"""
+    return _indexes.get(db_name)
+
+
+def reset_dedup_index(db_name: str):
+    """Скидання індексу після масових змін (буде перебудований при зверненні)"""
+    with _indexes_lock:
+        _indexes.pop(db_name, None)
@@ -0,0 +1,451 @@
+"""
+Масовий імпорт питань з файлів CSV, JSON та Moodle GIFT
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import config
+from grading import FALSE_ANSWERS, TRUE_ANSWERS, normalize_answer, regex_answer_error
+from question_dedup import reset_dedup_index
+
+
+QUESTION_TYPES = {
+    'multiple_choice': 'multiple_choice', 'mc': 'multiple_choice',
+    'choice': 'multiple_choice', 'multichoice': 'multiple_choice',
+    'true_false': 'true_false', 'tf': 'true_false', 'truefalse': 'true_false',
+    'boolean': 'true_false',
+    'text_input': 'text_input', 'text': 'text_input', 'short': 'text_input',
+    'shortanswer': 'text_input'
+}
+
+DIFFICULTY_NAMES = {'легкий': 1, 'середній': 2, 'важкий': 3,
+                    'easy': 1, 'medium': 2, 'hard': 3}
+
+MAX_QUESTION_LENGTH = 2000
+
+# Рядок файлу: (номер рядка, сирі поля)
+RawRow = Tuple[int, Dict[str, Any]]
+
+
+class ImportReport:
+    """Підсумок імпорту: кількість питань, нові категорії та помилки по рядках"""
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.total = 0
+        self.imported = 0
+        self.created_categories: List[str] = []
+        self.errors: List[Tuple[int, str]] = []
+
+    def add_error(self, row_number: int, message: str):
+        self.errors.append((row_number, message))
+
+    def summary(self) -> str:
+        """Короткий текстовий підсумок"""
+        action = "Буде імпортовано" if self.dry_run else "Імпортовано"
+        lines = [f"Оброблено рядків: {self.total}",
+                 f"{action} питань: {self.imported}",
+                 f"Помилок: {len(self.errors)}"]
+        if self.created_categories:
+            verb = "Буде створено" if self.dry_run else "Створено"
+            lines.append(f"{verb} категорій: {', '.join(self.created_categories)}")
+        return "\n".join(lines)
+
+    def save_errors(self, filename: str):
+        """Збереження помилок у CSV (рядок, повідомлення)"""
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['row', 'error'])
+            writer.writerows(self.errors)
+
+
+def _split_options(value: Any) -> List[str]:
+    """Варіанти відповідей: JSON-список або рядок з розділювачем '|'"""
+    if value is None or value == '':
+        return []
+    if isinstance(value, list):
+        return [str(option).strip() for option in value if str(option).strip()]
+
+    text = str(value).strip()
+    if text.startswith('['):
+        return _split_options(json.loads(text))
+    return [option.strip() for option in text.split('|') if option.strip()]
+
+
+def validate_row(row: RawRow) -> Tuple[int, Optional[Dict[str, Any]], Optional[str]]:
+    """Перевірка та нормалізація одного рядка (виконується у процесах-обробниках)
+
+    Повертає (номер рядка, нормалізоване питання або None, помилка або None).
+    """
+    row_number, raw = row
+    try:
+        question_text = str(raw.get('question_text') or raw.get('question') or '').strip()
+        if not question_text:
+            return row_number, None, "Порожній текст питання"
+        if len(question_text) > MAX_QUESTION_LENGTH:
+            return row_number, None, f"Текст питання довший за {MAX_QUESTION_LENGTH} символів"
+
+        category = str(raw.get('category') or '').strip()
+        category_id = raw.get('category_id')
+        if not category and not category_id:
+            return row_number, None, "Не вказано категорію"
+
+        options = _split_options(raw.get('options'))
+        correct = str(raw.get('correct_answer') or raw.get('answer') or '').strip()
+        if not correct:
+            return row_number, None, "Не вказано правильну відповідь"
+
+        raw_type = str(raw.get('question_type') or raw.get('type') or '').strip().lower()
+        if raw_type:
+            question_type = QUESTION_TYPES.get(raw_type)
+            if not question_type:
+                return row_number, None, f"Невідомий тип питання: {raw_type}"
+        elif options:
+            question_type = 'multiple_choice'
+        elif normalize_answer(correct) in TRUE_ANSWERS | FALSE_ANSWERS:
+            question_type = 'true_false'
+        else:
+            question_type = 'text_input'
+
+        if question_type == 'multiple_choice':
+            if len(options) < 2:
+                return row_number, None, "Для множинного вибору потрібно мінімум 2 варіанти"
+            normalized_options = [normalize_answer(option) for option in options]
+            if len(set(normalized_options)) != len(options):
+                return row_number, None, "Варіанти відповідей повторюються"
+            if normalize_answer(correct) not in normalized_options:
+                return row_number, None, "Правильної відповіді немає серед варіантів"
+            correct = options[normalized_options.index(normalize_answer(correct))]
+        elif question_type == 'true_false':
+            normalized = normalize_answer(correct)
+            if normalized in TRUE_ANSWERS:
+                correct = 'True'
+            elif normalized in FALSE_ANSWERS:
+                correct = 'False'
+            else:
+                return row_number, None, f"Невірна відповідь для правда/неправда: {correct}"
+            options = []
+        else:
+            options = []
+            regex_error = regex_answer_error(question_type, correct)
+            if regex_error:
+                return row_number, None, regex_error
+
+        raw_difficulty = raw.get('difficulty')
+        if raw_difficulty in (None, ''):
+            difficulty = 1
+        elif str(raw_difficulty).strip().lower() in DIFFICULTY_NAMES:
+            difficulty = DIFFICULTY_NAMES[str(raw_difficulty).strip().lower()]
+        else:
+            difficulty = int(float(raw_difficulty))
+            if difficulty not in (1, 2, 3):
+                return row_number, None, f"Складність має бути від 1 до 3: {raw_difficulty}"
+
+        return row_number, {
+            'category': category,
+            'category_id': int(category_id) if category_id else None,
+            'question_text': question_text,
+            'question_type': question_type,
+            'correct_answer': correct,
+            'options': options,
+            'difficulty': difficulty,
+            'explanation': str(raw.get('explanation') or '').strip()
+        }, None
+    except (ValueError, TypeError) as e:
+        return row_number, None, f"Невірний формат даних: {e}"
+
+
+def read_csv(filename: str) -> Iterator[RawRow]:
+    """Потокове читання CSV (заголовок - назви полів)"""
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+        # Рядок 1 - заголовок
+        for row_number, row in enumerate(csv.DictReader(f), start=2):
+            yield row_number, row
+
+
+def read_json(filename: str) -> Iterator[RawRow]:
+    """Читання JSON (список питань або {"questions": [...]}) чи JSON Lines"""
+    with open(filename, 'r', encoding='utf-8-sig') as f:
+        if filename.lower().endswith(('.jsonl', '.ndjson')):
+            for row_number, line in enumerate(f, start=1):
+                if line.strip():
+                    item = json.loads(line)
+                    yield row_number, item if isinstance(item, dict) else {}
+            return
+
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        data = data.get('questions', [])
+    for row_number, item in enumerate(data, start=1):
+        yield row_number, item if isinstance(item, dict) else {}
+
+
+_GIFT_ESCAPES = re.compile(r'\\([:~=#{}])')
+
+
+def _gift_unescape(text: str) -> str:
+    return _GIFT_ESCAPES.sub(r'\1', text).strip()
+
+
+def _gift_split(text: str, separators: str) -> List[Tuple[str, str]]:
+    """Розбиття блоку відповідей на (маркер, текст) з урахуванням екранування"""
+    parts: List[Tuple[str, str]] = []
+    marker, current, escaped = '', [], False
+    for char in text:
+        if escaped:
+            current.append('\\' + char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in separators:
+            if current or marker:
+                parts.append((marker, ''.join(current)))
+            marker, current = char, []
+        else:
+            current.append(char)
+    if current or marker:
+        parts.append((marker, ''.join(current)))
+    return parts
+
+
+def _parse_gift_question(block: str, category: str) -> Dict[str, Any]:
+    """Розбір одного питання GIFT: [::назва::] текст {відповіді}"""
+    block = re.sub(r'^::.*?::', '', block.strip(), flags=re.S).strip()
+    block = re.sub(r'^\[(html|moodle|plain|markdown)\]', '', block).strip()
+
+    match = re.search(r'(?<!\\)\{(.*?)(?<!\\)\}', block, flags=re.S)
+    if not match:
+        return {'category': category, 'question_text': _gift_unescape(block)}
+
+    question_text = _gift_unescape(block[:match.start()] + ' ' + block[match.end():])
+    answers = match.group(1).strip()
+
+    # Загальний відгук після "####" використовується як пояснення
+    explanation = ''
+    if '####' in answers:
+        answers, explanation = answers.split('####', 1)
+
+    item: Dict[str, Any] = {'category': category, 'question_text': question_text,
+                            'explanation': _gift_unescape(explanation)}
+
+    if answers.strip().upper() in ('T', 'TRUE', 'F', 'FALSE'):
+        item['question_type'] = 'true_false'
+        item['correct_answer'] = 'True' if answers.strip().upper().startswith('T') else 'False'
+        return item
+
+    options, correct = [], ''
+    for marker, text in _gift_split(answers, '=~'):
+        # Відгук до окремої відповіді ("#...") відкидається
+        text = _gift_unescape(_gift_split(text, '#')[0][1] if text else '')
+        if not text or not marker:
+            continue
+        if marker == '=' and not correct:
+            correct = text
+        options.append((marker, text))
+
+    item['correct_answer'] = correct
+    if any(marker == '~' for marker, _ in options):
+        item['question_type'] = 'multiple_choice'
+        item['options'] = [text for _, text in options]
+    else:
+        item['question_type'] = 'text_input'
+    return item
+
+
+def read_gift(filename: str) -> Iterator[RawRow]:
+    """Потокове читання Moodle GIFT (питання розділені порожнім рядком)"""
+    category = ''
+    block: List[str] = []
+    block_start = 0
+
+    with open(filename, 'r', encoding='utf-8-sig') as f:
+        for line_number, line in enumerate(f, start=1):
+            stripped = line.strip()
+            if stripped.startswith('//'):
+                continue
+            if stripped.startswith('$CATEGORY:'):
+                # Moodle використовує шлях "$course$/top/Назва" - беремо останню частину
+                category = stripped[len('$CATEGORY:'):].strip().rstrip('/').split('/')[-1]
+                continue
+
+            if stripped:
+                if not block:
+                    block_start = line_number
+                block.append(line.rstrip('\n'))
+            elif block:
+                yield block_start, _parse_gift_question('\n'.join(block), category)
+                block = []
+
+        if block:
+            yield block_start, _parse_gift_question('\n'.join(block), category)
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+    '.jsonl': read_json,
+    '.ndjson': read_json,
+    '.gift': read_gift,
+    '.txt': read_gift
+}
+
+
+class QuestionImporter:
+    """Клас для масового імпорту питань"""
+
+    def __init__(self, db_name: str, workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None):
+        import_config = config.IMPORT_CONFIG
+        self.db_name = db_name
+        self.workers = workers if workers is not None else (
+            import_config['workers'] or os.cpu_count() or 1)
+        self.chunk_size = chunk_size or import_config['chunk_size']
+        self.create_categories = import_config['create_missing_categories']
+
+    def read_rows(self, filename: str) -> Iterator[RawRow]:
+        """Рядки файлу відповідно до його розширення"""
+        extension = os.path.splitext(filename)[1].lower()
+        reader = READERS.get(extension)
+        if not reader:
+            raise ValueError(f"Непідтримуваний формат файлу: {extension}")
+        return reader(filename)
+
+    def _validate_chunks(self, rows: Iterable[RawRow]) -> Iterator[List[Tuple]]:
+        """Перевірка рядків порціями у пулі процесів (або в поточному процесі)
+
+        Наступна порція передається обробникам до того, як попередня
+        записується в базу, тож перевірка і вставка йдуть паралельно.
+        """
+        rows = iter(rows)
+        if self.workers <= 1:
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    return
+                yield [validate_row(row) for row in chunk]
+
+        with ProcessPoolExecutor(self.workers) as executor:
+            pending = None
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                submitted = executor.map(validate_row, chunk,
+                                         chunksize=max(1, len(chunk) // self.workers)) if chunk else None
+                if pending is not None:
+                    yield list(pending)
+                if submitted is None:
+                    return
+                pending = submitted
+
+    def _resolve_category(self, cursor: sqlite3.Cursor, categories: Dict[str, int],
+                          category_ids: set, question: Dict[str, Any],
+                          report: ImportReport) -> Optional[int]:
+        """ID категорії за назвою з кешованої мапи (з можливим створенням нової)"""
+        if question['category_id'] is not None and not question['category']:
+            return question['category_id'] if question['category_id'] in category_ids else None
+
+        key = question['category'].lower()
+        if key in categories:
+            return categories[key]
+        if not self.create_categories:
+            return None
+
+        cursor.execute("INSERT INTO categories (name, description) VALUES (?, ?)",
+                       (question['category'], ''))
+        categories[key] = cursor.lastrowid
+        category_ids.add(cursor.lastrowid)
+        report.created_categories.append(question['category'])
+        return categories[key]
+
+    def import_file(self, filename: str, dry_run: bool = False) -> ImportReport:
+        """Імпорт файлу порціями, кожна порція - окрема транзакція
+
+        У режимі dry_run усі перевірки виконуються, але зміни відкочуються.
+        """
+        report = ImportReport(dry_run)
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("SELECT id, name FROM categories")
+            category_rows = cursor.fetchall()
+            categories = {name.lower(): category_id for category_id, name in category_rows}
+            category_ids = {category_id for category_id, _ in category_rows}
+
+            for results in self._validate_chunks(self.read_rows(filename)):
+                batch = []
+                for row_number, question, error in results:
+                    report.total += 1
+                    if error:
+                        report.add_error(row_number, error)
+                        continue
+
+                    category_id = self._resolve_category(
+                        cursor, categories, category_ids, question, report)
+                    if category_id is None:
+                        report.add_error(
+                            row_number, f"Категорію не знайдено: {question['category'] or question['category_id']}")
+                        continue
+
+                    batch.append((category_id, question['question_text'],
+                                  question['question_type'], question['correct_answer'],
+                                  json.dumps(question['options'], ensure_ascii=False)
+                                  if question['options'] else None,
+                                  question['difficulty'], question['explanation']))
+
+                cursor.executemany('''
+                    INSERT INTO questions (category_id, question_text, question_type,
+                                           correct_answer, options, difficulty, explanation)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', batch)
+                if not dry_run:
+                    conn.commit()
+                report.imported += len(batch)
+
+            if dry_run:
+                conn.rollback()
+        except (OSError, ValueError, csv.Error) as e:
+            conn.rollback()
+            report.add_error(0, f"Помилка читання файлу: {e}")
+        except sqlite3.Error as e:
+            # Наприклад, база заблокована іншим процесом; зафіксовані пакети залишаються
+            conn.rollback()
+            report.add_error(0, f"Помилка бази даних: {e}")
+        finally:
+            conn.close()
+
+        if report.imported and not dry_run:
+            # Індекс схожих питань буде перебудовано при наступному зверненні
+            reset_dedup_index(self.db_name)
+        return report
+
+
+def main():
+    """Імпорт питань з командного рядка"""
+    parser = argparse.ArgumentParser(description="Масовий імпорт питань (CSV, JSON, GIFT)")
+    parser.add_argument('filename')
+    parser.add_argument('--db', default=config.DATABASE_CONFIG['sqlite']['db_name'])
+    parser.add_argument('--dry-run', action='store_true',
+                        help="лише перевірити файл, нічого не змінюючи")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--errors', help="файл CSV для звіту про помилки")
+    args = parser.parse_args()
+
+    report = QuestionImporter(args.db, args.workers).import_file(args.filename, args.dry_run)
+    print(report.summary())
+    for row_number, message in report.errors[:20]:
+        print(f"  рядок {row_number}: {message}")
+    if args.errors and report.errors:
+        report.save_errors(args.errors)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Репліка для аналітичного читання: знімок бази SQLite, що періодично оновлюється
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from config import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotReplica:
+    """Копія бази SQLite для важких запитів адміністратора
+
+    Знімок створюється одним VACUUM INTO: копіювання читає узгоджений стан
+    бази в одній транзакції читання, тож у режимі WAL записи студентів
+    тривають паралельно і не перезапускають копіювання (як це буває з
+    покроковим backup). Готовий знімок атомарно замінює попередній. Якщо база не змінювалась (час та
+    розмір файлів бази й журналу WAL ті самі), копіювання пропускається.
+    Читання йде до знімка, лише поки він не старший за max_staleness_seconds,
+    інакше - до основної бази.
+    """
+
+    def __init__(self, db_name: str, max_staleness_seconds: float = 300.0,
+                 refresh_seconds: float = 60.0):
+        self.db_name = db_name
+        self.snapshot_name = db_name + config.REPLICA_CONFIG['snapshot_suffix']
+        self.max_staleness_seconds = max_staleness_seconds
+        self.refresh_seconds = refresh_seconds
+        # Час, станом на який знімок містить усі дані основної бази
+        self._fresh_as_of: Optional[float] = None
+        self._source_signature: Optional[Tuple] = None
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def _signature(self) -> Tuple:
+        signature = []
+        for path in (self.db_name, self.db_name + '-wal'):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Оновлення знімка; повертає True, якщо дані скопійовано"""
+        with self._refresh_lock:
+            started = time.time()
+            signature = self._signature()
+            if (not force and signature == self._source_signature
+                    and os.path.exists(self.snapshot_name)):
+                self._fresh_as_of = started
+                return False
+
+            temp_name = self.snapshot_name + '.tmp'
+            if os.path.exists(temp_name):
+                # Залишок перерваного оновлення: VACUUM INTO потребує нового файлу
+                os.remove(temp_name)
+            source = sqlite3.connect(self.db_name)
+            try:
+                source.execute("VACUUM INTO ?", (temp_name,))
+            finally:
+                source.close()
+            os.replace(temp_name, self.snapshot_name)
+
+            self._source_signature = signature
+            self._fresh_as_of = started
+            return True
+
+    def staleness(self) -> Optional[float]:
+        """Вік даних знімка в секундах (None - знімка ще немає)"""
+        if self._fresh_as_of is None:
+            return None
+        return time.time() - self._fresh_as_of
+
+    def read_database(self) -> str:
+        """Файл для аналітичного читання: знімок або основна база"""
+        age = self.staleness()
+        if age is not None and age <= self.max_staleness_seconds:
+            return self.snapshot_name
+        # Знімок застарів: читаємо з основної бази і просимо оновлення
+        self._wake.set()
+        return self.db_name
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.refresh_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.refresh()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Не вдалося оновити знімок бази: {e}")
+
+    def start(self):
+        """Запуск фонового оновлення (перший знімок - одразу)"""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='snapshot-replica',
+                                            daemon=True)
+            self._worker.start()
+            self._wake.set()
+
+    def close(self):
+        """Зупинка фонового оновлення"""
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+
+_replicas: Dict[str, SnapshotReplica] = {}
+_registry_lock = threading.Lock()
+
+
+def get_replica(db_name: str) -> Optional[SnapshotReplica]:
+    """Спільна репліка для бази (None, якщо репліки вимкнено)"""
+    replica_config = config.REPLICA_CONFIG
+    if not replica_config['enabled'] or db_name == ':memory:':
+        return None
+    with _registry_lock:
+        if db_name not in _replicas:
+            replica = SnapshotReplica(db_name, replica_config['max_staleness_seconds'],
+                                      replica_config['refresh_seconds'])
+            replica.start()
+            _replicas[db_name] = replica
+        return _replicas[db_name]
+
+
+def read_database(db_name: str) -> str:
+    """Файл бази для аналітичного читання з урахуванням допустимої застарілості"""
+    replica = get_replica(db_name)
+    return replica.read_database() if replica else db_name
@@ -0,0 +1,739 @@
+"""
+Шар репозиторіїв: запити застосунку, незалежні від СУБД (SQLite або MySQL)
+
+Реєстр охоплює запити, що виконуються на обох СУБД (вхід, тестування, історія,
+рейтинги, сесії). Інструменти лише для SQLite - адмін-панель, архівація,
+класи, аналітика - поки тримають свій SQL поруч із кодом.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import urllib.request
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import config
+
+try:
+    from mysql.connector import Error as MySQLError, IntegrityError as MySQLIntegrityError
+    DATABASE_ERRORS: Tuple[type, ...] = (sqlite3.Error, MySQLError)
+    INTEGRITY_ERRORS: Tuple[type, ...] = (sqlite3.IntegrityError, MySQLIntegrityError)
+except ImportError:
+    DATABASE_ERRORS = (sqlite3.Error,)
+    INTEGRITY_ERRORS = (sqlite3.IntegrityError,)
+
+
+# Спільні визначення запитів: параметри позначаються "?", списки - "{ids}"
+STATEMENTS = {
+    'user.credentials': '''
+        SELECT id, username, email, password_hash, is_admin
+        FROM users
+        WHERE username = ?
+    ''',
+    'user.recent_credentials': '''
+        SELECT id, username, email, password_hash, is_admin
+        FROM users
+        ORDER BY id DESC
+        LIMIT ?
+    ''',
+    'user.create': '''
+        INSERT INTO users (username, password_hash, email)
+        VALUES (?, ?, ?)
+    ''',
+    'user.set_password': "UPDATE users SET password_hash = ? WHERE id = ?",
+    'user.is_admin': "SELECT is_admin FROM users WHERE id = ?",
+    'user.replace_password': '''
+        UPDATE users SET password_hash = ?
+        WHERE id = ? AND password_hash = ?
+    ''',
+    'category.all': "SELECT id, name, description FROM categories",
+    'category.create': "INSERT INTO categories (name, description) VALUES (?, ?)",
+    'question.random_ids': '''
+        SELECT id
+        FROM questions
+        WHERE category_id = ?
+        ORDER BY RANDOM()
+        LIMIT ?
+    ''',
+    'question.by_ids': '''
+        SELECT id, category_id, question_text, question_type, correct_answer, options, difficulty, explanation
+        FROM questions
+        WHERE id IN ({ids})
+    ''',
+    'question.create': '''
+        INSERT INTO questions (category_id, question_text, question_type, correct_answer,
+                               options, difficulty, explanation)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'result.create': '''
+        INSERT INTO test_results (user_id, category_id, total_questions, correct_answers, time_spent)
+        VALUES (?, ?, ?, ?, ?)
+    ''',
+    'result.add_answers': '''
+        INSERT INTO answer_details (test_result_id, question_id, user_answer, is_correct, time_spent)
+        VALUES (?, ?, ?, ?, ?)
+    ''',
+    # Історія сторінками за ключем (test_date, id): індекс idx_test_results_user
+    # містить id неявно, тож кожна сторінка - пошук в індексі без OFFSET
+    'result.history': '''
+        SELECT tr.test_date, c.name, tr.total_questions, tr.correct_answers, tr.time_spent, tr.id
+        FROM test_results tr
+        JOIN categories c ON tr.category_id = c.id
+        WHERE tr.user_id = ?
+        ORDER BY tr.test_date DESC, tr.id DESC
+        LIMIT ?
+    ''',
+    'result.history_after': '''
+        SELECT tr.test_date, c.name, tr.total_questions, tr.correct_answers, tr.time_spent, tr.id
+        FROM test_results tr
+        JOIN categories c ON tr.category_id = c.id
+        WHERE tr.user_id = ?
+          AND tr.test_date <= ? AND (tr.test_date < ? OR tr.id < ?)
+        ORDER BY tr.test_date DESC, tr.id DESC
+        LIMIT ?
+    ''',
+    # Статистика користувача: поточні результати плюс підсумки архівованих (result_rollups)
+    'stats.user_summary': '''
+        SELECT SUM(tests), SUM(total_questions), SUM(correct_answers), SUM(time_spent),
+               SUM(percentage_sum) / SUM(tests)
+        FROM (
+            SELECT COUNT(*) AS tests, SUM(total_questions) AS total_questions,
+                   SUM(correct_answers) AS correct_answers, SUM(time_spent) AS time_spent,
+                   SUM(correct_answers * 100.0 / total_questions) AS percentage_sum
+            FROM test_results
+            WHERE user_id = ?
+            UNION ALL
+            SELECT tests, total_questions, correct_answers, time_spent, percentage_sum
+            FROM result_rollups
+            WHERE user_id = ?
+        ) history
+    ''',
+    'stats.user_categories': '''
+        SELECT c.name, SUM(history.tests), SUM(history.percentage_sum) / SUM(history.tests)
+        FROM (
+            SELECT category_id, COUNT(*) AS tests,
+                   SUM(correct_answers * 100.0 / total_questions) AS percentage_sum
+            FROM test_results
+            WHERE user_id = ?
+            GROUP BY category_id
+            UNION ALL
+            SELECT category_id, tests, percentage_sum
+            FROM result_rollups
+            WHERE user_id = ?
+        ) history
+        JOIN categories c ON history.category_id = c.id
+        GROUP BY c.name
+        ORDER BY 3 DESC
+    ''',
+    'stats.user_category_totals': '''
+        SELECT category_id, SUM(tests), SUM(percentage_sum)
+        FROM (
+            SELECT category_id, COUNT(*) AS tests,
+                   SUM(correct_answers * 100.0 / total_questions) AS percentage_sum
+            FROM test_results
+            WHERE user_id = ?
+            GROUP BY category_id
+            UNION ALL
+            SELECT category_id, tests, percentage_sum
+            FROM result_rollups
+            WHERE user_id = ?
+        ) history
+        GROUP BY category_id
+    ''',
+    'user_stats.recent': '''
+        SELECT test_date, category_id, total_questions, correct_answers, time_spent
+        FROM test_results
+        WHERE user_id = ?
+        ORDER BY test_date DESC, id DESC
+        LIMIT ?
+    ''',
+    # Бали рейтингу (правильні відповіді) станом на результат з id <= ?
+    'leaderboard.all_time': '''
+        SELECT user_id, SUM(points)
+        FROM (
+            SELECT user_id, SUM(correct_answers) AS points
+            FROM test_results
+            WHERE id <= ?
+            GROUP BY user_id
+            UNION ALL
+            SELECT user_id, SUM(correct_answers)
+            FROM result_rollups
+            GROUP BY user_id
+        ) history
+        GROUP BY user_id
+    ''',
+    'leaderboard.category': '''
+        SELECT user_id, SUM(points)
+        FROM (
+            SELECT user_id, SUM(correct_answers) AS points
+            FROM test_results
+            WHERE id <= ? AND category_id = ?
+            GROUP BY user_id
+            UNION ALL
+            SELECT user_id, correct_answers
+            FROM result_rollups
+            WHERE category_id = ?
+        ) history
+        GROUP BY user_id
+    ''',
+    'leaderboard.since': '''
+        SELECT user_id, SUM(correct_answers)
+        FROM test_results
+        WHERE id <= ? AND test_date >= ?
+        GROUP BY user_id
+    ''',
+    'leaderboard.last_result': "SELECT MAX(id) FROM test_results",
+    'user.names': "SELECT id, username FROM users WHERE id IN ({ids})",
+    'user_stats.get': '''
+        SELECT user_id, tests, total_questions, correct_answers, time_spent, percentage_sum,
+               categories, recent
+        FROM user_stats
+        WHERE user_id = ?
+    ''',
+    # Перечитування в транзакції запису результату (MySQL блокує рядок)
+    'user_stats.get_for_update': '''
+        SELECT user_id, tests, total_questions, correct_answers, time_spent, percentage_sum,
+               categories, recent
+        FROM user_stats
+        WHERE user_id = ?
+    ''',
+    'user_stats.save': '''
+        INSERT OR REPLACE INTO user_stats (user_id, tests, total_questions, correct_answers,
+                                           time_spent, percentage_sum, categories, recent)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'user_stats.delete': "DELETE FROM user_stats WHERE user_id = ?",
+    # Сесії API (див. session_store.py): відбір і очищення за індексом
+    # idx_user_sessions_expires, звірка - за унікальним токеном
+    'session.active': '''
+        SELECT s.session_token, s.expires_date, s.last_seen,
+               u.id, u.username, u.email, u.is_admin
+        FROM user_sessions s
+        JOIN users u ON s.user_id = u.id
+        WHERE s.expires_date > ? AND s.is_active = 1
+    ''',
+    'session.create': '''
+        INSERT INTO user_sessions (user_id, session_token, created_date,
+                                   expires_date, last_seen, is_active)
+        VALUES (?, ?, ?, ?, ?, 1)
+    ''',
+    'session.touch': '''
+        UPDATE user_sessions SET last_seen = ?, expires_date = ?
+        WHERE session_token = ?
+    ''',
+    'session.delete': "DELETE FROM user_sessions WHERE session_token = ?",
+    'session.users': '''
+        SELECT s.session_token, u.id, u.username, u.email, u.is_admin
+        FROM user_sessions s
+        JOIN users u ON s.user_id = u.id
+        WHERE s.session_token IN ({ids}) AND s.is_active = 1
+    ''',
+    'session.purge': "DELETE FROM user_sessions WHERE expires_date <= ?",
+}
+
+# Запити, яким повний перегляд таблиці не шкодить (довідники та вибірки з LIMIT)
+FULL_SCAN_ALLOWED = {'category.all', 'user.recent_credentials',
+                     # Рейтинги будуються з історії один раз, далі оновлюються інкрементно
+                     'leaderboard.all_time', 'leaderboard.category', 'leaderboard.since'}
+
+# Відмінності діалектів, які не зводяться до заміни позначок параметрів
+DIALECT_OVERRIDES = {
+    'mysql': {
+        'user_stats.get_for_update': '''
+            SELECT user_id, tests, total_questions, correct_answers, time_spent, percentage_sum,
+                   categories, recent
+            FROM user_stats
+            WHERE user_id = ?
+            FOR UPDATE
+        ''',
+        'user_stats.save': '''
+            REPLACE INTO user_stats (user_id, tests, total_questions, correct_answers,
+                                     time_spent, percentage_sum, categories, recent)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        'question.random_ids': '''
+            SELECT id
+            FROM questions
+            WHERE category_id = ?
+            ORDER BY RAND()
+            LIMIT ?
+        ''',
+    }
+}
+
+PLACEHOLDERS = {'sqlite': '?', 'mysql': '%s'}
+
+
+class StatementSet:
+    """Запити, перекладені для одного діалекту (один раз на процес)"""
+
+    def __init__(self, dialect: str):
+        if dialect not in PLACEHOLDERS:
+            raise ValueError(f"Непідтримуваний діалект бази даних: {dialect}")
+        self.dialect = dialect
+        self.placeholder = PLACEHOLDERS[dialect]
+        statements = dict(STATEMENTS, **DIALECT_OVERRIDES.get(dialect, {}))
+        self._statements = {name: re.sub(r'\?', lambda m: self.placeholder, sql)
+                            for name, sql in statements.items()}
+
+    def get(self, name: str, count: int = 0) -> str:
+        """Текст запиту; count - кількість елементів списку {ids}"""
+        sql = self._statements[name]
+        if count:
+            sql = sql.replace('{ids}', ','.join([self.placeholder] * count))
+        return sql
+
+
+_statement_sets: Dict[str, StatementSet] = {}
+_statement_lock = threading.Lock()
+
+
+def get_statements(dialect: str) -> StatementSet:
+    with _statement_lock:
+        if dialect not in _statement_sets:
+            _statement_sets[dialect] = StatementSet(dialect)
+        return _statement_sets[dialect]
+
+
+def check_query_plans(conn: sqlite3.Connection) -> List[str]:
+    """Запити, план яких (EXPLAIN QUERY PLAN) містить повний перегляд таблиці"""
+    statements = get_statements('sqlite')
+    warnings = []
+    for name in STATEMENTS:
+        sql = statements.get(name, count=1)
+        try:
+            plan = conn.execute("EXPLAIN QUERY PLAN " + sql,
+                                (None,) * sql.count('?')).fetchall()
+        except sqlite3.Error as e:
+            warnings.append(f"{name}: {e}")
+            continue
+        # Рядок плану: (id, parent, notused, detail); перегляд підзапиту - не таблиці
+        subqueries = {row[3].split()[-1] for row in plan
+                      if row[3].startswith(('MATERIALIZE ', 'CO-ROUTINE '))}
+        scans = [row[3] for row in plan
+                 if row[3].startswith('SCAN ') and 'INDEX' not in row[3]
+                 and row[3].split()[1] not in subqueries]
+        if scans and name not in FULL_SCAN_ALLOWED:
+            warnings.append(f"{name}: {'; '.join(scans)}")
+    return warnings
+
+
+def _number(value) -> Optional[float]:
+    # MySQL повертає Decimal для AVG/SUM
+    return float(value) if value is not None else None
+
+
+class Repository:
+    """Базовий репозиторій над менеджером бази з методом get_connection()"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.dialect = getattr(backend, 'dialect', 'sqlite')
+        self.statements = get_statements(self.dialect)
+
+    def sql(self, name: str, count: int = 0) -> str:
+        return self.statements.get(name, count)
+
+    def fetch_all(self, name: str, params: Sequence = (), count: int = 0) -> List[Tuple]:
+        with self.backend.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self.sql(name, count), tuple(params))
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def fetch_one(self, name: str, params: Sequence = ()) -> Optional[Tuple]:
+        rows = self.fetch_all(name, params)
+        return rows[0] if rows else None
+
+
+class UserRepository(Repository):
+    """Облікові записи користувачів"""
+
+    def get_credentials(self, username: str) -> Optional[Tuple]:
+        """(id, username, email, password_hash, is_admin) або None"""
+        return self.fetch_one('user.credentials', (username,))
+
+    def get_recent_credentials(self, limit: int) -> List[Tuple]:
+        return self.fetch_all('user.recent_credentials', (limit,))
+
+    def is_admin(self, user_id: int) -> Optional[bool]:
+        """Поточний статус адміністратора (None - користувача видалено)"""
+        row = self.fetch_one('user.is_admin', (user_id,))
+        return bool(row[0]) if row else None
+
+    def create(self, username: str, password_hash: str, email: str = "") -> bool:
+        """Створення користувача; False, якщо ім'я вже зайняте"""
+        try:
+            with self.backend.get_connection() as conn:
+                conn.cursor().execute(self.sql('user.create'), (username, password_hash, email))
+            return True
+        except INTEGRITY_ERRORS:
+            return False
+
+    def set_password(self, user_id: int, password_hash: str):
+        with self.backend.get_connection() as conn:
+            conn.cursor().execute(self.sql('user.set_password'), (password_hash, user_id))
+
+    def replace_password(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """Заміна хешу, лише якщо його не змінили паралельно"""
+        with self.backend.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self.sql('user.replace_password'), (new_hash, user_id, old_hash))
+            return cursor.rowcount > 0
+
+
+class QuestionRepository(Repository):
+    """Категорії та питання"""
+
+    def get_categories(self) -> List[Tuple[int, str, str]]:
+        return self.fetch_all('category.all')
+
+    def get_random_ids(self, category_id: int, limit: int) -> List[int]:
+        return [row[0] for row in self.fetch_all('question.random_ids', (category_id, limit))]
+
+    def get_many(self, question_ids: Sequence[int]) -> List[Tuple]:
+        """Рядки питань за ідентифікаторами одним запитом"""
+        if not question_ids:
+            return []
+        return self.fetch_all('question.by_ids', question_ids, len(question_ids))
+
+
+class ResultRepository(Repository):
+    """Результати тестів і детальні відповіді"""
+
+    def save(self, user_id: int, category_id: int, total_questions: int, correct_answers: int,
+             time_spent: int, details: Sequence[Tuple], on_saved=None) -> int:
+        """Запис результату з відповідями однією транзакцією; повертає id результату
+
+        details - кортежі (question_id, user_answer, is_correct, time_spent).
+        on_saved(cursor, rows) викликається в тій самій транзакції.
+        """
+        with self.backend.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self.sql('result.create'),
+                           (user_id, category_id, total_questions, correct_answers, time_spent))
+            test_result_id = cursor.lastrowid
+
+            rows = [(test_result_id,) + tuple(detail) for detail in details]
+            cursor.executemany(self.sql('result.add_answers'), rows)
+            if on_saved:
+                on_saved(cursor, rows)
+        return test_result_id
+
+    def get_history(self, user_id: int, limit: int = 20) -> List[Tuple]:
+        """Останні результати: (дата, категорія, питань, правильно, час)"""
+        return self.get_history_page(user_id, None, limit)[0]
+
+    def get_history_page(self, user_id: int, after: Optional[Tuple] = None,
+                         limit: int = 50) -> Tuple[List[Tuple], Optional[Tuple]]:
+        """Сторінка історії після курсора after; повертає (рядки, курсор наступної сторінки)
+
+        Курсор - (дата, id) останнього рядка; None, якщо далі результатів немає.
+        """
+        if after is None:
+            rows = self.fetch_all('result.history', (user_id, limit))
+        else:
+            test_date, result_id = after
+            rows = self.fetch_all('result.history_after',
+                                  (user_id, test_date, test_date, result_id, limit))
+        next_cursor = (rows[-1][0], rows[-1][5]) if len(rows) == limit else None
+        return [(str(row[0]),) + row[1:5] for row in rows], next_cursor
+
+
+class StatisticsRepository(Repository):
+    """Статистика користувача"""
+
+    def get_user_summary(self, user_id: int) -> Tuple[int, Optional[float], int]:
+        """(кількість тестів, середній відсоток, загальний час)"""
+        count, _, _, total_time, average = self.fetch_one('stats.user_summary',
+                                                          (user_id, user_id))
+        return int(count or 0), _number(average), int(total_time or 0)
+
+    def get_user_totals(self, user_id: int) -> Tuple[int, int, int, int]:
+        """(кількість тестів, питань, правильних відповідей, загальний час)"""
+        count, questions, correct, total_time, _ = self.fetch_one('stats.user_summary',
+                                                                   (user_id, user_id))
+        return int(count or 0), int(questions or 0), int(correct or 0), int(total_time or 0)
+
+    def get_user_categories(self, user_id: int) -> List[Tuple[str, int, float]]:
+        """(категорія, кількість тестів, середній відсоток) по категоріях"""
+        return [(name, int(count), _number(average))
+                for name, count, average in self.fetch_all('stats.user_categories',
+                                                           (user_id, user_id))]
+
+
+class UserStatsRepository(Repository):
+    """Збережені зведення статистики користувачів (див. user_stats.py)"""
+
+    def get(self, user_id: int, cursor=None) -> Optional[Tuple]:
+        """Зведення; з cursor - у відкритій транзакції запису"""
+        if cursor is not None:
+            cursor.execute(self.sql('user_stats.get_for_update'), (user_id,))
+            return cursor.fetchone()
+        return self.fetch_one('user_stats.get', (user_id,))
+
+    def save(self, row: Tuple, cursor=None):
+        """Запис зведення; з cursor - у вже відкритій транзакції"""
+        if cursor is not None:
+            cursor.execute(self.sql('user_stats.save'), row)
+            return
+        with self.backend.get_connection() as conn:
+            conn.cursor().execute(self.sql('user_stats.save'), row)
+
+    def get_recent(self, user_id: int, limit: int) -> List[Tuple]:
+        """Останні тести: (дата, категорія, питань, правильно, час), новіші першими"""
+        return [(str(row[0]),) + row[1:]
+                for row in self.fetch_all('user_stats.recent', (user_id, limit))]
+
+    def get_category_totals(self, user_id: int) -> List[Tuple[int, int, float]]:
+        """(категорія, кількість тестів, сума відсотків) за всю історію"""
+        return [(category_id, int(tests), float(percentage_sum))
+                for category_id, tests, percentage_sum in
+                self.fetch_all('stats.user_category_totals', (user_id, user_id))]
+
+
+class LeaderboardRepository(Repository):
+    """Початкові бали рейтингів (далі рейтинги оновлюються в пам'яті)"""
+
+    def get_last_result_id(self) -> int:
+        row = self.fetch_one('leaderboard.last_result')
+        return row[0] or 0
+
+    def get_points(self, last_result_id: int, category_id: Optional[int] = None,
+                   since: Optional[str] = None) -> Dict[int, int]:
+        """Бали користувачів: за весь час, у категорії або з дати since"""
+        if category_id is not None:
+            rows = self.fetch_all('leaderboard.category',
+                                  (last_result_id, category_id, category_id))
+        elif since is not None:
+            rows = self.fetch_all('leaderboard.since', (last_result_id, since))
+        else:
+            rows = self.fetch_all('leaderboard.all_time', (last_result_id,))
+        return {user_id: int(points or 0) for user_id, points in rows}
+
+    def get_usernames(self, user_ids: Sequence[int]) -> Dict[int, str]:
+        if not user_ids:
+            return {}
+        return dict(self.fetch_all('user.names', user_ids, len(user_ids)))
+
+
+class SessionRepository(Repository):
+    """Токени сесій серверного режиму"""
+
+    # Обмеження кількості параметрів в одному запиті зі списком
+    BATCH_SIZE = 500
+
+    def _execute_many(self, name: str, rows: Sequence[Tuple]):
+        with self.backend.get_connection() as conn:
+            conn.cursor().executemany(self.sql(name), list(rows))
+
+    def get_active(self, now: str) -> List[Tuple]:
+        """(токен, термін дії, остання активність, id, ім'я, email, is_admin)"""
+        return self.fetch_all('session.active', (now,))
+
+    def create(self, user_id: int, token: str, created: str, expires: str):
+        with self.backend.get_connection() as conn:
+            conn.cursor().execute(self.sql('session.create'),
+                                  (user_id, token, created, expires, created))
+
+    def touch(self, updates: Sequence[Tuple[str, str, str]]):
+        """Пакетне оновлення (остання активність, термін дії, токен)"""
+        self._execute_many('session.touch', updates)
+
+    def delete(self, tokens: Sequence[str]):
+        self._execute_many('session.delete', [(token,) for token in tokens])
+
+    def get_users(self, tokens: Sequence[str]) -> Dict[str, Tuple]:
+        """Активні з переданих токенів: токен -> (id, ім'я, email, is_admin)"""
+        tokens = list(tokens)
+        result = {}
+        for start in range(0, len(tokens), self.BATCH_SIZE):
+            batch = tokens[start:start + self.BATCH_SIZE]
+            for row in self.fetch_all('session.users', batch, len(batch)):
+                result[row[0]] = row[1:]
+        return result
+
+    def purge(self, now: str) -> int:
+        """Видалення прострочених рядків (зокрема деактивованих адмін-панеллю)"""
+        with self.backend.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self.sql('session.purge'), (now,))
+            return max(cursor.rowcount, 0)
+
+
+class Repositories:
+    """Набір репозиторіїв над одним менеджером бази"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.dialect = getattr(backend, 'dialect', 'sqlite')
+        self.users = UserRepository(backend)
+        self.questions = QuestionRepository(backend)
+        self.results = ResultRepository(backend)
+        self.statistics = StatisticsRepository(backend)
+        self.user_stats = UserStatsRepository(backend)
+        self.leaderboard = LeaderboardRepository(backend)
+        self.sessions = SessionRepository(backend)
+
+
+def create_backend(backend: Optional[str] = None, db_name: Optional[str] = None,
+                   pool_size: int = 0):
+    """Менеджер бази даних, обраний у конфігурації (DATABASE_CONFIG['backend'])
+
+    db_name і pool_size стосуються лише SQLite: MySQL налаштовується
+    в DATABASE_CONFIG['mysql'] і завжди працює через пул.
+    """
+    backend = backend or config.DATABASE_CONFIG['backend']
+    if backend == 'mysql':
+        from database_mysql import MySQLDatabaseManager
+        return MySQLDatabaseManager()
+    if backend == 'sqlite':
+        from main import DatabaseManager
+        return DatabaseManager(db_name or config.DATABASE_CONFIG['sqlite']['db_name'],
+                               pool_size=pool_size)
+    raise ValueError(f"Непідтримуваний тип бази даних: {backend}")
+
+
+def _parity_scenario(repos: Repositories) -> Dict[str, Any]:
+    """Однаковий набір операцій; результат не містить даних, що залежать від часу"""
+    users, questions, results, statistics = (
+        repos.users, repos.questions, repos.results, repos.statistics)
+    outcome: Dict[str, Any] = {}
+
+    outcome['create'] = users.create('parity_user', 'hash-1', 'parity@example.com')
+    outcome['create_duplicate'] = users.create('parity_user', 'hash-2')
+    credentials = users.get_credentials('parity_user')
+    user_id = credentials[0]
+    outcome['credentials'] = credentials[1:4] + (bool(credentials[4]),)
+    outcome['replace_stale'] = users.replace_password(user_id, 'wrong-hash', 'hash-3')
+    outcome['replace'] = users.replace_password(user_id, 'hash-1', 'hash-3')
+    users.set_password(user_id, 'hash-4')
+    outcome['password'] = users.get_credentials('parity_user')[3]
+    outcome['recent'] = [row[1] for row in users.get_recent_credentials(5)]
+
+    outcome['categories'] = questions.get_categories()
+    category_id = outcome['categories'][0][0]
+    ids = questions.get_random_ids(category_id, 100)
+    outcome['category_question_ids'] = sorted(ids)
+    outcome['questions'] = sorted(questions.get_many(ids))
+
+    details = [(question_id, 'відповідь', i % 2 == 0, 5 + i)
+               for i, question_id in enumerate(sorted(ids))]
+    results.save(user_id, category_id, len(details), sum(d[2] for d in details), 42, details)
+    # Другий результат у ту саму секунду: сторінки розрізняються лише за id
+    results.save(user_id, category_id, len(details), 1, 7, details[:1])
+    outcome['history'] = [row[1:] for row in results.get_history(user_id)]
+    _, cursor = results.get_history_page(user_id, None, 1)
+    outcome['history_after'] = [row[1:] for row in
+                                results.get_history_page(user_id, cursor, 1)[0]]
+    outcome['summary'] = statistics.get_user_summary(user_id)
+    outcome['by_category'] = statistics.get_user_categories(user_id)
+    outcome['is_admin'] = (users.is_admin(user_id), users.is_admin(-1))
+
+    user_stats = repos.user_stats
+    outcome['user_stats_missing'] = user_stats.get(user_id)
+    user_stats.save((user_id, 1, 3, 2, 42, 66.5, '{}', '[]'))
+    # Повторний запис замінює рядок (REPLACE INTO у MySQL)
+    user_stats.save((user_id, 2, 4, 3, 49, 91.5, '{"1": [2, 91.5]}', '[]'))
+    with repos.backend.get_connection() as conn:
+        outcome['user_stats_for_update'] = user_stats.get(user_id, conn.cursor())
+    outcome['user_stats'] = user_stats.get(user_id)
+    outcome['user_stats_recent'] = [row[1:] for row in user_stats.get_recent(user_id, 5)]
+    outcome['user_stats_totals'] = user_stats.get_category_totals(user_id)
+
+    leaderboard = repos.leaderboard
+    last_result_id = leaderboard.get_last_result_id()
+    outcome['leaderboard_all_time'] = leaderboard.get_points(last_result_id)
+    outcome['leaderboard_category'] = leaderboard.get_points(last_result_id, category_id)
+    outcome['leaderboard_since'] = leaderboard.get_points(last_result_id,
+                                                          since='2000-01-01')
+    outcome['user_names'] = (leaderboard.get_usernames([user_id]),
+                             leaderboard.get_usernames([]))
+
+    sessions = repos.sessions
+    sessions.create(user_id, 'parity-token-1', '2000-01-01 00:00:00', '2999-01-01 00:00:00')
+    sessions.create(user_id, 'parity-token-2', '2000-01-01 00:00:00', '2000-01-02 00:00:00')
+    sessions.touch([('2000-01-01 00:00:00', '2999-01-02 00:00:00', 'parity-token-2')])
+    # Час MySQL повертає як datetime, тому порівнюються лише токени та користувачі
+    outcome['sessions_active'] = sorted((row[0],) + row[3:] for row in
+                                        sessions.get_active('2001-01-01 00:00:00'))
+    sessions.delete(['parity-token-1'])
+    outcome['sessions_users'] = sessions.get_users(['parity-token-1', 'parity-token-2'])
+    outcome['sessions_purged'] = sessions.purge('2999-01-01 12:00:00')
+    return outcome
+
+
+def run_parity_check(real_mysql: bool = False) -> bool:
+    """Перевірка, що репозиторії дають однакові результати на SQLite і на MySQL
+
+    Без real_mysql замість сервера MySQL використовується локальна
+    обгортка SQLite, яка приймає запити діалекту MySQL. Схема при цьому
+    створюється як для SQLite, тож DDL для MySQL (MySQLDatabaseManager.init_database)
+    перевіряється лише з real_mysql.
+    """
+    from database_mysql import MySQLDatabaseManager, SQLiteCompatConnection
+    from main import DatabaseManager
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sqlite_backend = DatabaseManager(os.path.join(workdir, 'parity_sqlite.db'))
+        if real_mysql:
+            mysql_backend = MySQLDatabaseManager()
+        else:
+            mysql_backend = MySQLDatabaseManager(SQLiteCompatConnection.factory(
+                os.path.join(workdir, 'parity_mysql.db'), dialect='mysql'))
+
+        try:
+            expected = _parity_scenario(Repositories(sqlite_backend))
+            actual = _parity_scenario(Repositories(mysql_backend))
+        finally:
+            sqlite_backend.close_connection()
+            mysql_backend.close_connection()
+
+    mismatches = [name for name in expected if expected[name] != actual.get(name)]
+    for name in expected:
+        status = "розбіжність" if name in mismatches else "ok"
+        print(f"  {name}: {status}")
+        if name in mismatches:
+            print(f"    SQLite: {expected[name]!r}\n    MySQL:  {actual.get(name)!r}")
+    return not mismatches
+
+
+def main():
+    """Перевірка паритету репозиторіїв з командного рядка"""
+    parser = argparse.ArgumentParser(description="Шар репозиторіїв бази даних")
+    parser.add_argument('--parity', action='store_true',
+                        help="порівняти результати запитів на SQLite та MySQL")
+    parser.add_argument('--real-mysql', action='store_true',
+                        help="використати сервер MySQL з конфігурації замість локальної заміни "
+                             "(лише так перевіряється схема MySQL)")
+    parser.add_argument('--explain', metavar='DB',
+                        help="перевірити плани запитів на базі SQLite")
+    args = parser.parse_args()
+
+    if args.explain:
+        # sqlite3.connect створив би порожню базу замість відсутньої
+        if not os.path.isfile(args.explain):
+            parser.error(f"базу не знайдено: {args.explain}")
+        path = urllib.request.pathname2url(os.path.abspath(args.explain))
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            warnings = check_query_plans(conn)
+        finally:
+            conn.close()
+        for warning in warnings:
+            print(f"  {warning}")
+        print(f"Повних переглядів: {len(warnings)} з {len(STATEMENTS)} запитів")
+        sys.exit(1 if warnings else 0)
+    if not args.parity:
+        parser.print_help()
+        return
+    ok = run_parity_check(args.real_mysql)
+    print("Паритет підтверджено" if ok else "Виявлено розбіжності")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
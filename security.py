@@ -0,0 +1,357 @@
+"""
+Засоби безпеки входу: хешування паролів, обмеження спроб та кеш облікових даних
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, NamedTuple, Optional, Tuple
+
+from config import config
+
+
+logger = logging.getLogger(__name__)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+def _elapsed_ms(func: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+class PBKDF2Hasher:
+    """PBKDF2-HMAC-SHA256, формат: pbkdf2_sha256$<ітерації>$<сіль>$<хеш>"""
+
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations: int = 200000):
+        self.iterations = iterations
+
+    def _derive(self, password: str, salt: bytes, iterations: int) -> bytes:
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+    def calibrate(self, target_ms: float, min_iterations: int):
+        """Підбір кількості ітерацій під цільовий час перевірки"""
+        probe = 20000
+        elapsed = _elapsed_ms(lambda: self._derive('calibration', b'salt', probe))
+        iterations = int(probe * target_ms / max(elapsed, 0.01)) // 1000 * 1000
+        self.iterations = max(min_iterations, iterations)
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(16)
+        digest = self._derive(password, salt, self.iterations)
+        return f"{self.algorithm}${self.iterations}${_b64encode(salt)}${_b64encode(digest)}"
+
+    def verify(self, password: str, encoded: str) -> bool:
+        try:
+            _, iterations, salt, digest = encoded.split('$')
+            expected = _b64decode(digest)
+            actual = self._derive(password, _b64decode(salt), int(iterations))
+        except ValueError:
+            return False
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        # Дрібні коливання калібрування між запусками не викликають перехешування
+        iterations = int(encoded.split('$')[1])
+        return iterations * 2 <= self.iterations
+
+
+class ScryptHasher:
+    """scrypt, формат: scrypt$<n>$<r>$<p>$<сіль>$<хеш>"""
+
+    algorithm = 'scrypt'
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1):
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+    def calibrate(self, target_ms: float, min_n: int):
+        """Підбір параметра n (степінь двійки) під цільовий час перевірки"""
+        n = 2 ** 12
+        while n < 2 ** 20:
+            if _elapsed_ms(lambda: self._derive('calibration', b'salt', n, self.r, self.p)) >= target_ms:
+                break
+            n *= 2
+        self.n = max(min_n, n)
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(16)
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return (f"{self.algorithm}${self.n}${self.r}${self.p}$"
+                f"{_b64encode(salt)}${_b64encode(digest)}")
+
+    def verify(self, password: str, encoded: str) -> bool:
+        try:
+            _, n, r, p, salt, digest = encoded.split('$')
+            expected = _b64decode(digest)
+            actual = self._derive(password, _b64decode(salt), int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        n = int(encoded.split('$')[1])
+        return n * 2 <= self.n
+
+
+class PasswordHasher:
+    """Хешування паролів з підтримкою кількох алгоритмів
+
+    Нові паролі хешуються алгоритмом за замовчуванням, перевірка виконується
+    алгоритмом, вказаним у збереженому хеші. Старі хеші SHA-256 без солі
+    (64 шістнадцяткові символи) перевіряються та позначаються для оновлення.
+    """
+
+    HASHERS = {
+        PBKDF2Hasher.algorithm: PBKDF2Hasher,
+        ScryptHasher.algorithm: ScryptHasher
+    }
+
+    def __init__(self, algorithm: str = PBKDF2Hasher.algorithm):
+        if algorithm not in self.HASHERS:
+            raise ValueError(f"Непідтримуваний алгоритм хешування: {algorithm}")
+        self.hashers = {name: cls() for name, cls in self.HASHERS.items()}
+        self.default = self.hashers[algorithm]
+
+    def calibrate(self, target_ms: float, min_cost: int):
+        """Калібрування вартості алгоритму за замовчуванням"""
+        self.default.calibrate(target_ms, min_cost)
+
+    @staticmethod
+    def is_legacy(encoded: str) -> bool:
+        return '$' not in encoded
+
+    def hash(self, password: str) -> str:
+        return self.default.hash(password)
+
+    def verify(self, password: str, encoded: str) -> bool:
+        if self.is_legacy(encoded):
+            legacy = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(legacy, encoded)
+
+        hasher = self.hashers.get(encoded.split('$', 1)[0])
+        return hasher is not None and hasher.verify(password, encoded)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """Чи потрібно оновити хеш (старий формат, інший алгоритм або мала вартість)"""
+        if self.is_legacy(encoded) or not encoded.startswith(self.default.algorithm + '$'):
+            return True
+        try:
+            return self.default.needs_rehash(encoded)
+        except ValueError:
+            return True
+
+
+class CachedCredentials(NamedTuple):
+    """Облікові дані користувача, потрібні для перевірки входу"""
+    user_id: int
+    username: str
+    email: str
+    password_hash: str
+    is_admin: bool
+
+
+class CredentialCache:
+    """LRU-кеш облікових даних: ім'я користувача -> CachedCredentials
+
+    Записи старші за ttl_seconds не повертаються: адмін-панель та інші процеси
+    змінюють користувачів напряму в базі, минаючи цей кеш.
+    """
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[CachedCredentials, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username: str) -> Optional[CachedCredentials]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[username]
+                return None
+            self._entries.move_to_end(username)
+            return entry[0]
+
+    def put(self, credentials: CachedCredentials):
+        with self._lock:
+            self._entries[credentials.username] = (credentials, time.monotonic())
+            self._entries.move_to_end(credentials.username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str):
+        """Видалення запису за ім'ям користувача"""
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def invalidate_user_id(self, user_id: int):
+        """Видалення запису за ідентифікатором (зміна статусу адміна, видалення)"""
+        with self._lock:
+            for username, (entry, _) in list(self._entries.items()):
+                if entry.user_id == user_id:
+                    del self._entries[username]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class LoginLockoutTracker:
+    """Лічильник невдалих спроб входу з ковзним вікном
+
+    Якщо за останні window_seconds зафіксовано max_attempts невдалих спроб,
+    вхід блокується на lockout_seconds без звернення до бази даних.
+    """
+
+    def __init__(self, max_attempts: int = 5, lockout_seconds: int = 900,
+                 window_seconds: Optional[int] = None):
+        self.max_attempts = max_attempts
+        self.lockout_seconds = lockout_seconds
+        self.window_seconds = window_seconds or lockout_seconds
+        self._failures: Dict[str, Deque[float]] = {}
+        self._locked_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get_remaining_lockout(self, username: str) -> int:
+        """Скільки секунд залишилось до розблокування (0 - не заблоковано)"""
+        with self._lock:
+            locked_until = self._locked_until.get(username)
+            if locked_until is None:
+                return 0
+            remaining = locked_until - time.monotonic()
+            if remaining <= 0:
+                del self._locked_until[username]
+                return 0
+            return int(remaining) + 1
+
+    def register_failure(self, username: str):
+        """Фіксація невдалої спроби"""
+        now = time.monotonic()
+        with self._lock:
+            failures = self._failures.setdefault(username, deque())
+            failures.append(now)
+            while failures and failures[0] < now - self.window_seconds:
+                failures.popleft()
+
+            if len(failures) >= self.max_attempts:
+                self._locked_until[username] = now + self.lockout_seconds
+                failures.clear()
+
+            if len(self._failures) > 10000:
+                self._prune(now)
+
+    def register_success(self, username: str):
+        """Скидання лічильника після успішного входу"""
+        with self._lock:
+            self._failures.pop(username, None)
+            self._locked_until.pop(username, None)
+
+    def _prune(self, now: float):
+        """Видалення застарілих записів, щоб обмежити використання пам'яті"""
+        cutoff = now - self.window_seconds
+        for username in [u for u, f in self._failures.items() if not f or f[-1] < cutoff]:
+            del self._failures[username]
+        for username in [u for u, t in self._locked_until.items() if t <= now]:
+            del self._locked_until[username]
+
+
+# Кеш і лічильники спільні для всіх менеджерів, що працюють з однією базою
+_credential_caches: Dict[str, CredentialCache] = {}
+_lockout_trackers: Dict[str, LoginLockoutTracker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_credential_cache(db_name: str) -> CredentialCache:
+    """Спільний кеш облікових даних для бази"""
+    with _registry_lock:
+        if db_name not in _credential_caches:
+            _credential_caches[db_name] = CredentialCache(
+                config.SECURITY_CONFIG['credential_cache_size'],
+                config.SECURITY_CONFIG['credential_cache_ttl_seconds'])
+        return _credential_caches[db_name]
+
+
+def get_lockout_tracker(db_name: str) -> LoginLockoutTracker:
+    """Спільний лічильник невдалих спроб входу для бази"""
+    with _registry_lock:
+        if db_name not in _lockout_trackers:
+            security_config = config.SECURITY_CONFIG
+            _lockout_trackers[db_name] = LoginLockoutTracker(
+                security_config['max_login_attempts'],
+                security_config['lockout_duration_minutes'] * 60)
+        return _lockout_trackers[db_name]
+
+
+_password_hasher: Optional[PasswordHasher] = None
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Спільний хешувальник, відкалібрований при першому зверненні"""
+    global _password_hasher
+    with _hasher_lock:
+        if _password_hasher is None:
+            security_config = config.SECURITY_CONFIG
+            algorithm = security_config['password_hash_algorithm']
+            hasher = PasswordHasher(algorithm)
+            hasher.calibrate(security_config['password_hash_target_ms'],
+                             security_config['password_hash_min_cost'][algorithm])
+            logger.info(f"Хешування паролів: {hasher.default.algorithm}, "
+                        f"параметри {vars(hasher.default)}")
+            _password_hasher = hasher
+        return _password_hasher
+
+
+def get_hash_executor() -> ThreadPoolExecutor:
+    """Пул потоків для хешування, щоб не блокувати інтерфейс чи обробку запитів
+
+    Обмежена кількість потоків тримає час входу передбачуваним під навантаженням:
+    надлишкові запити чекають у черзі замість конкуренції за процесор.
+    """
+    global _hash_executor
+    with _hasher_lock:
+        if _hash_executor is None:
+            workers = config.SECURITY_CONFIG['password_hash_workers'] or min(4, os.cpu_count() or 1)
+            _hash_executor = ThreadPoolExecutor(max_workers=workers,
+                                                thread_name_prefix='password-hash')
+        return _hash_executor
+
+
+def hash_password(password: str) -> str:
+    """Хешування паролю поточним алгоритмом"""
+    return get_password_hasher().hash(password)
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Перевірка паролю за збереженим хешем будь-якого підтримуваного формату"""
+    return get_password_hasher().verify(password, encoded)
+
+
+def submit_hash_task(func: Callable, *args) -> Future:
+    """Виконання хешування у пулі потоків"""
+    return get_hash_executor().submit(func, *args)
@@ -0,0 +1,257 @@
+"""
+Початкові дані та завантаження наборів питань (seed packs) для SQLite і MySQL
+"""
+
+import argparse
+import json
+import os
+from itertools import islice
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config import config
+from repositories import get_statements
+
+
+# Вбудований набір: однаковий для SQLite та MySQL
+SEED_CATEGORIES = [
+    ("Основи програмування", "Базові концепції програмування"),
+    ("Алгоритми та структури даних",
+     "Алгоритми сортування, пошуку, структури даних"),
+    ("Бази даних", "SQL, реляційні бази даних"),
+    ("Мережі та Інтернет", "Протоколи, архітектура мереж"),
+    ("Операційні системи", "Принципи роботи ОС"),
+    ("Інформаційна безпека", "Криптографія, захист інформації"),
+    ("Веб-технології", "HTML, CSS, JavaScript"),
+    ("Об'єктно-орієнтоване програмування",
+     "Класи, об'єкти, наслідування")
+]
+
+# (категорія, текст, тип, правильна відповідь, варіанти JSON, складність, пояснення)
+SEED_QUESTIONS = [
+    # Основи програмування
+    ("Основи програмування", "Що таке змінна в програмуванні?", "multiple_choice", "Іменована область пам'яті для зберігання даних",
+     '["Іменована область пам\'яті для зберігання даних", "Функція для обчислень", "Цикл виконання", "Умовний оператор"]', 1,
+     "Змінна - це іменована область пам'яті, яка використовується для зберігання даних"),
+
+    ("Основи програмування", "Python є інтерпретованою мовою програмування", "true_false", "True", None, 1,
+     "Python дійсно є інтерпретованою мовою програмування"),
+
+    ("Основи програмування", "Який оператор використовується для присвоєння в Python?", "text_input", "=", None, 1,
+     "Оператор = використовується для присвоєння значень змінним"),
+
+    ("Основи програмування", "Що виведе код: print(2 ** 3)?", "multiple_choice", "8",
+     '["6", "8", "9", "16"]', 2,
+     "Оператор ** означає піднесення до степеня, тому 2**3 = 8"),
+
+    ("Основи програмування", "Які з наступних є коментарями в Python?", "multiple_choice", "# Це коментар",
+     '["# Це коментар", "// Це коментар", "/* Це коментар */", "<!-- Це коментар -->"]', 1,
+     "В Python коментарі починаються з символу #"),
+
+    # Алгоритми та структури даних
+    ("Алгоритми та структури даних", "Яка складність алгоритму бульбашкового сортування?", "multiple_choice", "O(n²)",
+     '["O(n)", "O(n²)", "O(log n)", "O(n log n)"]', 2,
+     "Бульбашкове сортування має квадратичну складність O(n²)"),
+
+    ("Алгоритми та структури даних", "Стек працює за принципом LIFO", "true_false", "True", None, 2,
+     "LIFO (Last In, First Out) - останній прийшов, перший пішов"),
+
+    ("Алгоритми та структури даних", "Яка структура даних використовується для реалізації рекурсії?", "multiple_choice", "Стек",
+     '["Черга", "Стек", "Список", "Дерево"]', 2,
+     "Рекурсія використовує стек викликів для збереження контексту функцій"),
+
+    ("Алгоритми та структури даних", "Бінарний пошук працює тільки з відсортованими масивами", "true_false", "True", None, 2,
+     "Бінарний пошук вимагає відсортованого масиву для коректної роботи"),
+
+    ("Алгоритми та структури даних", "Яка складність пошуку в хеш-таблиці в середньому випадку?", "multiple_choice", "O(1)",
+     '["O(1)", "O(log n)", "O(n)", "O(n²)"]', 3,
+     "Хеш-таблиця забезпечує константний час пошуку O(1) в середньому випадку"),
+
+    # Бази даних
+    ("Бази даних", "Що означає SQL?", "text_input", "Structured Query Language", None, 1,
+     "SQL - Structured Query Language, мова структурованих запитів"),
+
+    ("Бази даних", "Який оператор використовується для вибірки даних?", "multiple_choice", "SELECT",
+     '["INSERT", "SELECT", "UPDATE", "DELETE"]', 1,
+     "SELECT використовується для вибірки даних з таблиць"),
+
+    ("Бази даних", "Первинний ключ може містити NULL значення", "true_false", "False", None, 2,
+     "Первинний ключ не може містити NULL значення та повинен бути унікальним"),
+
+    ("Бази даних", "Яка команда використовується для створення нової таблиці?", "multiple_choice", "CREATE TABLE",
+     '["CREATE TABLE", "NEW TABLE", "ADD TABLE", "MAKE TABLE"]', 1,
+     "CREATE TABLE використовується для створення нових таблиць"),
+
+    ("Бази даних", "Що таке нормалізація бази даних?", "multiple_choice", "Процес організації даних для зменшення надмірності",
+     '["Процес організації даних для зменшення надмірності", "Процес видалення даних", "Процес шифрування даних", "Процес резервного копіювання"]', 3,
+     "Нормалізація - це процес структурування бази даних для зменшення надмірності та покращення цілісності"),
+
+    # Мережі та Інтернет
+    ("Мережі та Інтернет", "HTTP працює на якому рівні моделі OSI?", "multiple_choice", "Прикладному",
+     '["Фізичному", "Канальному", "Мережевому", "Прикладному"]', 2,
+     "HTTP працює на прикладному (7-му) рівні моделі OSI"),
+
+    ("Мережі та Інтернет", "IP-адреса складається з 4 октетів", "true_false", "True", None, 1,
+     "IPv4 адреса дійсно складається з 4 октетів по 8 біт кожен"),
+
+    ("Мережі та Інтернет", "Який протокол використовується для надійної передачі даних?", "multiple_choice", "TCP",
+     '["UDP", "TCP", "ICMP", "ARP"]', 2,
+     "TCP (Transmission Control Protocol) забезпечує надійну передачу даних"),
+
+    ("Мережі та Інтернет", "Що означає DNS?", "text_input", "Domain Name System", None, 2,
+     "DNS - Domain Name System, система доменних імен"),
+
+    ("Мережі та Інтернет", "HTTPS використовує шифрування", "true_false", "True", None, 2,
+     "HTTPS використовує SSL/TLS шифрування для безпечної передачі даних"),
+
+    # Операційні системи
+    ("Операційні системи", "Що таке процес в ОС?", "multiple_choice", "Програма в стані виконання",
+     '["Файл на диску", "Програма в стані виконання", "Системний виклик", "Драйвер пристрою"]', 2,
+     "Процес - це програма, яка завантажена в пам'ять і виконується"),
+
+    ("Операційні системи", "Deadlock може виникнути при роботі з ресурсами", "true_false", "True", None, 3,
+     "Deadlock (взаємне блокування) виникає коли процеси чекають один одного"),
+
+    ("Операційні системи", "Яка команда в Linux показує запущені процеси?", "multiple_choice", "ps",
+     '["ls", "ps", "cd", "mkdir"]', 2,
+     "Команда ps показує список запущених процесів"),
+
+    ("Операційні системи", "Віртуальна пам'ять дозволяє використовувати більше пам'яті ніж фізично доступно", "true_false", "True", None, 2,
+     "Віртуальна пам'ять використовує диск як розширення оперативної пам'яті"),
+
+    # Інформаційна безпека
+    ("Інформаційна безпека", "Що таке хешування?", "multiple_choice", "Перетворення даних у фіксований розмір",
+     '["Шифрування даних", "Перетворення даних у фіксований розмір", "Стиснення файлів", "Резервне копіювання"]', 2,
+     "Хешування - це перетворення вхідних даних у рядок фіксованого розміру"),
+
+    ("Інформаційна безпека", "Симетричне шифрування використовує один ключ для шифрування та розшифрування", "true_false", "True", None, 2,
+     "При симетричному шифруванні один і той же ключ використовується для обох операцій"),
+
+    ("Інформаційна безпека", "Що таке фішинг?", "multiple_choice", "Спроба отримати конфіденційну інформацію обманним шляхом",
+     '["Вірус", "Спроба отримати конфіденційну інформацію обманним шляхом", "Тип шифрування", "Мережевий протокол"]', 2,
+     "Фішинг - це соціальна інженерія для крадіжки особистих даних"),
+
+    ("Інформаційна безпека", "Яка довжина ключа вважається безпечною для AES?", "multiple_choice", "256 біт",
+     '["64 біт", "128 біт", "256 біт", "512 біт"]', 3,
+     "AES-256 вважається найбільш безпечним варіантом")
+]
+
+
+class SeedPack(NamedTuple):
+    """Набір початкових даних: категорії (назва, опис) та питання"""
+    categories: List[Tuple[str, str]]
+    # (категорія, текст, тип, правильна відповідь, варіанти JSON, складність, пояснення)
+    questions: List[Tuple]
+
+
+def builtin_seed_pack() -> SeedPack:
+    return SeedPack(SEED_CATEGORIES, SEED_QUESTIONS)
+
+
+def read_seed_pack(filename: str) -> Tuple[SeedPack, List[Tuple[int, str]]]:
+    """Набір питань з файлу CSV, JSON або GIFT; повертає також помилки по рядках
+
+    Рядки перевіряються так само, як при імпорті питань. JSON-файл може
+    містити список "categories" з описами категорій.
+    """
+    # Перевірка рядків та читачі форматів спільні з імпортом питань
+    from question_importer import READERS, validate_row
+
+    extension = os.path.splitext(filename)[1].lower()
+    reader = READERS.get(extension)
+    if not reader:
+        raise ValueError(f"Непідтримуваний формат файлу: {extension}")
+
+    descriptions: Dict[str, str] = {}
+    if extension == '.json':
+        with open(filename, 'r', encoding='utf-8-sig') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            for category in data.get('categories', []):
+                descriptions[category['name']] = category.get('description', '')
+
+    questions = []
+    errors = []
+    for row_number, question, error in map(validate_row, reader(filename)):
+        if error:
+            errors.append((row_number, error))
+        elif not question['category']:
+            errors.append((row_number, "Набір має вказувати категорію за назвою"))
+        else:
+            descriptions.setdefault(question['category'], '')
+            questions.append((question['category'], question['question_text'],
+                              question['question_type'], question['correct_answer'],
+                              json.dumps(question['options'], ensure_ascii=False)
+                              if question['options'] else None,
+                              question['difficulty'], question['explanation']))
+
+    return SeedPack(list(descriptions.items()), questions), errors
+
+
+def _chunks(rows: Iterable[Tuple], size: int) -> Iterable[List[Tuple]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def load_seed_pack(cursor, pack: SeedPack, dialect: str = 'sqlite',
+                   chunk_size: Optional[int] = None) -> Tuple[int, int]:
+    """Пакетне завантаження набору в поточній транзакції курсора
+
+    Відсутні категорії додаються, наявні (за назвою) використовуються.
+    Питання вставляються executemany порціями, без окремого запиту на рядок.
+    Повертає (додано категорій, додано питань).
+    """
+    statements = get_statements(dialect)
+    chunk_size = chunk_size or config.IMPORT_CONFIG['chunk_size']
+
+    cursor.execute(statements.get('category.all'))
+    category_ids = {name: category_id for category_id, name, _ in cursor.fetchall()}
+
+    new_categories = [(name, description) for name, description in pack.categories
+                      if name not in category_ids]
+    new_categories += [(name, '') for name in dict.fromkeys(q[0] for q in pack.questions)
+                       if name not in category_ids
+                       and name not in {c[0] for c in new_categories}]
+    if new_categories:
+        cursor.executemany(statements.get('category.create'), new_categories)
+        cursor.execute(statements.get('category.all'))
+        category_ids = {name: category_id for category_id, name, _ in cursor.fetchall()}
+
+    added = 0
+    for chunk in _chunks(pack.questions, chunk_size):
+        cursor.executemany(statements.get('question.create'),
+                           [(category_ids[q[0]],) + tuple(q[1:]) for q in chunk])
+        added += len(chunk)
+    return len(new_categories), added
+
+
+def main():
+    """Завантаження набору питань з файлу з командного рядка"""
+    parser = argparse.ArgumentParser(description="Завантаження набору питань (CSV, JSON, GIFT)")
+    parser.add_argument('filename')
+    parser.add_argument('--db', default=config.DATABASE_CONFIG['sqlite']['db_name'])
+    parser.add_argument('--mysql', action='store_true',
+                        help="завантажити до MySQL з конфігурації")
+    args = parser.parse_args()
+
+    pack, errors = read_seed_pack(args.filename)
+    for row_number, message in errors[:20]:
+        print(f"  рядок {row_number}: {message}")
+
+    if args.mysql:
+        from database_mysql import MySQLDatabaseManager
+        backend = MySQLDatabaseManager()
+    else:
+        from main import DatabaseManager
+        backend = DatabaseManager(args.db)
+
+    with backend.get_connection() as conn:
+        categories, questions = load_seed_pack(conn.cursor(), pack, backend.dialect)
+    print(f"Додано категорій: {categories}, питань: {questions}, помилок: {len(errors)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Журнал незавершених сеансів тестування для відновлення після збою
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, IO, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class SessionJournal:
+    """Append-only журнал сеансів: окремий файл JSON Lines на кожен сеанс
+
+    Перший рядок файлу описує тест, кожен наступний - одну подану відповідь.
+    Дані скидаються в ОС після кожного запису, а fsync виконується пакетно:
+    кожні fsync_every записів або не рідше ніж раз на fsync_interval секунд.
+    Відкритими тримаються лише max_open_files недавно записаних журналів
+    (тисячі сеансів сервера не вичерпують ліміт дескрипторів), решта
+    відкривається заново при наступному записі.
+    """
+
+    def __init__(self, journal_dir: str = os.path.join('data', 'sessions'),
+                 fsync_every: int = 5, fsync_interval: float = 2.0,
+                 max_open_files: int = 256):
+        self.journal_dir = journal_dir
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.max_open_files = max(1, max_open_files)
+        self._files: Dict[str, Dict[str, Any]] = {}
+        # Журнали з відкритим файлом, від давно не записаних до останніх
+        self._open: 'OrderedDict[str, None]' = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(journal_dir, exist_ok=True)
+
+    def _path(self, user_id: int, journal_id: str) -> str:
+        return os.path.join(self.journal_dir, f"{user_id}_{journal_id}.jsonl")
+
+    def _register(self, journal_id: str, path: str):
+        self._files[journal_id] = {
+            'file': None,
+            'path': path,
+            'pending': 0,
+            'synced_at': time.monotonic()
+        }
+
+    def _release(self, entry: Dict[str, Any], sync: bool = True):
+        """Закриття файлу журналу (з fsync незбережених записів)"""
+        handle = entry['file']
+        if handle is None:
+            return
+        entry['file'] = None
+        try:
+            if sync and entry['pending']:
+                os.fsync(handle.fileno())
+                entry['pending'] = 0
+        finally:
+            handle.close()
+
+    def _handle(self, journal_id: str, entry: Dict[str, Any]) -> IO:
+        """Відкритий файл журналу; найдавніше записаний закривається понад ліміт"""
+        if entry['file'] is None:
+            while len(self._open) >= self.max_open_files:
+                evicted, _ = self._open.popitem(last=False)
+                self._release(self._files[evicted])
+            entry['file'] = open(entry['path'], 'a', encoding='utf-8')
+            entry['synced_at'] = time.monotonic()
+        self._open[journal_id] = None
+        self._open.move_to_end(journal_id)
+        return entry['file']
+
+    def _write(self, journal_id: str, record: Dict[str, Any], force_sync: bool = False):
+        """Дописування запису з пакетним fsync"""
+        entry = self._files.get(journal_id)
+        if not entry:
+            return
+
+        handle = self._handle(journal_id, entry)
+        handle.write(json.dumps(record, ensure_ascii=False) + '\n')
+        handle.flush()
+        entry['pending'] += 1
+
+        now = time.monotonic()
+        if (force_sync or entry['pending'] >= self.fsync_every or
+                now - entry['synced_at'] >= self.fsync_interval):
+            os.fsync(handle.fileno())
+            entry['pending'] = 0
+            entry['synced_at'] = now
+
+    def begin(self, user_id: int, category_id: int, question_ids: List[int],
+              start_time: float, journal_id: Optional[str] = None) -> str:
+        """Створення журналу для нового сеансу (OSError, якщо його не записано)"""
+        journal_id = journal_id or uuid.uuid4().hex
+        path = self._path(user_id, journal_id)
+        with self._lock:
+            self._register(journal_id, path)
+            try:
+                self._write(journal_id, {
+                    'type': 'start',
+                    'user_id': user_id,
+                    'category_id': category_id,
+                    'question_ids': list(question_ids),
+                    'start_time': start_time
+                }, force_sync=True)
+            except OSError:
+                self._close(journal_id)
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+        return journal_id
+
+    @staticmethod
+    def _answer_record(index: int, answer_index: int, seconds: int,
+                       text: Optional[str] = None) -> Dict[str, Any]:
+        record = {'type': 'answer', 'i': index, 'a': answer_index, 't': seconds}
+        if text is not None:
+            record['text'] = text
+        return record
+
+    def record_answer(self, journal_id: str, index: int, answer_index: int,
+                      seconds: int, text: Optional[str] = None):
+        """Запис поданої відповіді"""
+        record = self._answer_record(index, answer_index, seconds, text)
+        with self._lock:
+            self._write(journal_id, record)
+
+    def rewrite(self, user_id: int, journal_id: str, category_id: int,
+                question_ids: List[int], start_time: float,
+                answers: List[Tuple[int, int, Optional[str]]]):
+        """Перезапис журналу відновленого сеансу, що відрізняється від записаного
+
+        Потрібен, коли при відновленні відкинуто видалене питання: інакше
+        номери нових відповідей не збігатимуться з номерами в журналі.
+        """
+        path = self._path(user_id, journal_id)
+        records = [{'type': 'start', 'user_id': user_id, 'category_id': category_id,
+                    'question_ids': list(question_ids), 'start_time': start_time}]
+        records += [self._answer_record(i, *answer) for i, answer in enumerate(answers)]
+
+        with self._lock:
+            self._close(journal_id)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+            self._register(journal_id, path)
+
+    def _close(self, journal_id: str) -> Optional[str]:
+        entry = self._files.pop(journal_id, None)
+        if not entry:
+            return None
+        self._open.pop(journal_id, None)
+        self._release(entry, sync=False)
+        return entry['path']
+
+    def finish(self, journal_id: str):
+        """Видалення журналу завершеного сеансу"""
+        with self._lock:
+            path = self._close(journal_id)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def discard(self, user_id: int, journal_id: str):
+        """Видалення журналу, від відновлення якого відмовились"""
+        with self._lock:
+            self._close(journal_id)
+        path = self._path(user_id, journal_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def find_unfinished(self, user_id: Optional[int] = None) -> List[Tuple[int, str]]:
+        """Пошук незавершених сеансів (усіх або одного користувача)"""
+        prefix = f"{user_id}_" if user_id is not None else ""
+        result = []
+        for path in glob.glob(os.path.join(self.journal_dir, f"{prefix}*.jsonl")):
+            name = os.path.basename(path)[:-len('.jsonl')]
+            owner, _, journal_id = name.partition('_')
+            with self._lock:
+                if journal_id in self._files:
+                    continue
+            try:
+                result.append((int(owner), journal_id))
+            except ValueError:
+                continue
+        return result
+
+    def read(self, user_id: int, journal_id: str) -> Optional[Dict[str, Any]]:
+        """Читання журналу за O(кількість відповідей) та продовження запису в нього
+
+        Повертає опис тесту та список відповідей (індекс, секунди, текст).
+        """
+        path = self._path(user_id, journal_id)
+        data = None
+        # Кінець останнього цілого рядка: обірваний хвіст відрізається перед дописуванням
+        valid_size = 0
+        try:
+            with open(path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Обірваний останній рядок після збою
+                        break
+                    try:
+                        record = json.loads(line.decode('utf-8'))
+                        if record['type'] == 'start':
+                            data = {'user_id': record['user_id'],
+                                    'category_id': record['category_id'],
+                                    'question_ids': list(record['question_ids']),
+                                    'answers': []}
+                        elif data is not None and record['i'] == len(data['answers']):
+                            data['answers'].append(
+                                (record['a'], record['t'], record.get('text')))
+                    except (ValueError, KeyError, TypeError):
+                        # Рядок без потрібних полів вважається обірваним хвостом
+                        break
+                    valid_size += len(line)
+
+            if data is not None and valid_size < os.path.getsize(path):
+                os.truncate(path, valid_size)
+        except OSError as e:
+            logger.error(f"Помилка читання журналу сеансу {journal_id}: {e}")
+            return None
+
+        if data is None:
+            return None
+
+        with self._lock:
+            if journal_id not in self._files:
+                self._register(journal_id, path)
+        return data
+
+    def close(self):
+        """Синхронізація та закриття всіх відкритих журналів"""
+        with self._lock:
+            for entry in self._files.values():
+                self._release(entry)
+            self._files = {}
+            self._open.clear()
@@ -0,0 +1,238 @@
+"""
+Сховище токенів сесій з індексом у пам'яті та періодичним очищенням
+"""
+
+import datetime
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from main import User
+from repositories import DATABASE_ERRORS, SessionRepository
+from utils import SecurityUtils
+
+
+logger = logging.getLogger(__name__)
+
+
+def _to_db_time(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp).isoformat(sep=' ', timespec='seconds')
+
+
+def _from_db_time(value) -> float:
+    # MySQL повертає datetime, SQLite - рядок
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+class SessionEntry:
+    """Активна сесія у пам'яті"""
+
+    __slots__ = ('user', 'expires_at', 'last_seen')
+
+    def __init__(self, user: User, expires_at: float, last_seen: float):
+        self.user = user
+        self.expires_at = expires_at
+        self.last_seen = last_seen
+
+
+class SessionStore:
+    """Сховище сесій: словник токенів і купа термінів дії поверх таблиці user_sessions
+
+    Перевірка токена виконується без звернення до бази. Оновлення last_seen
+    накопичуються та записуються пакетом раз на flush_seconds, а прострочені
+    сесії знімаються з вершини купи за час, пропорційний їх кількості.
+    Завершені сесії видаляються з таблиці, а залишки (деактивовані чи
+    прострочені без участі сервера) - раз на sweep_seconds за індексом терміну дії.
+    Раз на refresh_seconds сесії в пам'яті звіряються з базою: адмін-панель
+    (окремий процес) деактивує сесії видалених користувачів і змінює статус адміна.
+    """
+
+    def __init__(self, db_manager, timeout_minutes: int = 60,
+                 flush_seconds: float = 30.0, sweep_seconds: float = 60.0,
+                 refresh_seconds: float = 60.0):
+        self.db_manager = db_manager
+        self.repository = SessionRepository(db_manager)
+        self.timeout = timeout_minutes * 60
+        self.flush_seconds = flush_seconds
+        self.sweep_seconds = sweep_seconds
+        self.refresh_seconds = refresh_seconds
+        self._sessions: Dict[str, SessionEntry] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._dirty: Dict[str, SessionEntry] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def load(self) -> int:
+        """Завантаження активних сесій з бази (після перезапуску сервера)"""
+        now = time.time()
+        rows = self.repository.get_active(_to_db_time(now))
+
+        with self._lock:
+            for token, expires_date, last_seen, user_id, username, email, is_admin in rows:
+                entry = SessionEntry(User(user_id, username, email or "", bool(is_admin)),
+                                     _from_db_time(expires_date),
+                                     _from_db_time(last_seen) if last_seen else now)
+                self._sessions[token] = entry
+                self._expiry_heap.append((entry.expires_at, token))
+            heapq.heapify(self._expiry_heap)
+        return len(rows)
+
+    def create(self, user: User) -> str:
+        """Створення сесії для користувача"""
+        token = SecurityUtils.generate_session_token()
+        now = time.time()
+        entry = SessionEntry(user, now + self.timeout, now)
+
+        self.repository.create(user.user_id, token, _to_db_time(now),
+                               _to_db_time(entry.expires_at))
+
+        with self._lock:
+            self._sessions[token] = entry
+            heapq.heappush(self._expiry_heap, (entry.expires_at, token))
+        return token
+
+    def resolve(self, token: str) -> Optional[User]:
+        """Перевірка токена та продовження сесії (без звернення до бази)"""
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                # Остаточно сесію зніме наступне очищення
+                return None
+
+            # Стара позиція в купі стає неактуальною і перевіряється при очищенні
+            entry.last_seen = now
+            entry.expires_at = now + self.timeout
+            self._dirty[token] = entry
+            return entry.user
+
+    def revoke(self, token: str):
+        """Завершення сесії (вихід користувача)"""
+        with self._lock:
+            entry = self._sessions.pop(token, None)
+            self._dirty.pop(token, None)
+        if entry is None:
+            return
+
+        self.repository.delete([token])
+
+    def count(self) -> int:
+        return len(self._sessions)
+
+    def flush(self):
+        """Пакетний запис накопичених оновлень last_seen"""
+        with self._lock:
+            if not self._dirty:
+                return
+            updates = [(_to_db_time(entry.last_seen), _to_db_time(entry.expires_at), token)
+                       for token, entry in self._dirty.items()]
+            self._dirty = {}
+
+        try:
+            self.repository.touch(updates)
+        except DATABASE_ERRORS as e:
+            logger.error(f"Помилка запису активності сесій: {e}")
+
+    def sweep(self) -> int:
+        """Зняття прострочених сесій з вершини купи та очищення таблиці"""
+        now = time.time()
+        expired = []
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                _, token = heapq.heappop(heap)
+                entry = self._sessions.get(token)
+                if entry is None:
+                    continue
+                if entry.expires_at > now:
+                    # Сесію продовжено після додавання в купу
+                    heapq.heappush(heap, (entry.expires_at, token))
+                    continue
+                del self._sessions[token]
+                self._dirty.pop(token, None)
+                expired.append(token)
+
+        try:
+            if expired:
+                self.repository.delete(expired)
+            # Із запасом на продовження, ще не записане в базу
+            self.repository.purge(_to_db_time(now - self.timeout))
+        except DATABASE_ERRORS as e:
+            logger.error(f"Помилка завершення прострочених сесій: {e}")
+        return len(expired)
+
+    def refresh(self) -> int:
+        """Звірка з базою: зняття деактивованих сесій і оновлення даних користувачів"""
+        with self._lock:
+            # Сесія потрапляє в пам'ять лише після запису в базу, тож усі ці
+            # токени запит має побачити
+            known = list(self._sessions)
+
+        try:
+            active = self.repository.get_users(known)
+        except DATABASE_ERRORS as e:
+            logger.error(f"Помилка звірки сесій: {e}")
+            return 0
+
+        revoked = []
+        with self._lock:
+            for token in known:
+                entry = self._sessions.get(token)
+                if entry is None:
+                    continue
+                row = active.get(token)
+                if row is None:
+                    del self._sessions[token]
+                    self._dirty.pop(token, None)
+                    revoked.append(token)
+                    continue
+                user_id, username, email, is_admin = row
+                user = User(user_id, username, email or "", bool(is_admin))
+                if (user.username, user.email, user.is_admin) != (
+                        entry.user.username, entry.user.email, entry.user.is_admin):
+                    entry.user = user
+
+        if revoked:
+            try:
+                self.repository.delete(revoked)
+            except DATABASE_ERRORS as e:
+                logger.error(f"Помилка видалення відкликаних сесій: {e}")
+        return len(revoked)
+
+    def _run(self):
+        next_sweep = time.monotonic() + self.sweep_seconds
+        next_refresh = time.monotonic() + self.refresh_seconds
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+            if time.monotonic() >= next_sweep:
+                expired = self.sweep()
+                if expired:
+                    logger.info(f"Завершено прострочених сесій: {expired}")
+                next_sweep = time.monotonic() + self.sweep_seconds
+            if time.monotonic() >= next_refresh:
+                revoked = self.refresh()
+                if revoked:
+                    logger.info(f"Знято відкликаних сесій: {revoked}")
+                next_refresh = time.monotonic() + self.refresh_seconds
+
+    def start(self):
+        """Запуск фонового запису активності та очищення"""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='session-sweeper',
+                                            daemon=True)
+            self._worker.start()
+
+    def close(self):
+        """Зупинка фонового потоку та запис незбережених змін"""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self.flush()
@@ -0,0 +1,145 @@
+"""
+Планувальник інтервального повторення питань (алгоритм SM-2)
+"""
+
+import datetime
+import sqlite3
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config import config
+
+
+class ReviewState(NamedTuple):
+    """Стан повторення одного питання для одного користувача"""
+    repetitions: int
+    interval: int  # днів
+    ease: float
+    due_day: int  # порядковий номер дня (date.toordinal)
+    lapses: int
+
+
+def today_ordinal() -> int:
+    return datetime.date.today().toordinal()
+
+
+def init_review_schema(cursor: sqlite3.Cursor):
+    """Таблиця станів повторення: кластеризована за (користувач, питання)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS review_state (
+            user_id INTEGER NOT NULL,
+            question_id INTEGER NOT NULL,
+            repetitions INTEGER NOT NULL,
+            interval INTEGER NOT NULL,
+            ease REAL NOT NULL,
+            due_day INTEGER NOT NULL,
+            lapses INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, question_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_review_state_due ON review_state (user_id, due_day)")
+
+
+class ReviewScheduler:
+    """Клас для планування повторень за результатами тестів
+
+    Стан оновлюється інкрементно лише для питань щойно завершеного тесту,
+    без перегляду історії відповідей.
+    """
+
+    def __init__(self):
+        settings = config.SPACED_REPETITION_CONFIG
+        self.initial_ease = settings['initial_ease']
+        self.min_ease = settings['min_ease']
+        self.fast_answer_seconds = settings['fast_answer_seconds']
+        self.slow_answer_seconds = settings['slow_answer_seconds']
+
+    def answer_quality(self, is_correct: bool, seconds: int) -> int:
+        """Оцінка якості відповіді за шкалою SM-2 (0..5)"""
+        if not is_correct:
+            return 1
+        if seconds <= self.fast_answer_seconds:
+            return 5
+        if seconds <= self.slow_answer_seconds:
+            return 4
+        return 3
+
+    def next_state(self, state: Optional[ReviewState], quality: int, today: int) -> ReviewState:
+        """Новий стан після відповіді з оцінкою quality"""
+        if state is None:
+            state = ReviewState(0, 0, self.initial_ease, today, 0)
+
+        repetitions, interval, ease, _, lapses = state
+        if quality >= 3:
+            if repetitions == 0:
+                interval = 1
+            elif repetitions == 1:
+                interval = 6
+            else:
+                interval = max(1, round(interval * ease))
+            repetitions += 1
+        else:
+            repetitions = 0
+            interval = 1
+            lapses += 1
+
+        ease = max(self.min_ease,
+                   ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        return ReviewState(repetitions, interval, round(ease, 3), today + interval, lapses)
+
+    def record_answers(self, cursor: sqlite3.Cursor, user_id: int,
+                       answers: Iterable[Tuple[int, bool, int]],
+                       today: Optional[int] = None):
+        """Оновлення станів за відповідями тесту: (question_id, правильно, секунди)"""
+        today = today or today_ordinal()
+        answers = list(answers)
+        if not answers:
+            return
+
+        question_ids = [question_id for question_id, _, _ in answers]
+        cursor.execute(f'''
+            SELECT question_id, repetitions, interval, ease, due_day, lapses
+            FROM review_state
+            WHERE user_id = ? AND question_id IN ({','.join('?' * len(question_ids))})
+        ''', [user_id] + question_ids)
+        states = {row[0]: ReviewState(*row[1:]) for row in cursor.fetchall()}
+
+        updates = []
+        for question_id, is_correct, seconds in answers:
+            state = self.next_state(states.get(question_id),
+                                    self.answer_quality(is_correct, seconds), today)
+            states[question_id] = state
+            updates.append((user_id, question_id) + tuple(state))
+
+        cursor.executemany('''
+            INSERT OR REPLACE INTO review_state
+                (user_id, question_id, repetitions, interval, ease, due_day, lapses)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', updates)
+
+    @staticmethod
+    def get_due_question_ids(cursor: sqlite3.Cursor, user_id: int, category_id: int,
+                             limit: int, today: Optional[int] = None) -> List[int]:
+        """Питання категорії, час повторення яких настав (найпростроченіші першими)"""
+        cursor.execute('''
+            SELECT r.question_id
+            FROM review_state r
+            JOIN questions q ON q.id = r.question_id
+            WHERE r.user_id = ? AND r.due_day <= ? AND q.category_id = ?
+            ORDER BY r.due_day, r.ease
+            LIMIT ?
+        ''', (user_id, today or today_ordinal(), category_id, limit))
+        return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def get_due_counts(cursor: sqlite3.Cursor, user_id: int,
+                       today: Optional[int] = None) -> Dict[int, int]:
+        """Кількість питань до повторення по категоріях"""
+        cursor.execute('''
+            SELECT q.category_id, COUNT(*)
+            FROM review_state r
+            JOIN questions q ON q.id = r.question_id
+            WHERE r.user_id = ? AND r.due_day <= ?
+            GROUP BY q.category_id
+        ''', (user_id, today or today_ordinal()))
+        return dict(cursor.fetchall())
@@ -0,0 +1,95 @@
+"""
+Загальна статистика системи (без графічних залежностей: GUI та API)
+"""
+
+import sqlite3
+from typing import Any, Dict
+
+from replica import read_database
+
+
+class SystemStatistics:
+    """Клас для системної статистики"""
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+
+    def get_general_statistics(self) -> Dict[str, Any]:
+        """Отримання загальної статистики системи"""
+        conn = sqlite3.connect(read_database(self.db_name))
+        cursor = conn.cursor()
+
+        # Загальні показники
+        cursor.execute("SELECT COUNT(*) FROM users")
+        total_users = cursor.fetchone()[0]
+
+        cursor.execute("SELECT COUNT(*) FROM users WHERE is_admin = 1")
+        admin_users = cursor.fetchone()[0]
+
+        cursor.execute("SELECT COUNT(*) FROM questions")
+        total_questions = cursor.fetchone()[0]
+
+        cursor.execute("SELECT COUNT(*) FROM categories")
+        total_categories = cursor.fetchone()[0]
+
+        cursor.execute("SELECT COUNT(*) FROM test_results")
+        total_tests = cursor.fetchone()[0]
+
+        cursor.execute("SELECT SUM(total_questions) FROM test_results")
+        total_answered = cursor.fetchone()[0] or 0
+
+        cursor.execute("SELECT SUM(correct_answers) FROM test_results")
+        total_correct = cursor.fetchone()[0] or 0
+
+        cursor.execute(
+            "SELECT AVG(CAST(correct_answers AS FLOAT) / total_questions * 100) FROM test_results")
+        avg_success_rate = cursor.fetchone()[0] or 0
+
+        # Активність по днях (останні 30 днів)
+        cursor.execute('''
+            SELECT DATE(test_date) as test_day, COUNT(*) as tests_count
+            FROM test_results
+            WHERE test_date >= date('now', '-30 days')
+            GROUP BY DATE(test_date)
+            ORDER BY test_day
+        ''')
+        daily_activity = cursor.fetchall()
+
+        # Популярність категорій
+        cursor.execute('''
+            SELECT c.name, COUNT(*) as tests_count
+            FROM test_results tr
+            JOIN categories c ON tr.category_id = c.id
+            GROUP BY c.name
+            ORDER BY tests_count DESC
+        ''')
+        category_popularity = cursor.fetchall()
+
+        # Розподіл по складності
+        cursor.execute('''
+            SELECT q.difficulty, COUNT(ad.id) as answers_count
+            FROM answer_details ad
+            JOIN questions q ON ad.question_id = q.id
+            GROUP BY q.difficulty
+            ORDER BY q.difficulty
+        ''')
+        difficulty_distribution = cursor.fetchall()
+
+        conn.close()
+
+        return {
+            'general': {
+                'total_users': total_users,
+                'admin_users': admin_users,
+                'regular_users': total_users - admin_users,
+                'total_questions': total_questions,
+                'total_categories': total_categories,
+                'total_tests': total_tests,
+                'total_answered': total_answered,
+                'total_correct': total_correct,
+                'avg_success_rate': round(avg_success_rate, 2) if avg_success_rate else 0
+            },
+            'daily_activity': daily_activity,
+            'category_popularity': category_popularity,
+            'difficulty_distribution': difficulty_distribution
+        }
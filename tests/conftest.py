@@ -0,0 +1,32 @@
+"""
+Спільні фікстури тестів: тимчасова база SQLite для кожного тесту
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Модулі пишуть у відносні шляхи (utils при імпорті - у informatics_trainer.log),
+# тому тести працюють в окремому тимчасовому каталозі
+os.chdir(tempfile.mkdtemp(prefix='trainer-tests-'))
+
+from config import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(monkeypatch, tmp_path):
+    """Журнали сеансів і перевірка планів запитів не торкаються робочого каталогу"""
+    monkeypatch.setitem(config.PATHS, 'sessions_dir', str(tmp_path / 'sessions'))
+    monkeypatch.setitem(config.DATABASE_CONFIG['sqlite'], 'check_query_plans', False)
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Нова база SQLite з початковими даними"""
+    from main import DatabaseManager
+    manager = DatabaseManager(str(tmp_path / 'trainer.db'))
+    yield manager
+    manager.close_connection()
@@ -0,0 +1,80 @@
+"""
+HTTP API: повне проходження тесту, повторне завершення, системна статистика
+"""
+
+import json
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from api_server import TrainerAPIServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = TrainerAPIServer(('127.0.0.1', 0), str(tmp_path / 'api.db'), pool_size=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def call(server, method, path, body=None, token=None):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{server.server_address[1]}{path}", method=method,
+        data=json.dumps(body).encode() if body is not None else None)
+    if token:
+        request.add_header('Authorization', f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def login(server, username='admin', password='admin123'):
+    status, payload = call(server, 'POST', '/api/login',
+                           {'username': username, 'password': password})
+    assert status == 200
+    return payload['token']
+
+
+def test_test_is_finished_once(server):
+    token = login(server)
+    status, payload = call(server, 'POST', '/api/tests',
+                           {'category_id': 1, 'num_questions': 2}, token)
+    assert status == 201
+    test_id = payload['test_id']
+    for _ in range(payload['total_questions']):
+        assert call(server, 'POST', f'/api/tests/{test_id}/answer', {'answer': 'x'},
+                    token)[0] == 200
+
+    status, results = call(server, 'POST', f'/api/tests/{test_id}/finish', token=token)
+    assert status == 200 and results['total_questions'] == 2
+    assert call(server, 'POST', f'/api/tests/{test_id}/finish', token=token)[0] == 404
+    assert server.user_stats.get_user_summary(1)[0] == 1
+
+
+def test_other_user_cannot_see_the_test(server):
+    server.auth_manager.register_user('student', 'password1')
+    admin, student = login(server), login(server, 'student', 'password1')
+    test_id = call(server, 'POST', '/api/tests', {'category_id': 1}, admin)[1]['test_id']
+    assert call(server, 'GET', f'/api/tests/{test_id}/question', token=student)[0] == 404
+
+
+def test_system_statistics_without_gui_modules(server):
+    status, payload = call(server, 'GET', '/api/statistics/system', token=login(server))
+    assert status == 200
+    assert payload['general']['total_categories'] > 0
+    # Статистика не тягне tkinter/matplotlib з адмін-панелі
+    assert 'admin_panel' not in sys.modules
+
+
+def test_statistics_require_admin(server):
+    server.auth_manager.register_user('student', 'password1')
+    token = login(server, 'student', 'password1')
+    assert call(server, 'GET', '/api/statistics/system', token=token)[0] == 403
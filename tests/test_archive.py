@@ -0,0 +1,78 @@
+"""
+Архівація: статистика та рейтинги не змінюються після перенесення старих результатів
+"""
+
+import os
+
+import pytest
+
+from archive import ResultArchiver, archive_path, connect_full_history
+from repositories import Repositories
+
+
+def add_result(db_manager, user_id, category_id, correct, test_date, time_spent=60):
+    with db_manager.get_connection() as conn:
+        cursor = conn.execute('''
+            INSERT INTO test_results (user_id, category_id, total_questions, correct_answers,
+                                      test_date, time_spent)
+            VALUES (?, ?, 10, ?, ?, ?)
+        ''', (user_id, category_id, correct, test_date, time_spent))
+        conn.executemany('''
+            INSERT INTO answer_details (test_result_id, question_id, user_answer,
+                                        is_correct, time_spent)
+            VALUES (?, 1, 'x', ?, 6)
+        ''', [(cursor.lastrowid, i < correct) for i in range(10)])
+        conn.commit()
+
+
+def snapshot(db_manager):
+    repos = Repositories(db_manager)
+    last_result_id = repos.leaderboard.get_last_result_id()
+    return {
+        'summary': {user_id: repos.statistics.get_user_summary(user_id) for user_id in (1, 2)},
+        'categories': {user_id: repos.statistics.get_user_categories(user_id)
+                       for user_id in (1, 2)},
+        'all_time': repos.leaderboard.get_points(last_result_id),
+        'category': repos.leaderboard.get_points(last_result_id, 1)
+    }
+
+
+def test_statistics_are_unchanged_by_archiving(db_manager):
+    add_result(db_manager, 1, 1, 7, '2019-03-01 10:00:00', 100)
+    add_result(db_manager, 1, 2, 4, '2019-09-01 10:00:00', 80)
+    add_result(db_manager, 1, 1, 9, '2020-02-01 10:00:00', 50)
+    add_result(db_manager, 2, 1, 3, '2020-02-01 11:00:00', 70)
+    # Свіжі результати лишаються в основній базі
+    add_result(db_manager, 1, 1, 6, '2099-01-01 10:00:00', 40)
+    add_result(db_manager, 2, 2, 8, '2099-01-01 10:00:00', 30)
+
+    before = snapshot(db_manager)
+    moved = ResultArchiver(db_manager).archive()
+    assert moved == {2019: 2, 2020: 2}
+    assert snapshot(db_manager) == before
+
+    with db_manager.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM test_results").fetchone()[0] == 2
+        assert conn.execute("SELECT SUM(tests) FROM result_rollups").fetchone()[0] == 4
+
+    # Повна історія з архівами містить усі результати та відповіді
+    assert os.path.exists(archive_path(db_manager.db_name, 2019))
+    conn = connect_full_history(db_manager.db_name)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM test_results").fetchone()[0] == 6
+        assert conn.execute("SELECT COUNT(*) FROM answer_details").fetchone()[0] == 60
+    finally:
+        conn.close()
+
+
+def test_repeated_archiving_changes_nothing(db_manager):
+    add_result(db_manager, 1, 1, 7, '2019-03-01 10:00:00')
+    ResultArchiver(db_manager).archive()
+    before = snapshot(db_manager)
+    assert ResultArchiver(db_manager).archive() == {}
+    assert snapshot(db_manager) == before
+
+
+def test_horizon_shorter_than_a_month_is_rejected(db_manager):
+    with pytest.raises(ValueError):
+        ResultArchiver(db_manager, horizon_days=7)
@@ -0,0 +1,83 @@
+"""
+Асинхронний рушій: власник сеансу, повторне завершення, зняття неактивних сеансів
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from async_engine import AsyncTestEngine
+
+
+@pytest.fixture
+def engine(db_manager):
+    return AsyncTestEngine(db_manager, max_workers=2, max_sessions=2, idle_minutes=60)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_other_user_cannot_use_the_session(engine):
+    async def scenario():
+        session_id = await engine.start_session(1, 1, 3)
+        assert engine.get_current_question(session_id, 2) is None
+        assert not engine.submit_answer(session_id, 2, 'x')
+        assert await engine.finish_session(session_id, 2) == {}
+        engine.abandon_session(session_id, 2)
+        assert engine.get_current_question(session_id, 1) is not None
+        await engine.close()
+    run(scenario())
+
+
+def test_failed_write_keeps_the_answers(engine, monkeypatch):
+    async def scenario():
+        session_id = await engine.start_session(1, 1, 2)
+        while engine.submit_answer(session_id, 1, 'x'):
+            pass
+        finish = engine.engine.finish_session
+
+        def fail(*args):
+            raise RuntimeError('database is locked')
+
+        monkeypatch.setattr(engine.engine, 'finish_session', fail)
+        with pytest.raises(RuntimeError):
+            await engine.finish_session(session_id, 1)
+        assert engine.get_session(session_id, 1).current_index == 2
+
+        monkeypatch.setattr(engine.engine, 'finish_session', finish)
+        results = await engine.finish_session(session_id, 1)
+        assert results['total_questions'] == 2
+        assert session_id not in engine.sessions
+        await engine.close()
+    run(scenario())
+
+
+def test_idle_sessions_free_their_slots(engine):
+    async def scenario():
+        first = await engine.start_session(1, 1, 2)
+        await engine.start_session(1, 1, 2)
+        assert await engine.start_session(1, 1, 2) is None
+
+        engine.sessions[first]['last_access'] -= engine.idle_seconds + 1
+        assert await engine.start_session(1, 1, 2) is not None
+        assert first not in engine.sessions
+        await engine.close()
+    run(scenario())
+
+
+def test_close_does_not_block_the_event_loop(engine):
+    release = threading.Event()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        pending = loop.run_in_executor(engine.executor, release.wait)
+        closing = asyncio.ensure_future(engine.close())
+        # Цикл подій обслуговує інші задачі, поки пул дочікується роботи
+        await asyncio.sleep(0.05)
+        assert not closing.done()
+        release.set()
+        await closing
+        await pending
+    run(scenario())
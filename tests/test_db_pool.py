@@ -0,0 +1,82 @@
+"""
+Пул з'єднань MySQL: повторні підключення, межа очікування, сумісна обгортка SQLite
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from config import config
+from database_mysql import DATABASE_ERRORS, SQLiteCompatConnection, SQLiteCompatCursor
+from db_pool import ReconnectingConnectionPool
+
+
+class FlakyConnect:
+    """Фабрика, що перші failures разів не може підключитися"""
+
+    def __init__(self, db_name: str, failures: int):
+        self.db_name = db_name
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise sqlite3.OperationalError("сервер недоступний")
+        return SQLiteCompatConnection(self.db_name)
+
+
+def test_connect_is_retried(tmp_path):
+    connect = FlakyConnect(str(tmp_path / 'pool.db'), failures=2)
+    pool = ReconnectingConnectionPool(connect, pool_size=1, retries=3, backoff=0.01,
+                                      errors=DATABASE_ERRORS)
+    with pool.connection() as conn:
+        conn.cursor().execute("SELECT 1")
+    assert connect.calls == 3
+    assert pool.get_metrics()['connect_failures'] == 2
+
+
+def test_retries_stop_at_the_deadline(tmp_path):
+    connect = FlakyConnect(str(tmp_path / 'pool.db'), failures=100)
+    pool = ReconnectingConnectionPool(connect, pool_size=1, retries=10, backoff=1.0,
+                                      errors=DATABASE_ERRORS, retry_deadline=0.2)
+    started = time.monotonic()
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    assert time.monotonic() - started < 0.5
+    assert connect.calls == 1
+    # Місце в пулі звільняється після невдалого підключення
+    assert pool.get_metrics()['size'] == 0
+
+
+def test_broken_connection_is_not_returned_to_the_pool(tmp_path):
+    pool = ReconnectingConnectionPool(SQLiteCompatConnection.factory(str(tmp_path / 'pool.db')),
+                                      pool_size=1, errors=DATABASE_ERRORS)
+    with pytest.raises(sqlite3.Error):
+        with pool.connection() as conn:
+            conn.close()
+            conn.cursor().execute("SELECT 1")
+    with pool.connection() as conn:
+        conn.cursor().execute("SELECT 1")
+    assert pool.get_metrics()['size'] == 1
+
+
+def test_translation_keeps_string_literals():
+    cursor = SQLiteCompatCursor(sqlite3.connect(':memory:').cursor(), 'mysql')
+    cursor.execute("CREATE TABLE t (a TEXT)")
+    cursor.execute("INSERT INTO t VALUES (%s)", ('%s-value',))
+    rows = cursor.execute("SELECT a FROM t WHERE a LIKE '%s%' AND a <> %s FOR UPDATE",
+                          ('other',)).fetchall()
+    assert rows == [('%s-value',)]
+
+
+def test_unreachable_mysql_fails_without_fallback(monkeypatch):
+    import database_mysql
+    # Резервний SQLite вимкнено за замовчуванням
+    assert config.DATABASE_CONFIG['mysql']['fallback_to_sqlite'] is False
+    settings = dict(config.DATABASE_CONFIG['mysql'], host='127.0.0.1', port=1,
+                    connect_retries=0, connect_timeout=1)
+    monkeypatch.setitem(config.DATABASE_CONFIG, 'mysql', settings)
+    with pytest.raises(DATABASE_ERRORS):
+        database_mysql.MySQLDatabaseManager()
@@ -0,0 +1,68 @@
+"""
+Оцінювання відповідей: нормалізація, правда/неправда, варіанти, регулярні вирази, нечіткий збіг
+"""
+
+from grading import CompiledGrader, normalize_answer, regex_answer_error
+from main import Question
+
+
+def grader(question_type, correct_answer, options=None, fuzzy_threshold=0.0):
+    question = Question(1, 1, "Питання", question_type, correct_answer, options)
+    return CompiledGrader(question, fuzzy_threshold)
+
+
+def test_normalization_ignores_case_and_spaces():
+    assert normalize_answer("  Hello   World ") == "hello world"
+    assert grader('text_input', 'print').grade('  PRINT ')
+
+
+def test_true_false_synonyms():
+    check = grader('true_false', 'Правда')
+    assert check.grade('так')
+    assert check.grade('TRUE')
+    assert check.grade('1')
+    assert not check.grade('ні')
+    assert not check.grade('можливо')
+    assert check.grade_index(1)
+    assert not check.grade_index(0)
+
+
+def test_multiple_choice_by_text_and_index():
+    check = grader('multiple_choice', 'int', ['str', 'Int', 'float'])
+    assert check.grade(' INT ')
+    assert not check.grade('str')
+    assert check.grade_index(1)
+    assert not check.grade_index(2)
+
+
+def test_multiple_choice_without_matching_option():
+    # Правильна відповідь не серед варіантів: порівнюється лише текст
+    check = grader('multiple_choice', 'list', ['str', 'int'])
+    assert check.grade('List')
+    assert not check.grade_index(0)
+
+
+def test_regex_answer_must_match_fully():
+    check = grader('text_input', r're: \d+\s*(байт|B)')
+    assert check.grade('8 байт')
+    assert check.grade('16b')
+    assert not check.grade('8 байт або більше')
+
+
+def test_invalid_regex_falls_back_to_text():
+    assert regex_answer_error('text_input', 're:(') is not None
+    assert regex_answer_error('text_input', r're:\d+') is None
+    assert regex_answer_error('multiple_choice', 're:(') is None
+
+    check = grader('text_input', 're:(')
+    assert check.pattern is None
+    assert check.grade('(')
+    assert not check.grade('re:(')
+
+
+def test_fuzzy_threshold():
+    assert not grader('text_input', 'алгоритм').grade('алгоритн')
+    check = grader('text_input', 'алгоритм', fuzzy_threshold=0.8)
+    assert check.grade('алгоритн')
+    assert not check.grade('масив')
+    assert not check.grade('')
@@ -0,0 +1,63 @@
+"""
+Історія результатів: сторінки за курсором (дата, id) без пропусків і повторів
+"""
+
+from repositories import ResultRepository
+
+
+def add_result(db_manager, user_id, time_spent, test_date):
+    with db_manager.get_connection() as conn:
+        conn.execute('''
+            INSERT INTO test_results (user_id, category_id, total_questions, correct_answers,
+                                      test_date, time_spent)
+            VALUES (?, 1, 10, 5, ?, ?)
+        ''', (user_id, test_date, time_spent))
+        conn.commit()
+
+
+def read_all_pages(results, user_id, limit):
+    """Маркери (time_spent) усіх рядків, сторінка за сторінкою"""
+    seen, cursor = [], None
+    while True:
+        rows, cursor = results.get_history_page(user_id, cursor, limit)
+        seen.extend(row[4] for row in rows)
+        if cursor is None:
+            return seen
+
+
+def test_results_in_the_same_second_are_neither_lost_nor_repeated(db_manager):
+    # Кілька тестів завершено в ту саму секунду - межа сторінки проходить посеред них
+    for marker in range(7):
+        add_result(db_manager, 1, marker, '2024-05-01 10:00:00')
+    for marker in range(7, 10):
+        add_result(db_manager, 1, marker, '2024-05-01 09:00:00')
+    add_result(db_manager, 2, 100, '2024-05-01 10:00:00')
+
+    results = ResultRepository(db_manager)
+    for limit in (1, 2, 3, 4, 10, 11):
+        # Новіші першими, серед однакових дат - новіші за id
+        assert read_all_pages(results, 1, limit) == [6, 5, 4, 3, 2, 1, 0, 9, 8, 7]
+
+
+def test_new_results_do_not_shift_the_next_page(db_manager):
+    for marker in range(4):
+        add_result(db_manager, 1, marker, f'2024-05-0{marker + 1} 10:00:00')
+    results = ResultRepository(db_manager)
+
+    first, cursor = results.get_history_page(1, None, 2)
+    assert [row[4] for row in first] == [3, 2]
+    add_result(db_manager, 1, 99, '2024-06-01 10:00:00')
+    rows, cursor = results.get_history_page(1, cursor, 2)
+    assert [row[4] for row in rows] == [1, 0]
+    assert results.get_history_page(1, cursor, 2) == ([], None)
+
+
+def test_history_rows(db_manager):
+    add_result(db_manager, 1, 42, '2024-05-01 10:00:00')
+    rows, cursor = ResultRepository(db_manager).get_history_page(1, None, 5)
+    assert cursor is None
+    assert len(rows) == 1
+    test_date, category, total, correct, time_spent = rows[0]
+    assert test_date == '2024-05-01 10:00:00'
+    assert (total, correct, time_spent) == (10, 5, 42)
+    assert category
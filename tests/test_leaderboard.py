@@ -0,0 +1,106 @@
+"""
+Рейтинги: місця з однаковими балами, доповнення новими результатами і вилучення користувачів
+"""
+
+import pytest
+
+from leaderboard import Leaderboard, LeaderboardService
+
+
+def add_result(db_manager, user_id, category_id, correct, test_date=None):
+    """Результат тесту напряму в базі; повертає його id"""
+    with db_manager.get_connection() as conn:
+        cursor = conn.execute('''
+            INSERT INTO test_results (user_id, category_id, total_questions, correct_answers,
+                                      test_date, time_spent)
+            VALUES (?, ?, 10, ?, COALESCE(?, CURRENT_TIMESTAMP), 60)
+        ''', (user_id, category_id, correct, test_date))
+        conn.commit()
+        return cursor.lastrowid
+
+
+@pytest.fixture
+def service(db_manager):
+    return LeaderboardService(db_manager, rebuild_seconds=3600)
+
+
+def test_ties_share_a_rank():
+    board = Leaderboard({1: 10, 2: 7, 3: 10, 4: 5})
+    assert board.rank(1) == board.rank(3) == 1
+    assert board.rank(2) == 3
+    assert board.rank(4) == 4
+    assert board.rank(99) is None
+    assert board.top(3) == [(1, 1, 10), (1, 3, 10), (3, 2, 7)]
+
+
+def test_add_and_remove_keep_the_order():
+    board = Leaderboard({1: 10, 2: 7})
+    board.add(2, 5)
+    board.add(3, 1)
+    assert board.top(5) == [(1, 2, 12), (2, 1, 10), (3, 3, 1)]
+    board.remove(2)
+    board.remove(2)
+    assert board.top(5) == [(1, 1, 10), (2, 3, 1)]
+    assert len(board) == 2
+
+
+def test_board_is_built_from_history(service, db_manager):
+    add_result(db_manager, 1, 1, 6)
+    add_result(db_manager, 1, 2, 3)
+    add_result(db_manager, 2, 1, 8)
+    assert service.get_rank(1, 'all_time') == (1, 9, 2)
+    assert service.get_rank(2, 'category', 1) == (1, 8, 2)
+    assert service.get_rank(1, 'category', 2) == (1, 3, 1)
+    assert service.get_rank(2, 'category', 2) is None
+
+
+def test_old_results_are_not_in_the_current_week(service, db_manager):
+    add_result(db_manager, 1, 1, 6, '2000-01-03 12:00:00')
+    add_result(db_manager, 2, 1, 2)
+    assert service.get_rank(1, 'week') is None
+    assert service.get_rank(2, 'week') == (1, 2, 1)
+    assert service.get_rank(1, 'all_time') == (1, 6, 2)
+
+
+def test_new_results_are_recorded_once(service, db_manager):
+    add_result(db_manager, 1, 1, 5)
+    service.get_board('all_time')
+    service.get_board('category', 2)
+
+    result_id = add_result(db_manager, 2, 1, 7)
+    service.record_result(result_id, 2, 1, 7)
+    assert service.get_rank(2, 'all_time') == (1, 7, 2)
+    # Результат іншої категорії не потрапляє до рейтингу категорії 2
+    assert service.get_rank(2, 'category', 2) is None
+
+    # Результат, уже врахований при побудові, не додається вдруге
+    service.record_result(1, 1, 1, 5)
+    assert service.get_rank(1, 'all_time') == (2, 5, 2)
+
+
+def test_results_during_a_rebuild_are_not_lost(service, db_manager):
+    add_result(db_manager, 1, 1, 5)
+    get_points = service.repository.get_points
+
+    def slow_get_points(*args):
+        # Інший потік записує результат, поки рейтинг будується з бази
+        result_id = add_result(db_manager, 2, 1, 4)
+        service.record_result(result_id, 2, 1, 4)
+        service.remove_user(1)
+        return get_points(*args)
+
+    service.repository.get_points = slow_get_points
+    board = service.get_board('all_time')
+    assert board.rank(1) is None
+    assert board.points[2] == 4
+
+
+def test_deleted_user_is_evicted(service, db_manager):
+    add_result(db_manager, 1, 1, 5)
+    add_result(db_manager, 2, 1, 3)
+    service.get_board('all_time')
+    service.get_board('category', 1)
+    service.remove_user(1)
+    assert service.get_rank(1, 'all_time') is None
+    assert service.get_rank(1, 'category', 1) is None
+    assert service.get_rank(2, 'all_time') == (1, 3, 1)
@@ -0,0 +1,104 @@
+"""
+Шар репозиторіїв: запити на SQLite та на сервері MySQL
+"""
+
+import os
+
+import pytest
+
+from config import config
+from repositories import (STATEMENTS, Repositories, _parity_scenario, check_query_plans,
+                          get_statements)
+
+
+def test_statements_translate_placeholders_for_mysql():
+    statements = get_statements('mysql')
+    for name in STATEMENTS:
+        assert '?' not in statements.get(name, count=2), name
+    assert 'RAND()' in statements.get('question.random_ids')
+    assert statements.get('user_stats.save').lstrip().startswith('REPLACE INTO')
+
+
+def test_registered_statements_use_indexes(db_manager):
+    with db_manager.get_connection() as conn:
+        assert check_query_plans(conn) == []
+
+
+def test_duplicate_username_is_rejected(db_manager):
+    users = Repositories(db_manager).users
+    assert users.create('student', 'hash-1')
+    assert not users.create('student', 'hash-2')
+    assert users.get_credentials('student')[3] == 'hash-1'
+
+
+def test_replace_password_skips_a_concurrent_change(db_manager):
+    users = Repositories(db_manager).users
+    users.create('student', 'hash-1')
+    user_id = users.get_credentials('student')[0]
+    users.set_password(user_id, 'hash-2')
+    assert not users.replace_password(user_id, 'hash-1', 'hash-3')
+    assert users.replace_password(user_id, 'hash-2', 'hash-3')
+    assert users.get_credentials('student')[3] == 'hash-3'
+
+
+def test_scenario_is_repeatable_on_sqlite(tmp_path):
+    from main import DatabaseManager
+    outcomes = []
+    for name in ('first.db', 'second.db'):
+        backend = DatabaseManager(str(tmp_path / name))
+        try:
+            outcomes.append(_parity_scenario(Repositories(backend)))
+        finally:
+            backend.close_connection()
+    assert outcomes[0] == outcomes[1]
+    assert outcomes[0]['create'] and not outcomes[0]['create_duplicate']
+
+
+def _mysql_settings():
+    """Налаштування тестового сервера MySQL або None, якщо його не задано"""
+    database = os.environ.get('TRAINER_TEST_MYSQL_DATABASE')
+    if not database:
+        return None
+    settings = dict(config.DATABASE_CONFIG['mysql'])
+    settings.update(
+        host=os.environ.get('TRAINER_TEST_MYSQL_HOST', settings['host']),
+        port=int(os.environ.get('TRAINER_TEST_MYSQL_PORT', settings['port'])),
+        user=os.environ.get('TRAINER_TEST_MYSQL_USER', settings['user']),
+        password=os.environ.get('TRAINER_TEST_MYSQL_PASSWORD', settings['password']),
+        database=database, fallback_to_sqlite=False, connect_retries=0)
+    return settings
+
+
+@pytest.fixture
+def mysql_backend(monkeypatch):
+    """Порожня база на справжньому сервері MySQL (TRAINER_TEST_MYSQL_DATABASE)"""
+    mysql_connector = pytest.importorskip('mysql.connector')
+    settings = _mysql_settings()
+    if settings is None:
+        pytest.skip("сервер MySQL не задано (TRAINER_TEST_MYSQL_DATABASE)")
+    try:
+        conn = mysql_connector.connect(host=settings['host'], port=settings['port'],
+                                       user=settings['user'], password=settings['password'],
+                                       connection_timeout=5)
+    except mysql_connector.Error as e:
+        pytest.skip(f"сервер MySQL недоступний: {e}")
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{settings['database']}`")
+        cursor.execute(f"CREATE DATABASE `{settings['database']}` CHARACTER SET utf8mb4")
+    finally:
+        conn.close()
+
+    monkeypatch.setitem(config.DATABASE_CONFIG, 'mysql', settings)
+    from database_mysql import MySQLDatabaseManager
+    backend = MySQLDatabaseManager()
+    yield backend
+    backend.close_connection()
+
+
+def test_mysql_server_matches_sqlite(mysql_backend, db_manager):
+    """Схема MySQL (DDL) і запити діалекту на справжньому сервері"""
+    assert mysql_backend.dialect == 'mysql'
+    expected = _parity_scenario(Repositories(db_manager))
+    actual = _parity_scenario(Repositories(mysql_backend))
+    assert actual == expected
@@ -0,0 +1,117 @@
+"""
+Безпека входу: блокування після невдалих спроб і скидання кешу облікових даних
+"""
+
+import pytest
+
+import security
+from main import AuthenticationManager
+from security import CachedCredentials, CredentialCache, LoginLockoutTracker, hash_password
+
+
+class Clock:
+    """Керований замінник time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(security.time, 'monotonic', clock)
+    return clock
+
+
+def credentials(user_id=1, username='admin', password_hash='hash'):
+    return CachedCredentials(user_id, username, '', password_hash, False)
+
+
+def test_lockout_after_max_attempts(clock):
+    tracker = LoginLockoutTracker(max_attempts=3, lockout_seconds=60)
+    for _ in range(2):
+        tracker.register_failure('user')
+    assert tracker.get_remaining_lockout('user') == 0
+    tracker.register_failure('user')
+    assert tracker.get_remaining_lockout('user') == 61
+
+    clock.now += 59.5
+    assert tracker.get_remaining_lockout('user') == 1
+    clock.now += 1
+    assert tracker.get_remaining_lockout('user') == 0
+
+
+def test_failures_outside_the_window_are_forgotten(clock):
+    tracker = LoginLockoutTracker(max_attempts=3, lockout_seconds=60, window_seconds=10)
+    tracker.register_failure('user')
+    tracker.register_failure('user')
+    clock.now += 11
+    tracker.register_failure('user')
+    assert tracker.get_remaining_lockout('user') == 0
+
+
+def test_success_resets_the_counter(clock):
+    tracker = LoginLockoutTracker(max_attempts=2, lockout_seconds=60)
+    tracker.register_failure('user')
+    tracker.register_success('user')
+    tracker.register_failure('user')
+    assert tracker.get_remaining_lockout('user') == 0
+    # Інші користувачі не блокуються
+    tracker.register_failure('user')
+    assert tracker.get_remaining_lockout('user') > 0
+    assert tracker.get_remaining_lockout('other') == 0
+
+
+def test_credential_cache_ttl_and_size(clock):
+    cache = CredentialCache(max_size=2, ttl_seconds=30)
+    cache.put(credentials(1, 'a'))
+    cache.put(credentials(2, 'b'))
+    assert cache.get('a').user_id == 1
+    cache.put(credentials(3, 'c'))
+    # Найдавніше використаний запис витісняється
+    assert cache.get('b') is None
+    clock.now += 31
+    assert cache.get('a') is None
+
+
+def test_credential_cache_invalidation(clock):
+    cache = CredentialCache()
+    cache.put(credentials(1, 'a'))
+    cache.put(credentials(2, 'b'))
+    cache.invalidate('a')
+    cache.invalidate_user_id(2)
+    assert cache.get('a') is None
+    assert cache.get('b') is None
+
+
+def test_password_changed_elsewhere_is_picked_up(db_manager):
+    auth = AuthenticationManager(db_manager)
+    user = auth.authenticate('admin', 'admin123')
+    assert user is not None
+    assert auth.credential_cache.get('admin') is not None
+
+    # Інший процес змінює пароль напряму в базі, кеш ще містить старий хеш
+    auth.users.set_password(user.user_id, hash_password('new-secret'))
+    assert auth.authenticate('admin', 'new-secret') is not None
+    assert auth.authenticate('admin', 'admin123') is None
+
+
+def test_change_password_invalidates_cache(db_manager):
+    auth = AuthenticationManager(db_manager)
+    assert auth.login_user('admin', 'admin123')
+    assert auth.change_password('admin123', 'new-secret')
+    assert auth.credential_cache.get('admin') is None
+    assert auth.authenticate('admin', 'admin123') is None
+    assert auth.authenticate('admin', 'new-secret') is not None
+
+
+def test_wrong_passwords_lock_the_account(db_manager):
+    auth = AuthenticationManager(db_manager)
+    for _ in range(auth.lockout_tracker.max_attempts):
+        assert auth.authenticate('admin', 'wrong') is None
+    assert auth.get_lockout_remaining('admin') > 0
+    # Під час блокування не приймається навіть правильний пароль
+    assert auth.authenticate('admin', 'admin123') is None
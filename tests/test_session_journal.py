@@ -0,0 +1,130 @@
+"""
+Журнал сеансів: відтворення відповідей, обірваний хвіст, ліміт відкритих файлів
+"""
+
+import json
+import os
+
+import pytest
+
+from session_journal import SessionJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = SessionJournal(str(tmp_path / 'sessions'), fsync_every=2, max_open_files=2)
+    yield journal
+    journal.close()
+
+
+def reopen(journal: SessionJournal) -> SessionJournal:
+    """Новий екземпляр над тим самим каталогом (як після перезапуску)"""
+    journal.close()
+    return SessionJournal(journal.journal_dir)
+
+
+def test_answers_are_replayed_in_order(journal):
+    journal_id = journal.begin(7, 3, [10, 11, 12], 100.0)
+    journal.record_answer(journal_id, 0, 1, 4)
+    journal.record_answer(journal_id, 1, -1, 9, 'print')
+
+    restored = reopen(journal)
+    assert restored.find_unfinished(7) == [(7, journal_id)]
+    data = restored.read(7, journal_id)
+    assert data['category_id'] == 3
+    assert data['question_ids'] == [10, 11, 12]
+    assert data['answers'] == [(1, 4, None), (-1, 9, 'print')]
+    restored.close()
+
+
+def test_duplicate_answer_index_is_ignored(journal):
+    journal_id = journal.begin(1, 1, [1, 2], 0.0)
+    journal.record_answer(journal_id, 0, 1, 4)
+    journal.record_answer(journal_id, 0, 0, 5)
+
+    restored = reopen(journal)
+    assert restored.read(1, journal_id)['answers'] == [(1, 4, None)]
+    restored.close()
+
+
+@pytest.mark.parametrize('tail', [
+    b'{"type": "answer", "i": 1, "a"',          # обірваний запис без кінця рядка
+    b'{"type": "answer", "i": 1}\n',            # ціле JSON без потрібних полів
+    b'["answer", 1, 0, 3]\n',                   # не об'єкт
+])
+def test_bad_tail_is_truncated_before_appending(journal, tail):
+    journal_id = journal.begin(1, 1, [1, 2, 3], 0.0)
+    journal.record_answer(journal_id, 0, 1, 4)
+    journal.close()
+    path = journal._path(1, journal_id)
+    with open(path, 'ab') as f:
+        f.write(tail)
+    valid_size = os.path.getsize(path) - len(tail)
+
+    restored = SessionJournal(journal.journal_dir)
+    data = restored.read(1, journal_id)
+    assert data['answers'] == [(1, 4, None)]
+    assert os.path.getsize(path) == valid_size
+
+    restored.record_answer(journal_id, 1, 2, 6)
+    restored = reopen(restored)
+    assert restored.read(1, journal_id)['answers'] == [(1, 4, None), (2, 6, None)]
+    restored.close()
+
+
+def test_journal_without_start_record_is_not_restored(journal):
+    path = journal._path(1, 'broken')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'type': 'answer', 'i': 0, 'a': 1, 't': 2}) + '\n')
+    assert journal.read(1, 'broken') is None
+
+
+def test_open_files_are_bounded(journal):
+    ids = [journal.begin(1, 1, [1, 2, 3], 0.0) for _ in range(5)]
+    for index in range(3):
+        for journal_id in ids:
+            journal.record_answer(journal_id, index, index, 1)
+            assert len(journal._open) <= journal.max_open_files
+
+    restored = reopen(journal)
+    for journal_id in ids:
+        assert len(restored.read(1, journal_id)['answers']) == 3
+    restored.close()
+
+
+def test_rewrite_realigns_answers(journal):
+    journal_id = journal.begin(1, 1, [1, 2, 3], 0.0)
+    journal.record_answer(journal_id, 0, 1, 4)
+    journal.record_answer(journal_id, 1, 0, 5)
+    # Питання 2 видалене: залишаються питання 1 і 3 з відповіддю лише на перше
+    journal.rewrite(1, journal_id, 1, [1, 3], 0.0, [(1, 4, None)])
+    journal.record_answer(journal_id, 1, 2, 7)
+
+    restored = reopen(journal)
+    data = restored.read(1, journal_id)
+    assert data['question_ids'] == [1, 3]
+    assert data['answers'] == [(1, 4, None), (2, 7, None)]
+    restored.close()
+
+
+def test_finish_removes_the_journal(journal):
+    journal_id = journal.begin(1, 1, [1], 0.0)
+    journal.finish(journal_id)
+    assert journal.find_unfinished() == []
+
+
+def test_failed_begin_leaves_no_session(db_manager, tmp_path, monkeypatch):
+    from api_server import APIError, TestSessionRegistry
+    from main import TestEngine
+
+    journal = SessionJournal(str(tmp_path / 'sessions'))
+    registry = TestSessionRegistry(TestEngine(db_manager), journal=journal)
+
+    def fail(*args, **kwargs):
+        raise OSError(24, 'Too many open files')
+
+    monkeypatch.setattr(journal, 'begin', fail)
+    with pytest.raises(APIError) as error:
+        registry.create(1, 1, 3)
+    assert error.value.status == 503
+    assert registry.count() == 0
@@ -0,0 +1,78 @@
+"""
+Сховище сесій: продовження, завершення, звірка з базою та очищення таблиці
+"""
+
+import time
+
+import pytest
+
+from main import User
+from session_store import SessionStore, _to_db_time
+
+
+@pytest.fixture
+def store(db_manager):
+    store = SessionStore(db_manager, timeout_minutes=1)
+    yield store
+    store.close()
+
+
+def session_rows(db_manager):
+    with db_manager.get_connection() as conn:
+        return conn.execute(
+            "SELECT session_token, is_active FROM user_sessions ORDER BY id").fetchall()
+
+
+def admin():
+    return User(1, 'admin', 'admin@example.com', True)
+
+
+def test_revoked_token_is_deleted(store, db_manager):
+    token = store.create(admin())
+    assert store.resolve(token).username == 'admin'
+    store.revoke(token)
+    assert store.resolve(token) is None
+    assert session_rows(db_manager) == []
+
+
+def test_expired_sessions_are_swept_and_deleted(db_manager):
+    store = SessionStore(db_manager, timeout_minutes=0)
+    token = store.create(admin())
+    assert store.resolve(token) is None
+    assert store.sweep() == 1
+    assert store.count() == 0
+    assert session_rows(db_manager) == []
+
+
+def test_sessions_survive_a_restart(store, db_manager):
+    token = store.create(admin())
+    store.resolve(token)
+    store.flush()
+    restarted = SessionStore(db_manager, timeout_minutes=1)
+    assert restarted.load() == 1
+    assert restarted.resolve(token).user_id == 1
+
+
+def test_refresh_drops_deactivated_sessions(store, db_manager):
+    kept, revoked = store.create(admin()), store.create(admin())
+    with db_manager.get_connection() as conn:
+        conn.execute("UPDATE user_sessions SET is_active = 0 WHERE session_token = ?",
+                     (revoked,))
+        conn.execute("UPDATE users SET is_admin = 0 WHERE id = 1")
+
+    assert store.refresh() == 1
+    assert store.resolve(revoked) is None
+    assert store.resolve(kept).is_admin is False
+    assert session_rows(db_manager) == [(kept, 1)]
+
+
+def test_sweep_purges_rows_left_by_other_processes(store, db_manager):
+    long_ago = _to_db_time(time.time() - 3600)
+    with db_manager.get_connection() as conn:
+        conn.execute('''
+            INSERT INTO user_sessions (user_id, session_token, expires_date, is_active)
+            VALUES (1, 'stale', ?, 0)
+        ''', (long_ago,))
+    token = store.create(admin())
+    store.sweep()
+    assert session_rows(db_manager) == [(token, 1)]
@@ -0,0 +1,241 @@
+"""
+Зведена статистика користувачів, що оновлюється при завершенні тесту
+"""
+
+import datetime
+import json
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+from repositories import QuestionRepository, StatisticsRepository, UserStatsRepository
+
+
+class UserStats:
+    """Підсумки користувача, розріз по категоріях та кільцевий буфер останніх тестів
+
+    record() змінює лише лічильники, один запис словника категорій і буфер
+    фіксованої довжини, тож вартість не залежить від довжини історії.
+    """
+
+    __slots__ = ('user_id', 'tests', 'total_questions', 'correct_answers', 'time_spent',
+                 'percentage_sum', 'categories', 'recent')
+
+    def __init__(self, user_id: int, recent_size: int = 10):
+        self.user_id = user_id
+        self.tests = 0
+        self.total_questions = 0
+        self.correct_answers = 0
+        self.time_spent = 0
+        self.percentage_sum = 0.0
+        # category_id -> [кількість тестів, сума відсотків]
+        self.categories: Dict[int, List] = {}
+        # (дата, category_id, питань, правильно, час), від старших до новіших
+        self.recent: deque = deque(maxlen=recent_size)
+
+    def record(self, category_id: int, total_questions: int, correct_answers: int,
+               time_spent: int, test_date: Optional[str] = None):
+        """Врахування одного завершеного тесту"""
+        percentage = correct_answers * 100.0 / total_questions
+        self.tests += 1
+        self.total_questions += total_questions
+        self.correct_answers += correct_answers
+        self.time_spent += time_spent
+        self.percentage_sum += percentage
+
+        category = self.categories.setdefault(category_id, [0, 0.0])
+        category[0] += 1
+        category[1] += percentage
+
+        if test_date is None:
+            # Той самий формат і часовий пояс (UTC), що й CURRENT_TIMESTAMP
+            test_date = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self.recent.append((test_date, category_id, total_questions, correct_answers, time_spent))
+
+    @property
+    def average_percentage(self) -> Optional[float]:
+        return self.percentage_sum / self.tests if self.tests else None
+
+    def copy(self) -> 'UserStats':
+        stats = UserStats(self.user_id, self.recent.maxlen)
+        stats.tests = self.tests
+        stats.total_questions = self.total_questions
+        stats.correct_answers = self.correct_answers
+        stats.time_spent = self.time_spent
+        stats.percentage_sum = self.percentage_sum
+        stats.categories = {key: list(value) for key, value in self.categories.items()}
+        stats.recent.extend(self.recent)
+        return stats
+
+    def to_row(self) -> Tuple:
+        """Рядок таблиці user_stats"""
+        return (self.user_id, self.tests, self.total_questions, self.correct_answers,
+                self.time_spent, self.percentage_sum,
+                json.dumps(self.categories), json.dumps(list(self.recent), ensure_ascii=False))
+
+    @classmethod
+    def from_row(cls, row: Tuple, recent_size: int) -> 'UserStats':
+        stats = cls(row[0], recent_size)
+        stats.tests, stats.total_questions, stats.correct_answers, stats.time_spent = (
+            int(value) for value in row[1:5])
+        stats.percentage_sum = float(row[5])
+        # Ключі JSON - рядки
+        stats.categories = {int(key): value for key, value in json.loads(row[6]).items()}
+        stats.recent.extend(tuple(test) for test in json.loads(row[7]))
+        return stats
+
+
+class UserStatsStore:
+    """LRU-кеш зведень користувачів поверх таблиці user_stats
+
+    Відсутнє зведення один раз будується з історії (разом з архівними
+    підсумками) і зберігається. Далі finish_session оновлює його в тій самій
+    транзакції, що й результат тесту, а кеш отримує нову копію лише після
+    успішного запису. GUI і сервер можуть писати в одну базу, тому в цій
+    транзакції зведення перечитується з таблиці, а не береться з кешу.
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, backend, capacity: Optional[int] = None,
+                 recent_size: Optional[int] = None):
+        settings = config.USER_STATS_CONFIG
+        self.backend = backend
+        self.capacity = capacity or settings['cache_size']
+        self.recent_size = recent_size or settings['recent_tests']
+        self.repository = UserStatsRepository(backend)
+        self.statistics = StatisticsRepository(backend)
+        self.questions = QuestionRepository(backend)
+        self._entries: "OrderedDict[int, UserStats]" = OrderedDict()
+        self._category_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        # Оновлення одного користувача серіалізуються, різних - ні
+        self._user_locks = [threading.RLock() for _ in range(self.LOCK_STRIPES)]
+
+    def lock_for(self, user_id: int) -> threading.RLock:
+        """Блокування для послідовності prepare -> запис -> put"""
+        return self._user_locks[user_id % self.LOCK_STRIPES]
+
+    def _rebuild(self, user_id: int) -> UserStats:
+        """Побудова зведення з історії результатів (лише при першому зверненні)"""
+        stats = UserStats(user_id, self.recent_size)
+        (stats.tests, stats.total_questions, stats.correct_answers,
+         stats.time_spent) = self.statistics.get_user_totals(user_id)
+        for category_id, tests, percentage_sum in self.repository.get_category_totals(user_id):
+            stats.categories[category_id] = [tests, percentage_sum]
+            stats.percentage_sum += percentage_sum
+
+        stats.recent.extend(reversed(self.repository.get_recent(user_id, self.recent_size)))
+
+        self.repository.save(stats.to_row())
+        return stats
+
+    def get(self, user_id: int) -> UserStats:
+        """Зведення користувача (спільний об'єкт - не змінювати)"""
+        with self._lock:
+            stats = self._entries.get(user_id)
+            if stats is not None:
+                self._entries.move_to_end(user_id)
+                return stats
+
+        # Під блокуванням користувача: інакше застаріле зведення з бази могло б
+        # потрапити в кеш після свіжого, записаного паралельним finish_session
+        with self.lock_for(user_id):
+            with self._lock:
+                stats = self._entries.get(user_id)
+            if stats is None:
+                row = self.repository.get(user_id)
+                stats = (UserStats.from_row(row, self.recent_size) if row
+                         else self._rebuild(user_id))
+                self.put(stats)
+        return stats
+
+    def prepare(self, user_id: int) -> UserStats:
+        """Копія зведення для оновлення (завантажується до транзакції запису результату)"""
+        return self.get(user_id).copy()
+
+    def reload(self, cursor, stats: UserStats) -> UserStats:
+        """Актуальне зведення в транзакції запису (stats - якщо рядка вже немає)"""
+        row = self.repository.get(stats.user_id, cursor)
+        return UserStats.from_row(row, self.recent_size) if row else stats
+
+    def write(self, cursor, stats: UserStats):
+        """Запис оновленого зведення в транзакції результату тесту"""
+        self.repository.save(stats.to_row(), cursor)
+
+    def put(self, stats: UserStats):
+        with self._lock:
+            self._entries[stats.user_id] = stats
+            self._entries.move_to_end(stats.user_id)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        """Видалення з кешу (після видалення результатів користувача)"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def get_category_names(self) -> Dict[int, str]:
+        if not self._category_names:
+            self._category_names = {category_id: name for category_id, name, _
+                                    in self.questions.get_categories()}
+        return self._category_names
+
+    def _category_name(self, category_id: int) -> str:
+        names = self.get_category_names()
+        if category_id not in names:
+            # Категорію додано після завантаження довідника
+            self._category_names = {}
+            names = self.get_category_names()
+        return names.get(category_id, str(category_id))
+
+    def get_user_summary(self, user_id: int) -> Tuple[int, Optional[float], int]:
+        """(кількість тестів, середній відсоток, загальний час) - як у StatisticsRepository"""
+        stats = self.get(user_id)
+        return stats.tests, stats.average_percentage, stats.time_spent
+
+    def get_user_categories(self, user_id: int) -> List[Tuple[str, int, float]]:
+        """(категорія, кількість тестів, середній відсоток) від кращої до гіршої"""
+        stats = self.get(user_id)
+        rows = [(self._category_name(category_id), tests, percentage_sum / tests)
+                for category_id, (tests, percentage_sum) in stats.categories.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def get_recent_tests(self, user_id: int) -> List[Tuple[str, str, int, int, int]]:
+        """Останні тести з буфера: (дата, категорія, питань, правильно, час), новіші першими"""
+        return [(test_date, self._category_name(category_id), total, correct, seconds)
+                for test_date, category_id, total, correct, seconds
+                in reversed(self.get(user_id).recent)]
+
+
+class SQLiteFileBackend:
+    """Мінімальний менеджер бази за іменем файлу (для адмін-панелі)"""
+
+    dialect = 'sqlite'
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+
+    @contextmanager
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_name)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_stores: Dict[str, UserStatsStore] = {}
+_registry_lock = threading.Lock()
+
+
+def get_user_stats_store(db_name: str, backend=None) -> UserStatsStore:
+    """Спільний кеш зведень для бази (backend - менеджер бази, якщо він уже є)"""
+    with _registry_lock:
+        if db_name not in _stores:
+            _stores[db_name] = UserStatsStore(backend or SQLiteFileBackend(db_name))
+        return _stores[db_name]
@@ -2,7 +2,6 @@
 Допоміжні функції та утиліти для програми-тренажера
 """
 
-import hashlib
 import secrets
 import string
 import datetime
@@ -13,19 +12,21 @@ from typing import Dict, List, Any, Optional
 import tkinter as tk
 from tkinter import messagebox, filedialog
 
+import security
+
 
 class SecurityUtils:
     """Утиліти для безпеки"""
 
     @staticmethod
     def hash_password(password: str) -> str:
-        """Хешування паролю"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Хешування паролю (PBKDF2/scrypt з сіллю, див. security.py)"""
+        return security.hash_password(password)
 
     @staticmethod
     def verify_password(password: str, hashed: str) -> bool:
-        """Перевірка паролю"""
-        return SecurityUtils.hash_password(password) == hashed
+        """Перевірка паролю, включно зі старими хешами SHA-256"""
+        return security.verify_password(password, hashed)
 
     @staticmethod
     def generate_session_token() -> str: